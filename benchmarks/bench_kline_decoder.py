@@ -0,0 +1,89 @@
+"""
+Kline decoding: current DataFrame builders vs strategys.kline_decoder.
+
+    python -m benchmarks.bench_kline_decoder
+"""
+
+import ast
+import json
+import timeit
+
+import pytz
+
+from strategys.kline_decoder import (
+    decode_kline,
+    decode_kline_message,
+    decode_unicornfy_kline,
+)
+from utils.helpers import kline_to_dataframe, unicornfy_to_dataframe
+
+NUMBER = 2000
+
+
+def load_fixtures() -> dict:
+    # kline_from_ws.json is a UnicornFy dict dumped with Python literals
+    with open("example_data/kline_from_ws.json") as f:
+        unicornfy = ast.literal_eval(f.read())
+
+    bar = {
+        "t": unicornfy["kline_start_time"],
+        "T": unicornfy["kline_close_time"],
+        "s": unicornfy["symbol"],
+        "i": unicornfy["interval"],
+        "f": 0,
+        "L": 0,
+        "o": unicornfy["open_price"],
+        "c": unicornfy["close_price"],
+        "h": unicornfy["high_price"],
+        "l": unicornfy["low_price"],
+        "v": unicornfy["base_volume"],
+        "n": unicornfy["number_of_trades"],
+        "x": True,
+        "q": unicornfy["quote"],
+        "V": unicornfy["taker_by_base_asset_volume"],
+        "Q": unicornfy["taker_by_quote_asset_volume"],
+        "B": unicornfy["ignore"],
+    }
+    message = {"e": "continuous_kline", "E": bar["T"], "k": bar}
+    return {
+        "unicornfy": unicornfy,
+        "bar": bar,
+        "message": message,
+        "raw": json.dumps(message),
+    }
+
+
+def bench(name: str, func) -> float:
+    per_call = min(timeit.repeat(func, number=NUMBER, repeat=5)) / NUMBER
+    print(f"{name:<36} {per_call * 1e6:>10.2f} us")
+    return per_call
+
+
+def main() -> None:
+    fixtures = load_fixtures()
+    unicornfy = fixtures["unicornfy"]
+    message = fixtures["message"]
+    bar = fixtures["bar"]
+    raw = fixtures["raw"]
+
+    bench("kline_to_dataframe", lambda: kline_to_dataframe(message))
+    bench("unicornfy_to_dataframe", lambda: unicornfy_to_dataframe(unicornfy))
+    try:
+        from strategys.utils import msg_to_dataframe
+
+        tz = pytz.timezone("Asia/Bangkok")
+        bench(
+            "msg_to_dataframe",
+            lambda: msg_to_dataframe(info=bar, interval="15m", tz=tz),
+        )
+    except ImportError as e:
+        print(f"{'msg_to_dataframe':<36} skipped ({e})")
+
+    bench("decode_kline", lambda: decode_kline(message["k"]))
+    bench("decode_unicornfy_kline", lambda: decode_unicornfy_kline(unicornfy))
+    bench("json.loads + decode_kline", lambda: decode_kline(json.loads(raw)["k"]))
+    bench("decode_kline_message", lambda: decode_kline_message(raw))
+
+
+if __name__ == "__main__":
+    main()
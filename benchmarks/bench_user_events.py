@@ -0,0 +1,96 @@
+"""
+User data stream throughput: the recorded session in list_msg.txt copied
+across many symbols and replayed to millions of events.
+
+    python -m benchmarks.bench_user_events --symbols 100 --events 2000000
+
+Each copy of the session gets its own symbol and the copies are
+interleaved event by event, so every symbol has a bracket open at the
+same time, like a multi-symbol bot.
+"""
+
+import argparse
+import json
+import time
+from typing import Callable, List
+
+from benchmarks.run_benchmarks import USER_DATA_MESSAGES
+from future_api.user_events import OrderTable, OrderUpdate, decode_user_event
+
+
+def load_events(path: str = USER_DATA_MESSAGES) -> List[dict]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def rename(event: dict, symbol: str) -> dict:
+    """``event`` for another symbol; order ids stay, they are per symbol."""
+    if event["e"] == "ORDER_TRADE_UPDATE":
+        return {**event, "o": {**event["o"], "s": symbol}}
+    if event["e"] == "ACCOUNT_UPDATE":
+        update = event["a"]
+        positions = [{**p, "s": symbol} for p in update.get("P", ())]
+        return {**event, "a": {**update, "P": positions}}
+    return event
+
+
+def interleave(events: List[dict], n_symbols: int) -> List[dict]:
+    symbols = [f"SYM{k}USDT" for k in range(n_symbols)]
+    return [rename(event, symbol) for event in events for symbol in symbols]
+
+
+def run(name: str, batch: List[dict], passes: int, func: Callable) -> float:
+    started = time.perf_counter()
+    for _ in range(passes):
+        func(batch)
+    elapsed = time.perf_counter() - started
+    count = len(batch) * passes
+    print(f"{name:<36} {count / elapsed:>12,.0f} events/s  ({elapsed:.2f}s)")
+    return elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--events", type=int, default=2_000_000)
+    args = parser.parse_args()
+
+    batch = interleave(load_events(), args.symbols)
+    passes = max(1, args.events // len(batch))
+    print(f"{args.symbols} symbols, {len(batch) * passes:,} events\n")
+
+    def decode(events):
+        for event in events:
+            decode_user_event(event)
+
+    table = OrderTable()
+
+    def apply(events):
+        for event in events:
+            if event["e"] == "ORDER_TRADE_UPDATE":
+                table.apply(OrderUpdate(event))
+
+    from utils.telegram_msg import TelegramMessage
+
+    telegram_msg = TelegramMessage()
+    messages = []
+
+    def telegram(events):
+        for event in events:
+            if event["e"] == "ORDER_TRADE_UPDATE":
+                telegram_msg.new_order_message(response=event)
+                for message in (
+                    telegram_msg.entry_message(),
+                    telegram_msg.exit_message(),
+                ):
+                    if message is not None:
+                        messages.append(message)
+
+    run("decode_user_event", batch, passes, decode)
+    run("OrderUpdate + OrderTable.apply", batch, passes, apply)
+    run("TelegramMessage", batch, passes, telegram)
+    print(f"\n{len(messages):,} messages, {len(table.orders)} orders left open")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""
+Hot-path microbenchmarks: indicators, kline parsing and state updates.
+
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --filter adx --compare old.json
+
+Each case runs on the example_data fixtures or on synthetic bars at
+several window sizes and symbol counts. Results (seconds per call) are
+written to benchmarks/results/<timestamp>.json; ``--compare`` prints the
+ratio to an earlier run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import timeit
+from datetime import datetime
+from functools import partial
+from typing import Callable, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.bench_kline_decoder import load_fixtures
+from strategys.kline_decoder import decode_kline
+from strategys.ring_buffer import KLINE_COLUMNS, OHLCVRingBuffer
+from utils.helpers import kline_list_to_df, kline_to_dataframe
+
+WINDOW_SIZES = (250, 1000, 5000)
+SYMBOL_COUNTS = (1, 10, 100)
+USER_DATA_MESSAGES = "example_data/user_data_stream/list_msg.txt"
+
+Case = Tuple[str, Dict[str, int], Callable[[], object]]
+
+
+def synthetic_ohlc(n_bars: int, seed: int = 0) -> pd.DataFrame:
+    """Random-walk hourly bars with the columns of ``KLINE_COLUMNS``."""
+    rng = np.random.default_rng(seed)
+    close = 2 * np.exp(np.cumsum(rng.normal(0, 0.01, n_bars)))
+    open_ = np.concatenate(([close[0]], close[:-1]))
+    spread = np.abs(rng.normal(0, 0.005, n_bars)) * close
+    volume = rng.uniform(1e4, 1e5, n_bars)
+    index = pd.date_range(
+        "2024-01-01", periods=n_bars, freq="h", tz="Asia/Bangkok", name="datetime"
+    )
+    return pd.DataFrame(
+        {
+            "open": open_,
+            "high": np.maximum(open_, close) + spread,
+            "low": np.minimum(open_, close) - spread,
+            "close": close,
+            "volume": volume,
+            "quote_asset": volume * close,
+            "trades": rng.integers(100, 1000, n_bars),
+            "taker_buy_base": volume / 2,
+            "take_buy_quote": volume * close / 2,
+        },
+        index=index,
+    )
+
+
+def kline_list(df: pd.DataFrame) -> list:
+    """``df`` in the layout of ``futures_klines``."""
+    open_times = df.index.as_unit("ms").asi8
+    return [
+        [int(t), *[str(row[c]) for c in KLINE_COLUMNS[:6]], int(t) + 3_599_999]
+        + [int(row["trades"]), str(row["taker_buy_base"])]
+        + [str(row["take_buy_quote"]), "0"]
+        for t, (_, row) in zip(open_times, df.iterrows())
+    ]
+
+
+def kline_message(df: pd.DataFrame, i: int) -> dict:
+    row = df.iloc[i]
+    open_time = int(df.index[i].value // 1_000_000)
+    bar = {key: str(row[column]) for key, column in zip("ohlcvq", KLINE_COLUMNS)}
+    bar.update(
+        t=open_time,
+        T=open_time + 3_599_999,
+        n=int(row["trades"]),
+        V=str(row["taker_buy_base"]),
+        Q=str(row["take_buy_quote"]),
+        x=True,
+    )
+    return {"e": "continuous_kline", "E": open_time + 3_600_000, "k": bar}
+
+
+def indicator_cases() -> Iterator[Case]:
+    from strategys.adx import ADX, ADX_2d, StreamingADX
+
+    for n_bars in WINDOW_SIZES:
+        df = synthetic_ohlc(n_bars)
+        yield "ADX", {"bars": n_bars}, partial(ADX, df["high"], df["low"], df["close"])
+
+    for n_symbols in SYMBOL_COUNTS:
+        values = [synthetic_ohlc(250, seed=i) for i in range(n_symbols)]
+        high, low, close = (
+            np.stack([df[column].to_numpy() for df in values])
+            for column in ("high", "low", "close")
+        )
+        params = {"bars": 250, "symbols": n_symbols}
+        yield "ADX_2d", params, partial(ADX_2d, high, low, close)
+
+    df = synthetic_ohlc(250)
+    adx = StreamingADX()
+    adx.seed(df["high"], df["low"], df["close"])
+    last = df.iloc[-1]
+    yield "StreamingADX.update", {}, partial(
+        adx.update, last["high"], last["low"], last["close"]
+    )
+
+
+def strategy_cases() -> Iterator[Case]:
+    from strategys.adx_strategy import Strategy
+
+    for n_bars in WINDOW_SIZES:
+        df = synthetic_ohlc(n_bars)
+        yield "Strategy.compute_signal", {"bars": n_bars}, partial(
+            Strategy().compute_signal,
+            close_price=df["close"],
+            high_price=df["high"],
+            low_price=df["low"],
+        )
+
+    df = synthetic_ohlc(250)
+    strategy = Strategy(compute_mode="streaming")
+    strategy.compute_signal(
+        close_price=df["close"], high_price=df["high"], low_price=df["low"]
+    )
+    last = df.iloc[-1]
+    yield "Strategy.update_signal", {}, partial(
+        strategy.update_signal,
+        close_price=last["close"],
+        high_price=last["high"],
+        low_price=last["low"],
+    )
+    yield "Strategy.condition", {}, partial(
+        strategy.condition, close_price=last["close"]
+    )
+
+
+def parsing_cases() -> Iterator[Case]:
+    for n_bars in WINDOW_SIZES:
+        klines = kline_list(synthetic_ohlc(n_bars))
+        yield "kline_list_to_df", {"bars": n_bars}, partial(kline_list_to_df, klines)
+
+    fixtures = load_fixtures()
+    message = fixtures["message"]
+    yield "kline_to_dataframe", {}, partial(kline_to_dataframe, message)
+    yield "decode_kline", {}, partial(decode_kline, message["k"])
+
+
+def msg_to_dataframe_cases() -> Iterator[Case]:
+    import pytz
+
+    from strategys.utils import msg_to_dataframe
+
+    bar = load_fixtures()["bar"]
+    tz = pytz.timezone("Asia/Bangkok")
+    yield "msg_to_dataframe", {}, partial(
+        msg_to_dataframe, info=bar, interval="15m", tz=tz
+    )
+
+
+def update_cases() -> Iterator[Case]:
+    for n_bars in WINDOW_SIZES:
+        df = synthetic_ohlc(n_bars + 1)
+        history, message = df.iloc[:-1], kline_message(df, n_bars)
+
+        def concat(history=history, message=message, n_bars=n_bars):
+            # update_dataframe before the ring buffer
+            data = pd.concat([history, kline_to_dataframe(message)])
+            return data.iloc[-n_bars:]
+
+        yield "update_dataframe (pd.concat)", {"bars": n_bars}, concat
+
+        def ring_buffer(
+            bars=OHLCVRingBuffer.from_dataframe(history, capacity=n_bars),
+            message=message,
+        ):
+            return bars.append(*decode_kline(message["k"]))
+
+        yield "update_dataframe (ring buffer)", {"bars": n_bars}, ring_buffer
+
+
+def handler_update_cases() -> Iterator[Case]:
+    from future_api.handler import BinanceHandler
+
+    df = synthetic_ohlc(251)
+    handler = BinanceHandler(base_asset="OP", quote_asset="USDT")
+    handler.bars = OHLCVRingBuffer.from_dataframe(df.iloc[:-1], capacity=250)
+    message = kline_message(df, 250)
+    yield "BinanceHandler.update_dataframe", {"bars": 250}, partial(
+        handler.update_dataframe, message
+    )
+
+
+def telegram_cases() -> Iterator[Case]:
+    from utils.telegram_msg import TelegramMessage
+
+    with open(USER_DATA_MESSAGES) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    orders = [event for event in events if event["e"] == "ORDER_TRADE_UPDATE"]
+    telegram_msg = TelegramMessage()
+
+    def replay():
+        for event in orders:
+            telegram_msg.new_order_message(response=event)
+
+    yield "TelegramMessage.new_order_message", {"messages": len(orders)}, replay
+
+
+GROUPS = (
+    indicator_cases,
+    strategy_cases,
+    parsing_cases,
+    msg_to_dataframe_cases,
+    update_cases,
+    handler_update_cases,
+    telegram_cases,
+)
+
+
+def measure(func: Callable[[], object], repeat: int = 5) -> Dict[str, float]:
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    times = np.array(timer.repeat(repeat=repeat, number=number)) / number
+    return {"best": float(times.min()), "median": float(np.median(times))}
+
+
+def case_key(name: str, params: Dict[str, int]) -> str:
+    if not params:
+        return name
+    return f"{name}[{','.join(f'{k}={v}' for k, v in params.items())}]"
+
+
+def environment() -> Dict[str, str]:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "time": datetime.now().isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def run(name_filter: str = "") -> Dict[str, dict]:
+    results = {}
+    for group in GROUPS:
+        try:
+            cases: List[Case] = list(group())
+        except (ImportError, OSError) as e:
+            # missing optional packages, or no .env.local for the API modules
+            print(f"{group.__name__:<48} skipped ({e})")
+            continue
+        for name, params, func in cases:
+            key = case_key(name, params)
+            if name_filter.lower() not in key.lower():
+                continue
+            results[key] = {"name": name, "params": params, **measure(func)}
+            print(f"{key:<48} {results[key]['best'] * 1e6:>12.2f} us")
+    return results
+
+
+def compare(results: Dict[str, dict], baseline_path: str) -> None:
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    print(f"\n{'case':<48} {'baseline':>12} {'current':>12} {'ratio':>8}")
+    for key, result in results.items():
+        if key in baseline:
+            before, after = baseline[key]["best"], result["best"]
+            print(
+                f"{key:<48} {before * 1e6:>10.2f}us {after * 1e6:>10.2f}us"
+                f" {after / before:>7.2f}x"
+            )
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--filter", default="", help="substring of case names")
+    parser.add_argument("--output", default=None, help="result JSON path")
+    parser.add_argument("--compare", default=None, help="earlier result JSON")
+    args = parser.parse_args(argv)
+
+    results = run(args.filter)
+    output = args.output or os.path.join(
+        "benchmarks", "results", f"{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump({"environment": environment(), "results": results}, f, indent=2)
+    print(f"\nSaved {len(results)} results to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
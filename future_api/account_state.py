@@ -0,0 +1,102 @@
+import time
+from typing import Dict, Optional
+
+
+class AccountState:
+    """
+    In-memory balances and positions of the futures account.
+
+    Loaded from a ``futures_account`` REST payload and then kept current by
+    ACCOUNT_UPDATE events from the user data stream; open orders live in
+    ``future_api.oms.OrderManager``.
+    Reads cost no request weight; callers reconcile over REST when
+    ``needs_reconcile`` says the state is stale or too old.
+    """
+
+    def __init__(self, reconcile_interval: float = 300) -> None:
+        self.reconcile_interval = reconcile_interval
+        self.balances: Dict[str, Dict[str, Optional[float]]] = {}
+        self.positions: Dict[str, Dict[str, float]] = {}
+        self.synced = False
+        self.last_reconcile = 0.0
+        self.last_event_time = 0
+
+    def load_account(self, f_acc: dict) -> None:
+        """Replace the state with a ``futures_account`` response."""
+        self.balances = {
+            data.get("asset"): {
+                "wallet": float(data.get("walletBalance")),
+                "cross_wallet": float(data.get("crossWalletBalance")),
+                "available": float(data.get("availableBalance")),
+            }
+            for data in f_acc.get("assets")
+        }
+        now = int(time.time() * 1000)
+        self.positions = {
+            data.get("symbol"): {
+                "amount": float(data.get("positionAmt")),
+                "entry_price": float(data.get("entryPrice", 0)),
+                "time": now,
+            }
+            for data in f_acc.get("positions")
+        }
+        self.synced = True
+        self.last_reconcile = time.monotonic()
+
+    def mark_stale(self) -> None:
+        """Events may have been missed (e.g. the stream dropped)."""
+        self.synced = False
+
+    def needs_reconcile(self) -> bool:
+        return (
+            not self.synced
+            or time.monotonic() - self.last_reconcile > self.reconcile_interval
+        )
+
+    def apply(self, event: dict) -> bool:
+        """Apply one user data stream event; ``False`` if it is not used."""
+        event_type = event.get("e")
+        if event_type != "ACCOUNT_UPDATE":
+            return False
+        self.apply_account_update(event)
+        self.last_event_time = max(self.last_event_time, event.get("E", 0))
+        return True
+
+    def apply_account_update(self, event: dict) -> None:
+        update = event.get("a")
+        for data in update.get("P", []):
+            self.positions[data.get("s")] = {
+                "amount": float(data.get("pa")),
+                "entry_price": float(data.get("ep")),
+                "time": event.get("T", event.get("E", 0)),
+            }
+
+        is_flat = all(position["amount"] == 0 for position in self.positions.values())
+        for data in update.get("B", []):
+            cross_wallet = float(data.get("cw"))
+            self.balances[data.get("a")] = {
+                "wallet": float(data.get("wb")),
+                "cross_wallet": cross_wallet,
+                # the stream has no available balance; with no open position
+                # it is the cross wallet balance, otherwise ask REST
+                "available": cross_wallet if is_flat else None,
+            }
+
+    def position_amount(self, symbol: str) -> float:
+        return self.positions.get(symbol, {}).get("amount", 0.0)
+
+    def entry_price(self, symbol: str) -> float:
+        return self.positions.get(symbol, {}).get("entry_price", 0.0)
+
+    def position_time(self, symbol: str) -> int:
+        """
+        Wall time (ms) the position was last known: the transaction time of
+        its last ACCOUNT_UPDATE or when the REST snapshot was loaded.
+        """
+        return self.positions.get(symbol, {}).get("time", 0)
+
+    def wallet_balance(self, asset: str) -> Optional[float]:
+        return self.balances.get(asset, {}).get("wallet")
+
+    def available_balance(self, asset: str) -> Optional[float]:
+        return self.balances.get(asset, {}).get("available")
@@ -0,0 +1,400 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from binance import AsyncClient, BinanceSocketManager
+from binance.enums import FUTURE_ORDER_TYPE_MARKET, SIDE_BUY, SIDE_SELL
+
+from future_api.account_state import AccountState
+from future_api.bracket import (
+    LEG_NAMES,
+    POSITION_SIDES,
+    bracket_message,
+    bracket_orders,
+    bracket_prices,
+    leg_results,
+    validate_legs,
+)
+from future_api.connection import create_client
+from future_api.exchange_info import ExchangeInfoCache, SymbolRules
+from future_api.oms import OrderManager
+from future_api.user_events import OrderUpdate
+from strategys.kline_cache import KlineCache, interval_to_ms
+from strategys.ring_buffer import KLINE_COLUMNS
+from utils.env import load_env
+from utils.helpers import kline_list_to_df
+from utils.latency import latency
+from utils.telegram_notifier import notifier
+
+load_env()
+API_KEY = os.getenv("API_KEY")
+API_SECRET = os.getenv("API_SECRET")
+
+
+class AsyncBinanceFuturesAPI:
+    """
+    ``BinanceFuturesAPI`` on top of python-binance's ``AsyncClient``: the same
+    methods as coroutines, so order flow never blocks the event loop.
+    Build it with ``await AsyncBinanceFuturesAPI.create(...)``.
+
+    Positions and balances are read from ``self.account`` and open orders
+    from ``self.orders``, both kept current by ``run_user_stream``; REST is
+    only used to reconcile them.
+    """
+
+    def __init__(self, client: AsyncClient, base_asset: str, quote_asset: str) -> None:
+        self.client = client
+
+        self.base_asset = base_asset
+        self.quote_asset = quote_asset
+        self.symbol = f"{self.base_asset}{self.quote_asset}"
+
+        self.base_position = 0
+        self.quote_position = 0
+
+        self.tp_pct = 0.16
+        self.sl_pct = 0.02
+        self.tl_act_pct = 0.02
+        self.tl_exec_pct = 1  # min 0.1, max 5 where 1 for 1%
+        # share of the available balance put into one entry
+        self.quantity_ratio = 0.8
+        # quote amount an entry is sized against instead of the whole
+        # available balance (capped by it), e.g. a share of the wallet
+        self.allocation: Optional[float] = None
+        # wall time the bar behind the current order flow was received
+        self.bar_received: float = None
+        # exchange time (ms) of the last entry order; the cached position
+        # only describes that entry if it was updated at or after it
+        self.entry_time: Optional[int] = None
+
+        self.kline_cache = KlineCache(market="futures")
+        self.account = AccountState()
+        self.orders = OrderManager()
+        self.exchange_info = ExchangeInfoCache()
+        self.stream_retry_delay = 5
+
+    @classmethod
+    async def create(
+        cls,
+        base_asset: str,
+        quote_asset: str,
+        client: AsyncClient = None,
+        account: AccountState = None,
+        exchange_info: ExchangeInfoCache = None,
+        orders: OrderManager = None,
+        warm_up: bool = True,
+    ) -> "AsyncBinanceFuturesAPI":
+        """
+        ``account``, ``exchange_info`` and ``orders`` may be shared across
+        symbols. With ``warm_up=False`` the caller awaits ``warm_up()``
+        itself, e.g. alongside other startup requests.
+        """
+        if client is None:
+            client = await create_client(API_KEY, API_SECRET)
+        self = cls(client=client, base_asset=base_asset, quote_asset=quote_asset)
+        if account is not None:
+            self.account = account
+        if exchange_info is not None:
+            self.exchange_info = exchange_info
+        if orders is not None:
+            self.orders = orders
+        if warm_up:
+            await self.warm_up()
+        return self
+
+    async def warm_up(self) -> None:
+        """Load the account state and symbol rules, concurrently."""
+        await asyncio.gather(self._sync_account(), self.symbol_rules())
+        self.quote_position = self.account.available_balance(self.quote_asset) or 0
+        self.base_position = self.account.position_amount(self.symbol)
+
+    async def update_position(self) -> None:
+        """Reconcile the account state over REST."""
+        self.account.load_account(await self.client.futures_account())
+        self.quote_position = self.account.available_balance(self.quote_asset) or 0
+        self.base_position = self.account.position_amount(self.symbol)
+
+    async def sync_orders(self) -> None:
+        """Reload the open orders of every symbol over REST."""
+        self.orders.load_open_orders(await self.client.futures_get_open_orders())
+
+    async def run_user_stream(self) -> None:
+        """
+        Feed user data stream events into the account state and the order
+        manager, forever.
+        """
+        bm = BinanceSocketManager(self.client)
+        while True:
+            try:
+                async with bm.futures_user_socket() as stream:
+                    # events before the socket opened were missed
+                    await asyncio.gather(self.update_position(), self.sync_orders())
+                    while True:
+                        event = await stream.recv()
+                        if event.get("e") == "error":
+                            raise ConnectionError(event)
+                        if event.get("e") != "ORDER_TRADE_UPDATE":
+                            self.account.apply(event)
+                            continue
+                        update = OrderUpdate(event)
+                        self.orders.apply(update)
+                        if update.status == "FILLED":
+                            latency.record_fill(update.client_order_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logging.error(f"User data stream: {e}")
+                self.account.mark_stale()
+                self.orders.mark_stale()
+                await asyncio.sleep(self.stream_retry_delay)
+
+    async def symbol_rules(self) -> SymbolRules:
+        if self.exchange_info.needs_fetch(self.symbol):
+            exchange_info = await self.client.futures_exchange_info()
+            await asyncio.to_thread(self.exchange_info.update, exchange_info)
+        return self.exchange_info.get(self.symbol)
+
+    async def _sync_account(self) -> None:
+        if self.account.needs_reconcile():
+            await self.update_position()
+
+    async def _create_order(self, **params) -> dict:
+        sent = time.time()
+        if self.bar_received is not None:
+            # only the first order of a flow measures the signal path
+            latency.record(self.symbol, "signal_to_submit", sent - self.bar_received)
+            self.bar_received = None
+        # the fill can reach the user stream before the response arrives
+        client_order_id = self.client.CONTRACT_ORDER_PREFIX + self.client.uuid22()
+        latency.mark(client_order_id, self.symbol, sent)
+        try:
+            res = await self.client.futures_create_order(
+                newClientOrderId=client_order_id, **params
+            )
+        except Exception:
+            latency.discard(client_order_id)
+            raise
+        latency.record(self.symbol, "order_ack", time.time() - sent)
+        return res
+
+    async def cancel_all_orders(self) -> None:
+        # untriggered TP/SL/TS legs are algo orders, which neither the user
+        # stream's order table nor ``allOpenOrders`` covers
+        cancels = [self.client.futures_cancel_all_algo_open_orders(symbol=self.symbol)]
+        if not self.orders.synced or self.orders.has_open_orders(self.symbol):
+            cancels.append(
+                self.client.futures_cancel_all_open_orders(symbol=self.symbol)
+            )
+        await asyncio.gather(*cancels)
+        notifier.notify("Cancel all orders")
+
+    async def get_entry_price(self) -> float:
+        await self._sync_account()
+        return self.account.entry_price(self.symbol)
+
+    async def get_abs_position(self) -> float:
+        await self._sync_account()
+        return np.abs(self.account.position_amount(self.symbol))
+
+    async def get_real_position(self) -> float:
+        await self._sync_account()
+        return self.account.position_amount(self.symbol)
+
+    async def historical_kline(
+        self, symbol: str, interval: str, limit: int, since: int = None
+    ) -> pd.DataFrame:
+        """
+        Last ``limit`` closed bars, served from the local kline cache; with
+        ``since`` (an open time in ms) only the ones opened after it.
+        """
+        loop = asyncio.get_running_loop()
+
+        def fetch(start_ms: int, end_ms: int) -> pd.DataFrame:
+            kline_list = asyncio.run_coroutine_threadsafe(
+                self.client.futures_historical_klines(
+                    symbol=symbol,
+                    interval=interval,
+                    start_str=start_ms,
+                    end_str=end_ms - 1,
+                ),
+                loop,
+            ).result()
+            return kline_list_to_df(kline_list=kline_list, drop_last=False)
+
+        interval_ms = interval_to_ms(interval)
+        end_ms = int(time.time() * 1000) // interval_ms * interval_ms
+        start_ms = end_ms - limit * interval_ms
+        if since is not None:
+            start_ms = max(start_ms, since + interval_ms)
+        # disk access and fetch merging run off the loop
+        return await asyncio.to_thread(
+            self.kline_cache.get,
+            symbol=symbol,
+            interval=interval,
+            start_ms=start_ms,
+            end_ms=end_ms,
+            fetch=fetch,
+            columns=KLINE_COLUMNS,
+        )
+
+    async def calculate_quantity(self, ratio: float = None) -> float:
+        ratio = self.quantity_ratio if ratio is None else ratio
+        if (
+            self.account.needs_reconcile()
+            or self.account.available_balance(self.quote_asset) is None
+        ):
+            _, ticker = await asyncio.gather(
+                self.update_position(),
+                self.client.futures_symbol_ticker(symbol=self.symbol),
+            )
+        else:
+            ticker = await self.client.futures_symbol_ticker(symbol=self.symbol)
+            self.quote_position = self.account.available_balance(self.quote_asset)
+        lastest_price = float(ticker.get("price"))
+        rules = await self.symbol_rules()
+        budget = self.quote_position
+        if self.allocation is not None:
+            budget = min(budget, self.allocation)
+        quantity = rules.round_qty((budget / lastest_price) * ratio, market=True)
+        error = rules.validate(lastest_price, quantity=quantity, market=True)
+        if error is not None:
+            raise ValueError(f"Order quantity rejected: {error}")
+        return quantity
+
+    async def enter_long_market(self):
+        res = await self._create_order(
+            symbol=self.symbol,
+            side=SIDE_BUY,
+            type=FUTURE_ORDER_TYPE_MARKET,
+            quantity=await self.calculate_quantity(),
+        )
+        self.entry_time = res.get("updateTime", int(time.time() * 1000))
+        logging.info("Enter long")
+        logging.info(res)
+        notifier.notify("Enter long")
+
+    async def enter_short_market(self):
+        res = await self._create_order(
+            symbol=self.symbol,
+            side=SIDE_SELL,
+            type=FUTURE_ORDER_TYPE_MARKET,
+            quantity=await self.calculate_quantity(),
+        )
+        self.entry_time = res.get("updateTime", int(time.time() * 1000))
+        logging.info("Enter short")
+        logging.info(res)
+        notifier.notify("Enter short")
+
+    async def exit_long_market(self):
+        try:
+            res = await self._create_order(
+                symbol=self.symbol,
+                side=SIDE_SELL,
+                type=FUTURE_ORDER_TYPE_MARKET,
+                quantity=await self.get_abs_position(),
+            )
+            logging.info("Exit long")
+            logging.info(res)
+            notifier.notify("Exit long")
+        except Exception as e:
+            logging.error(e)
+            notifier.notify(f"Error: {e}")
+
+    async def exit_short_market(self):
+        try:
+            res = await self._create_order(
+                symbol=self.symbol,
+                side=SIDE_BUY,
+                type=FUTURE_ORDER_TYPE_MARKET,
+                quantity=await self.get_abs_position(),
+            )
+            logging.info("Exit short")
+            logging.info(res)
+            notifier.notify("Exit short")
+        except Exception as e:
+            logging.error(e)
+            notifier.notify(f"Error: {e}")
+
+    async def place_stop_signal(self, position_side: str) -> Dict[str, dict]:
+        """
+        Place TP, SL and trailing stop for the open position, one
+        concurrent ``futures_create_order`` per leg. Returns the per-leg
+        results.
+        """
+        if position_side not in POSITION_SIDES:
+            raise ValueError(f"Position side {position_side} is not supported.")
+        sign = 1 if position_side == "long" else -1
+        await self._sync_account()
+        entry_price = self.account.entry_price(self.symbol)
+        amount = self.account.position_amount(self.symbol)
+        if (
+            entry_price == 0
+            or sign * amount <= 0
+            or self.entry_time is None
+            or self.account.position_time(self.symbol) < self.entry_time
+        ):
+            # the fill has not reached the stream yet; during a flip the
+            # cache still holds the previous, opposite position. Ask REST
+            info = await self.client.futures_position_information(symbol=self.symbol)
+            entry_price = float(info[0].get("entryPrice"))
+            amount = float(info[0].get("positionAmt"))
+        if sign * amount <= 0 or entry_price == 0:
+            error = f"no {position_side} position (amount {amount})"
+            logging.error(f"Place {position_side} stop signal: {error}")
+            notifier.notify(f"Place {position_side} stop signal failed: {error}")
+            return {leg: {"ok": False, "error": error} for leg in LEG_NAMES}
+        quantity = np.abs(amount)
+        rules = await self.symbol_rules()
+        prices = bracket_prices(
+            position_side=position_side,
+            entry_price=entry_price,
+            tp_pct=self.tp_pct,
+            sl_pct=self.sl_pct,
+            tl_act_pct=self.tl_act_pct,
+            rules=rules,
+        )
+        logging.info(f"entry_price: {entry_price}")
+        logging.info(f"TP: {prices['TP']}, SL: {prices['SL']}, TL: {prices['TS']}")
+        logging.info(f"Place {position_side} stop signal")
+
+        orders, results = validate_legs(
+            bracket_orders(
+                symbol=self.symbol,
+                position_side=position_side,
+                prices=prices,
+                quantity=quantity,
+                callback_rate=self.tl_exec_pct,
+                rules=rules,
+            ),
+            prices=prices,
+            quantity=quantity,
+            rules=rules,
+        )
+        if orders:
+            sent = time.time()
+            responses = await asyncio.gather(
+                *(
+                    self.client.futures_create_order(**order)
+                    for order in orders.values()
+                ),
+                return_exceptions=True,
+            )
+            latency.record(self.symbol, "order_ack", time.time() - sent)
+            logging.info(responses)
+            results.update(leg_results(list(orders), responses))
+
+        for leg, result in results.items():
+            if not result["ok"]:
+                logging.error(f"{leg} leg failed: {result['error']}")
+        notifier.notify(bracket_message(position_side, entry_price, prices, results))
+        return results
+
+    async def place_long_stop_signal(self) -> Dict[str, dict]:
+        return await self.place_stop_signal("long")
+
+    async def place_short_stop_signal(self) -> Dict[str, dict]:
+        return await self.place_stop_signal("short")
@@ -0,0 +1,143 @@
+from typing import Dict, List, Tuple, Union
+
+from binance.enums import (
+    FUTURE_ORDER_TYPE_STOP_MARKET,
+    FUTURE_ORDER_TYPE_TAKE_PROFIT_MARKET,
+    FUTURE_ORDER_TYPE_TRAILING_STOP_MARKET,
+    SIDE_BUY,
+    SIDE_SELL,
+)
+
+from future_api.exchange_info import SymbolRules
+
+# Protective legs placed after an entry, in submission order
+LEG_NAMES = ("TP", "SL", "TS")
+
+POSITION_SIDES = ("long", "short")
+
+
+def bracket_prices(
+    position_side: str,
+    entry_price: float,
+    tp_pct: float,
+    sl_pct: float,
+    tl_act_pct: float,
+    rules: SymbolRules,
+) -> Dict[str, float]:
+    """
+    TP, SL and trailing stop activation prices around ``entry_price``,
+    rounded to the symbol's tick size.
+    """
+    if position_side not in POSITION_SIDES:
+        raise ValueError(f"Position side {position_side} is not supported.")
+    sign = 1 if position_side == "long" else -1
+    return {
+        "TP": rules.round_price(entry_price * (1 + sign * tp_pct)),
+        "SL": rules.round_price(entry_price * (1 - sign * sl_pct)),
+        "TS": rules.round_price(entry_price * (1 + sign * tl_act_pct)),
+    }
+
+
+def bracket_orders(
+    symbol: str,
+    position_side: str,
+    prices: Dict[str, float],
+    quantity: float,
+    callback_rate: float,
+    rules: SymbolRules,
+) -> Dict[str, dict]:
+    """
+    ``futures_create_order`` parameters per leg, formatted to the symbol's
+    precision. python-binance sends these conditional types to the
+    ``algoOrder`` endpoint (``stopPrice`` becomes ``triggerPrice``), which
+    takes the trailing stop's activation as ``activatePrice``.
+    """
+    side = SIDE_SELL if position_side == "long" else SIDE_BUY
+    return {
+        "TP": {
+            "symbol": symbol,
+            "side": side,
+            "type": FUTURE_ORDER_TYPE_TAKE_PROFIT_MARKET,
+            "stopPrice": rules.format_price(prices["TP"]),
+            "closePosition": "true",
+            "timeInForce": "GTE_GTC",
+        },
+        "SL": {
+            "symbol": symbol,
+            "side": side,
+            "type": FUTURE_ORDER_TYPE_STOP_MARKET,
+            "stopPrice": rules.format_price(prices["SL"]),
+            "closePosition": "true",
+            "timeInForce": "GTE_GTC",
+        },
+        "TS": {
+            "symbol": symbol,
+            "side": side,
+            "type": FUTURE_ORDER_TYPE_TRAILING_STOP_MARKET,
+            "activatePrice": rules.format_price(prices["TS"]),
+            "callbackRate": str(callback_rate),
+            "quantity": rules.format_qty(quantity, market=True),
+            "timeInForce": "GTC",
+        },
+    }
+
+
+def validate_legs(
+    orders: Dict[str, dict],
+    prices: Dict[str, float],
+    quantity: float,
+    rules: SymbolRules,
+) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    """
+    Split legs into ``(to_submit, rejected)``. A leg the exchange would
+    reject (a price or quantity outside the symbol's filters) is rejected
+    locally and the other legs still go out.
+    """
+    to_submit, rejected = {}, {}
+    for leg, order in orders.items():
+        # the legs execute as market orders, so MARKET_LOT_SIZE applies
+        error = rules.validate(
+            prices[leg],
+            quantity=(
+                rules.round_qty(quantity, market=True) if "quantity" in order else None
+            ),
+            market=True,
+        )
+        if error is None:
+            to_submit[leg] = order
+        else:
+            rejected[leg] = {"ok": False, "error": error}
+    return to_submit, rejected
+
+
+def leg_results(
+    legs: List[str], responses: List[Union[dict, BaseException]]
+) -> Dict[str, dict]:
+    """
+    Match the per-leg responses (same order as ``legs``) to legs; a leg
+    whose request raised has the exception in place of its response.
+    """
+    results = {}
+    for leg, res in zip(legs, responses):
+        if isinstance(res, BaseException):
+            results[leg] = {"ok": False, "error": str(res)}
+        else:
+            results[leg] = {"ok": True, "order": res}
+    return results
+
+
+def bracket_message(
+    position_side: str,
+    entry_price: float,
+    prices: Dict[str, float],
+    results: Dict[str, dict],
+) -> str:
+    lines = [
+        f"Place {position_side} stop signal",
+        f"Entry price: {entry_price}",
+    ]
+    for leg in LEG_NAMES:
+        result = results[leg]
+        status = "OK" if result["ok"] else f"FAILED ({result['error']})"
+        lines.append(f"{leg}: {prices[leg]} {status}")
+    return "\n".join(lines)
@@ -1,8 +1,12 @@
 import logging
 import os
+import time
+import warnings
+from typing import Dict
 
 import numpy as np
 import pandas as pd
+from binance import ThreadedWebsocketManager
 from binance.client import Client
 from binance.enums import (  # noqa
     FUTURE_ORDER_TYPE_LIMIT,
@@ -19,23 +23,43 @@ from binance.enums import (  # noqa
     TIME_IN_FORCE_GTC,
     TIME_IN_FORCE_IOC,
 )
-from dotenv import find_dotenv, load_dotenv
 
+from future_api.account_state import AccountState
+from future_api.bracket import (
+    bracket_message,
+    bracket_orders,
+    bracket_prices,
+    leg_results,
+    validate_legs,
+)
+from future_api.exchange_info import ExchangeInfoCache, SymbolRules
+from strategys.kline_cache import KlineCache, interval_to_ms
+from strategys.ring_buffer import KLINE_COLUMNS
+from utils.env import load_env
 from utils.helpers import kline_list_to_df
 from utils.telegram_api import send_message
 
-load_dotenv(
-    find_dotenv(filename=".env.local", raise_error_if_not_found=True),
-    override=True,
-)
+load_env()
 
 API_KEY = os.getenv("API_KEY")
 API_SECRET = os.getenv("API_SECRET")
 
 
 class BinanceFuturesAPI:
+    """
+    Deprecated blocking client, kept for notebooks and one-off scripts; the
+    bots run on ``AsyncBinanceFuturesAPI``. Telegram messages go out inline
+    through the blocking ``send_message``, so every notification holds up
+    the caller for a request.
+    """
+
     def __init__(self, base_asset: str, quote_asset: str) -> None:
-        self.client = Client(API_KEY, API_SECRET)
+        warnings.warn(
+            "BinanceFuturesAPI is deprecated, use AsyncBinanceFuturesAPI",
+            DeprecationWarning,
+            stacklevel=2,
+        )
+        self.client = Client(API_KEY, API_SECRET, ping=False)
 
         self.base_asset = base_asset
         self.quote_asset = quote_asset
@@ -43,7 +67,12 @@ class BinanceFuturesAPI:
 
         self.base_position = 0
         self.quote_position = 0
+        self.account = AccountState()
+        self.exchange_info = ExchangeInfoCache()
         self.update_position()
+        self.twm: ThreadedWebsocketManager = None
+
+        self.kline_cache = KlineCache(market="futures")
 
         self.tp_pct = 0.16
         self.sl_pct = 0.02
@@ -54,45 +83,92 @@ class BinanceFuturesAPI:
         #     raise ValueError("Base position must be 0")
 
     def update_position(self) -> None:
-        f_acc = self.client.futures_account()
-        for data in f_acc.get("assets"):
-            if data.get("asset") == self.quote_asset:
-                self.quote_position = float(data.get("availableBalance"))
+        """Reconcile the account state over REST."""
+        self.account.load_account(self.client.futures_account())
+        self.quote_position = self.account.available_balance(self.quote_asset) or 0
+        self.base_position = self.account.position_amount(self.symbol)
+
+    def start_user_stream(self) -> None:
+        """
+        Keep ``self.account`` current from the user data stream, on a
+        background thread. Reads fall back to REST until it is running.
+        """
+        self.twm = ThreadedWebsocketManager(API_KEY, API_SECRET)
+        self.twm.start()
+        self.twm.start_futures_user_socket(callback=self._on_user_event)
+        self.update_position()
+
+    def _on_user_event(self, event: dict) -> None:
+        if event.get("e") == "error":
+            logging.error(f"User data stream: {event}")
+            self.account.mark_stale()
+        else:
+            self.account.apply(event)
+
+    def symbol_rules(self) -> SymbolRules:
+        if self.exchange_info.needs_fetch(self.symbol):
+            self.exchange_info.update(self.client.futures_exchange_info())
+        return self.exchange_info.get(self.symbol)
 
-        for data in f_acc.get("positions"):
-            if data.get("symbol") == self.symbol:
-                self.base_position = float(data.get("positionAmt"))
+    def _sync_account(self) -> None:
+        if self.twm is None or self.account.needs_reconcile():
+            self.update_position()
 
     def cancel_all_orders(self) -> None:
         self.client.futures_cancel_all_open_orders(symbol=self.symbol)
+        # untriggered TP/SL/TS legs are algo orders
+        self.client.futures_cancel_all_algo_open_orders(symbol=self.symbol)
         send_message(msg="Cancel all orders")
 
     def get_entry_price(self) -> float:
-        info = self.client.futures_position_information(symbol=self.symbol)[0]
-        return float(info.get("entryPrice"))
+        self._sync_account()
+        return self.account.entry_price(self.symbol)
 
     def get_abs_position(self) -> float:
-        info = self.client.futures_position_information(symbol=self.symbol)[0]
-        return np.abs(float(info.get("positionAmt")))
+        self._sync_account()
+        return np.abs(self.account.position_amount(self.symbol))
 
     def get_real_position(self) -> float:
-        info = self.client.futures_position_information(symbol=self.symbol)[0]
-        return float(info.get("positionAmt"))
+        self._sync_account()
+        return self.account.position_amount(self.symbol)
 
     def historical_kline(self, symbol: str, interval: str, limit: int) -> pd.DataFrame:
-        return kline_list_to_df(
-            kline_list=self.client.futures_historical_klines(
-                symbol=symbol, interval=interval, start_str=None, limit=limit
-            )
+        """Last ``limit`` closed bars, served from the local kline cache."""
+        interval_ms = interval_to_ms(interval)
+        end_ms = int(time.time() * 1000) // interval_ms * interval_ms
+        return self.kline_cache.get(
+            symbol=symbol,
+            interval=interval,
+            start_ms=end_ms - limit * interval_ms,
+            end_ms=end_ms,
+            fetch=lambda start_ms, end_ms: kline_list_to_df(
+                kline_list=self.client.futures_historical_klines(
+                    symbol=symbol,
+                    interval=interval,
+                    start_str=start_ms,
+                    end_str=end_ms - 1,
+                ),
+                drop_last=False,
+            ),
+            columns=KLINE_COLUMNS,
         )
 
     def calculate_quantity(self, ratio: float = 0.8) -> float:
-        self.update_position()
+        self._sync_account()
+        if self.account.available_balance(self.quote_asset) is None:
+            self.update_position()
+        self.quote_position = self.account.available_balance(self.quote_asset)
         lastest_price = float(
             self.client.futures_symbol_ticker(symbol=self.symbol).get("price")
         )
-        quantity = (self.quote_position / lastest_price) * ratio
-        return float(f"{quantity:.1f}")
+        rules = self.symbol_rules()
+        quantity = rules.round_qty(
+            (self.quote_position / lastest_price) * ratio, market=True
+        )
+        error = rules.validate(lastest_price, quantity=quantity, market=True)
+        if error is not None:
+            raise ValueError(f"Order quantity rejected: {error}")
+        return quantity
 
     def enter_long_market(self):
         res = self.client.futures_create_order(
@@ -148,97 +224,63 @@ class BinanceFuturesAPI:
             logging.error(e)
             send_message(msg=f"Error: {e}")
 
-    def place_long_stop_signal(self):
-        entry_price = self.get_entry_price()
-        tp_price = entry_price * (1 + self.tp_pct)
-        tp_price = float(f"{tp_price:.4f}")
-        sl_price = entry_price * (1 - self.sl_pct)
-        sl_price = float(f"{sl_price:.4f}")
-        tl_act_price = entry_price * (1 + self.tl_act_pct)
-        tl_act_price = float(f"{tl_act_price:.4f}")
-        logging.info(f"entry_price: {entry_price}")
-        logging.info(f"TP: {tp_price}, SL: {sl_price}, TL: {tl_act_price}")
-        logging.info("Place long stop signal")
-        res = self.client.futures_create_order(
-            symbol=self.symbol,
-            side=SIDE_SELL,
-            type=FUTURE_ORDER_TYPE_TAKE_PROFIT_MARKET,
-            stopPrice=tp_price,
-            closePosition=True,
-            timeInForce="GTE_GTC",
-        )
-        logging.info(res)
-        res = self.client.futures_create_order(
-            symbol=self.symbol,
-            side=SIDE_SELL,
-            type=FUTURE_ORDER_TYPE_STOP_MARKET,
-            stopPrice=sl_price,
-            closePosition=True,
-            timeInForce="GTE_GTC",
-        )
-        logging.info(res)
-        res = self.client.futures_create_order(
-            symbol=self.symbol,
-            side=SIDE_SELL,
-            type=FUTURE_ORDER_TYPE_TRAILING_STOP_MARKET,
-            activationPrice=tl_act_price,
-            callbackRate=self.tl_exec_pct,
-            quantity=self.get_abs_position(),
-            timeInForce="GTC",
-        )
-        logging.info(res)
-        send_message(
-            msg=f"""
-            Place long stop signal
-            Entry price: {entry_price}
-            TP: {tp_price}, SL: {sl_price}, TL: {tl_act_price}
-            """
+    def place_stop_signal(self, position_side: str) -> Dict[str, dict]:
+        """
+        Place TP, SL and trailing stop for the open position, one
+        ``futures_create_order`` per leg. Returns the per-leg results.
+        """
+        self._sync_account()
+        entry_price = self.account.entry_price(self.symbol)
+        quantity = np.abs(self.account.position_amount(self.symbol))
+        if entry_price == 0 or quantity == 0:
+            # the fill has not reached the stream yet, ask REST
+            info = self.client.futures_position_information(symbol=self.symbol)[0]
+            entry_price = float(info.get("entryPrice"))
+            quantity = np.abs(float(info.get("positionAmt")))
+        rules = self.symbol_rules()
+        prices = bracket_prices(
+            position_side=position_side,
+            entry_price=entry_price,
+            tp_pct=self.tp_pct,
+            sl_pct=self.sl_pct,
+            tl_act_pct=self.tl_act_pct,
+            rules=rules,
         )
-
-    def place_short_stop_signal(self):
-        entry_price = self.get_entry_price()
-        tp_price = entry_price * (1 - self.tp_pct)
-        tp_price = float(f"{tp_price:.4f}")
-        sl_price = entry_price * (1 + self.sl_pct)
-        sl_price = float(f"{sl_price:.4f}")
-        tl_act_price = entry_price * (1 - self.tl_act_pct)
-        tl_act_price = float(f"{tl_act_price:.4f}")
         logging.info(f"entry_price: {entry_price}")
-        logging.info(f"TP: {tp_price}, SL: {sl_price}, TL: {tl_act_price}")
-        logging.info("Place short stop signal")
+        logging.info(f"TP: {prices['TP']}, SL: {prices['SL']}, TL: {prices['TS']}")
+        logging.info(f"Place {position_side} stop signal")
 
-        res = self.client.futures_create_order(
-            symbol=self.symbol,
-            side=SIDE_BUY,
-            type=FUTURE_ORDER_TYPE_TAKE_PROFIT_MARKET,
-            stopPrice=tp_price,
-            closePosition=True,
-            timeInForce="GTE_GTC",
-        )
-        logging.info(res)
-        res = self.client.futures_create_order(
-            symbol=self.symbol,
-            side=SIDE_BUY,
-            type=FUTURE_ORDER_TYPE_STOP_MARKET,
-            stopPrice=sl_price,
-            closePosition=True,
-            timeInForce="GTE_GTC",
-        )
-        logging.info(res)
-        res = self.client.futures_create_order(
-            symbol=self.symbol,
-            side=SIDE_BUY,
-            type=FUTURE_ORDER_TYPE_TRAILING_STOP_MARKET,
-            activationPrice=tl_act_price,
-            callbackRate=self.tl_exec_pct,
-            quantity=self.get_abs_position(),
-            timeInForce="GTC",
-        )
-        logging.info(res)
-        send_message(
-            msg=f"""
-            Place short stop signal
-            Entry price: {entry_price}
-            TP: {tp_price}, SL: {sl_price}, TL: {tl_act_price}
-            """
+        orders, results = validate_legs(
+            bracket_orders(
+                symbol=self.symbol,
+                position_side=position_side,
+                prices=prices,
+                quantity=quantity,
+                callback_rate=self.tl_exec_pct,
+                rules=rules,
+            ),
+            prices=prices,
+            quantity=quantity,
+            rules=rules,
         )
+        responses = []
+        for order in orders.values():
+            try:
+                responses.append(self.client.futures_create_order(**order))
+            except Exception as e:
+                responses.append(e)
+        if responses:
+            logging.info(responses)
+        results.update(leg_results(list(orders), responses))
+
+        for leg, result in results.items():
+            if not result["ok"]:
+                logging.error(f"{leg} leg failed: {result['error']}")
+        send_message(msg=bracket_message(position_side, entry_price, prices, results))
+        return results
+
+    def place_long_stop_signal(self) -> Dict[str, dict]:
+        return self.place_stop_signal("long")
+
+    def place_short_stop_signal(self) -> Dict[str, dict]:
+        return self.place_stop_signal("short")
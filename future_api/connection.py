@@ -0,0 +1,18 @@
+import time
+
+from binance import AsyncClient
+
+
+async def create_client(api_key: str, api_secret: str) -> AsyncClient:
+    """
+    ``AsyncClient.create`` without its ping: only the server time offset
+    for signed requests is fetched, one round trip instead of two.
+    """
+    client = AsyncClient(api_key, api_secret)
+    try:
+        res = await client.futures_time()
+    except Exception:
+        await client.close_connection()
+        raise
+    client.timestamp_offset = res["serverTime"] - int(time.time() * 1000)
+    return client
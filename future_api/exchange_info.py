@@ -0,0 +1,190 @@
+import json
+import math
+import os
+import time
+from decimal import Decimal
+from typing import Dict, Optional
+
+from utils.helpers import (
+    LotSizeFilter,
+    MarketLotSizeFilter,
+    NotionalFilter,
+    PriceFilter,
+    Symbol,
+)
+
+
+def futures_symbol(info: dict) -> Symbol:
+    """One entry of ``futures_exchange_info()["symbols"]`` -> ``Symbol``."""
+    filters = {item.get("filterType"): item for item in info.get("filters")}
+    return Symbol(
+        symbol=info.get("symbol"),
+        base_asset=info.get("baseAsset"),
+        quote_asset=info.get("quoteAsset"),
+        price_filter=PriceFilter(
+            min_price=float(filters.get("PRICE_FILTER").get("minPrice")),
+            max_price=float(filters.get("PRICE_FILTER").get("maxPrice")),
+            tick_size=float(filters.get("PRICE_FILTER").get("tickSize")),
+        ),
+        lot_size_filter=LotSizeFilter(
+            min_qty=float(filters.get("LOT_SIZE").get("minQty")),
+            max_qty=float(filters.get("LOT_SIZE").get("maxQty")),
+            step_size=float(filters.get("LOT_SIZE").get("stepSize")),
+        ),
+        market_lot_size_filter=MarketLotSizeFilter(
+            min_qty=float(filters.get("MARKET_LOT_SIZE").get("minQty")),
+            max_qty=float(filters.get("MARKET_LOT_SIZE").get("maxQty")),
+            step_size=float(filters.get("MARKET_LOT_SIZE").get("stepSize")),
+        ),
+        # futures only have a minimum, under the "notional" key
+        notional_filter=NotionalFilter(
+            min_notional=float(filters.get("MIN_NOTIONAL", {}).get("notional", 0)),
+            max_notional=math.inf,
+        ),
+    )
+
+
+def _decimals(step: float) -> int:
+    return max(-Decimal(repr(step)).normalize().as_tuple().exponent, 0)
+
+
+class SymbolRules:
+    """
+    Tick/step/notional rules of one symbol with everything precomputed, so
+    rounding an order is a couple of float operations.
+    """
+
+    __slots__ = (
+        "symbol",
+        "tick_size",
+        "min_price",
+        "max_price",
+        "price_decimals",
+        "step_size",
+        "min_qty",
+        "max_qty",
+        "market_step_size",
+        "market_min_qty",
+        "market_max_qty",
+        "qty_decimals",
+        "min_notional",
+    )
+
+    def __init__(self, symbol: Symbol) -> None:
+        self.symbol = symbol.symbol
+        self.tick_size = symbol.price_filter.tick_size
+        self.min_price = symbol.price_filter.min_price
+        self.max_price = symbol.price_filter.max_price
+        self.price_decimals = _decimals(self.tick_size)
+        self.step_size = symbol.lot_size_filter.step_size
+        self.min_qty = symbol.lot_size_filter.min_qty
+        self.max_qty = symbol.lot_size_filter.max_qty
+        self.market_step_size = symbol.market_lot_size_filter.step_size
+        self.market_min_qty = symbol.market_lot_size_filter.min_qty
+        self.market_max_qty = symbol.market_lot_size_filter.max_qty
+        self.qty_decimals = max(
+            _decimals(self.step_size), _decimals(self.market_step_size)
+        )
+        self.min_notional = symbol.notional_filter.min_notional
+
+    def round_price(self, price: float) -> float:
+        """Nearest multiple of the tick size."""
+        return round(
+            round(price / self.tick_size) * self.tick_size, self.price_decimals
+        )
+
+    def round_qty(self, quantity: float, market: bool = False) -> float:
+        """Largest multiple of the step size not above ``quantity``."""
+        step = self.market_step_size if market else self.step_size
+        # the epsilon keeps e.g. 0.3 / 0.1 = 2.9999999999999996 at 3 steps
+        return round(math.floor(quantity / step + 1e-9) * step, self.qty_decimals)
+
+    def format_price(self, price: float) -> str:
+        return f"{self.round_price(price):.{self.price_decimals}f}"
+
+    def format_qty(self, quantity: float, market: bool = False) -> str:
+        return f"{self.round_qty(quantity, market=market):.{self.qty_decimals}f}"
+
+    def validate(
+        self,
+        price: float,
+        quantity: Optional[float] = None,
+        market: bool = False,
+    ) -> Optional[str]:
+        """
+        Why the exchange would reject an order at ``price`` for ``quantity``
+        (``None`` for close-position orders), or ``None`` if it is valid.
+        Inputs are expected to be rounded already.
+        """
+        if not self.min_price <= price <= self.max_price:
+            return f"price {price} outside [{self.min_price}, {self.max_price}]"
+        if quantity is None:
+            return None
+        min_qty, max_qty = (
+            (self.market_min_qty, self.market_max_qty)
+            if market
+            else (self.min_qty, self.max_qty)
+        )
+        if not min_qty <= quantity <= max_qty:
+            return f"quantity {quantity} outside [{min_qty}, {max_qty}]"
+        if price * quantity < self.min_notional:
+            return f"notional {price * quantity} below {self.min_notional}"
+        return None
+
+
+class ExchangeInfoCache:
+    """
+    Trading rules of every futures symbol, from ``futures_exchange_info``.
+
+    The raw response is kept in a JSON file so a restart within ``ttl``
+    seconds needs no request; ``needs_fetch`` tells the client when to fetch.
+    """
+
+    def __init__(self, path: Optional[str] = None, ttl: float = 86400):
+        self.path = path or os.path.join(
+            os.getenv("BOT_DATA_DIR", "data"), "exchange_info.json"
+        )
+        self.ttl = ttl
+        self.rules: Dict[str, SymbolRules] = {}
+        self.updated_at = 0.0
+
+    def load(self) -> bool:
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            cached = json.load(f)
+        self._build(cached["exchange_info"])
+        self.updated_at = cached["updated_at"]
+        return True
+
+    def expired(self) -> bool:
+        if not self.rules:
+            self.load()
+        return time.time() - self.updated_at > self.ttl
+
+    def needs_fetch(self, symbol: str) -> bool:
+        """Expired, or ``symbol`` is missing (e.g. listed after the fetch)."""
+        return self.expired() or symbol not in self.rules
+
+    def update(self, exchange_info: dict) -> None:
+        self._build(exchange_info)
+        self.updated_at = time.time()
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(
+                {"updated_at": self.updated_at, "exchange_info": exchange_info}, f
+            )
+        os.replace(tmp_path, self.path)
+
+    def _build(self, exchange_info: dict) -> None:
+        self.rules = {
+            info.get("symbol"): SymbolRules(futures_symbol(info))
+            for info in exchange_info.get("symbols")
+        }
+
+    def get(self, symbol: str) -> SymbolRules:
+        rules = self.rules.get(symbol)
+        if rules is None:
+            raise ValueError(f"Symbol {symbol} not found")
+        return rules
@@ -0,0 +1,363 @@
+import asyncio
+import logging
+import time
+
+import pandas as pd
+from binance import AsyncClient
+
+from future_api.account_state import AccountState
+from future_api.async_client import AsyncBinanceFuturesAPI
+from future_api.exchange_info import ExchangeInfoCache
+from future_api.oms import OrderManager
+from strategys.adx_strategy import Strategy
+from strategys.kline_cache import interval_to_ms
+from strategys.kline_decoder import decode_kline
+from strategys.ring_buffer import OHLCVRingBuffer
+from strategys.snapshot import StateSnapshot
+from utils.latency import latency
+from utils.startup import startup
+from utils.telegram_notifier import notifier
+
+SIGNAL_FIELDS = (
+    "buy_condition",
+    "sell_condition",
+    "close_long_condition",
+    "close_short_condition",
+    "price_above_ema",
+    "price_below_ema",
+    "price_above_short_ema",
+    "price_below_short_ema",
+    "run_trend_up",
+    "run_trend_down",
+)
+
+
+class BinanceHandler:
+    def __init__(
+        self, base_asset: str, quote_asset: str, interval: str = "1h", limit: int = 250
+    ):
+        self.base_asset = base_asset
+        self.quote_asset = quote_asset
+        self.symbol = f"{base_asset}{quote_asset}"
+        self.interval = interval
+        self.limit = limit
+
+        self.binance_api: AsyncBinanceFuturesAPI = None
+        self.bars: OHLCVRingBuffer = None
+        # set when a strategy is passed to ``create``
+        self.snapshot: StateSnapshot = None
+
+        self.delay = 2
+        self.user_stream_task: asyncio.Task = None
+        # one order flow per symbol at a time; other symbols/streams keep running
+        self.lock = asyncio.Lock()
+        self.tasks = set()
+
+    @classmethod
+    async def create(
+        cls,
+        base_asset: str,
+        quote_asset: str,
+        interval: str = "1h",
+        limit: int = 250,
+        client: AsyncClient = None,
+        account: AccountState = None,
+        exchange_info: ExchangeInfoCache = None,
+        orders: OrderManager = None,
+        user_stream: bool = True,
+        strategy: Strategy = None,
+    ) -> "BinanceHandler":
+        """
+        Handlers of several symbols can share one client, account state,
+        exchange info and order manager; only one of them should run the
+        user stream.
+
+        With ``strategy`` the bars and the strategy state are restored from
+        the last snapshot, if any, and saved again after every closed bar.
+        """
+        self = cls(
+            base_asset=base_asset,
+            quote_asset=quote_asset,
+            interval=interval,
+            limit=limit,
+        )
+        self.binance_api = await AsyncBinanceFuturesAPI.create(
+            base_asset=base_asset,
+            quote_asset=quote_asset,
+            client=client,
+            account=account,
+            exchange_info=exchange_info,
+            orders=orders,
+            warm_up=False,
+        )
+        if user_stream:
+            self.user_stream_task = asyncio.create_task(
+                self.binance_api.run_user_stream()
+            )
+        if strategy is not None:
+            self.snapshot = StateSnapshot(self.symbol, self.interval)
+        # account, symbol rules and history do not depend on each other
+        await asyncio.gather(
+            startup.timed(f"{self.symbol}.account", self.binance_api.warm_up()),
+            startup.timed(f"{self.symbol}.history", self.load_bars(strategy)),
+        )
+        return self
+
+    async def load_bars(self, strategy: Strategy = None) -> None:
+        """
+        Restore the bars and ``strategy`` from the snapshot and append the
+        bars closed since; without a usable snapshot load the last
+        ``limit`` bars.
+        """
+        restored = None
+        if self.snapshot is not None:
+            restored = await asyncio.to_thread(self.snapshot.load)
+        if restored is not None:
+            bars, state = restored
+            gap = await self.binance_api.historical_kline(
+                symbol=self.symbol,
+                interval=self.interval,
+                limit=self.limit,
+                since=bars.last_timestamp,
+            )
+            if bars.capacity == self.limit and self._continues(
+                gap, bars.last_timestamp
+            ):
+                self.bars = bars
+                logging.info(
+                    f"{self.symbol} restored {len(bars)} bars from snapshot, "
+                    f"backfilling {len(gap)}"
+                )
+                strategy.set_state(state)
+                self.append_bars(gap, strategy)
+                return
+            strategy.set_state(state, indicators=False)
+            logging.info(f"{self.symbol} snapshot too old, reloading history")
+
+        history = await self.binance_api.historical_kline(
+            symbol=self.symbol, interval=self.interval, limit=self.limit
+        )
+        self.bars = OHLCVRingBuffer.from_dataframe(history, capacity=self.limit)
+
+    def _continues(self, bars: pd.DataFrame, last_timestamp: int) -> bool:
+        """``bars`` start right after ``last_timestamp`` (or are empty)."""
+        if len(bars) == 0:
+            return True
+        first_timestamp = bars.index.as_unit("ms").asi8[0]
+        return first_timestamp == last_timestamp + interval_to_ms(self.interval)
+
+    def append_bars(self, bars: pd.DataFrame, strategy: Strategy = None) -> int:
+        """
+        Append the closed ``bars`` newer than the last one in the buffer and
+        feed them to the streaming indicators of ``strategy``, once seeded.
+        Returns how many were new.
+        """
+        if len(bars) == 0:
+            return 0
+        last_timestamp = self.bars.last_timestamp
+        if last_timestamp is not None:
+            bars = bars[bars.index.as_unit("ms").asi8 > last_timestamp]
+        self.bars.append_dataframe(bars)
+        if strategy is not None and strategy.streaming_adx is not None:
+            for close, high, low in zip(bars["close"], bars["high"], bars["low"]):
+                strategy.update_signal(
+                    close_price=close, high_price=high, low_price=low
+                )
+        return len(bars)
+
+    async def backfill(self, strategy: Strategy = None) -> int:
+        """
+        Append the bars that closed while the stream was down. If more than
+        ``limit`` were missed, the streaming indicators reseed from the
+        window on the next bar.
+        """
+        last_timestamp = self.bars.last_timestamp
+        gap = await self.binance_api.historical_kline(
+            symbol=self.symbol,
+            interval=self.interval,
+            limit=self.limit,
+            since=last_timestamp,
+        )
+        if strategy is not None and not self._continues(gap, last_timestamp):
+            strategy.reset_streaming()
+        count = self.append_bars(gap, strategy)
+        logging.info(f"{self.symbol} backfilled {count} bars")
+        return count
+
+    def save_snapshot(self, strategy: Strategy) -> None:
+        if self.snapshot is None:
+            return
+        try:
+            self.snapshot.save(self.bars, strategy.get_state())
+        except OSError as e:
+            logging.error(f"{self.symbol} snapshot failed: {e}")
+
+    @property
+    def data(self) -> pd.DataFrame:
+        return self.bars.to_dataframe()
+
+    def update_dataframe(self, kline: dict):
+        self.bars.append(*decode_kline(kline["k"]))
+
+    def on_closed_kline(self, strategy: Strategy, kline: dict, received: float = None):
+        """
+        Append a closed bar, recompute the signal and schedule orders.
+        ``received`` is the wall time the message came off the socket.
+        """
+        received = time.time() if received is None else received
+        latency.record(self.symbol, "receive", received - kline["E"] / 1000)
+        logging.info(kline)
+
+        started = time.perf_counter()
+        bar = decode_kline(kline["k"])
+        parsed = time.perf_counter()
+        last_timestamp = self.bars.last_timestamp
+        if last_timestamp is not None and bar[0] <= last_timestamp:
+            # already backfilled over REST after a reconnect
+            logging.info(f"{self.symbol} skipping duplicate bar {bar[0]}")
+            return
+        self.bars.append(*bar)
+        updated = time.perf_counter()
+        strategy.compute_signal(
+            close_price=self.bars["close"],
+            high_price=self.bars["high"],
+            low_price=self.bars["low"],
+        )
+        computed = time.perf_counter()
+        strategy.condition(close_price=self.bars.last("close"))
+        conditioned = time.perf_counter()
+        latency.record(self.symbol, "parse", parsed - started)
+        latency.record(self.symbol, "update", updated - parsed)
+        latency.record(self.symbol, "compute_signal", computed - updated)
+        latency.record(self.symbol, "condition", conditioned - computed)
+
+        long_condition = {
+            "Long": strategy.buy_condition,
+            "Close_Long": strategy.close_long_condition,
+            "Price_above_EMA": strategy.price_above_ema,
+            "Price_above_short_EMA": strategy.price_above_short_ema,
+            "Run_trend_up": strategy.run_trend_up,
+        }
+        short_condition = {
+            "Short": strategy.sell_condition,
+            "Close_Short": strategy.close_short_condition,
+            "Price_below_EMA": strategy.price_below_ema,
+            "Price_below_short_EMA": strategy.price_below_short_ema,
+            "Run_trend_down": strategy.run_trend_down,
+        }
+        logging.info(f"{self.symbol} {long_condition}")
+        logging.info(f"{self.symbol} {short_condition}")
+
+        signal = {name: getattr(strategy, name) for name in SIGNAL_FIELDS}
+        signal["received"] = received
+        self.schedule_signal(signal)
+        # after scheduling, so the order flow does not wait for the disk
+        scheduled = time.perf_counter()
+        self.save_snapshot(strategy)
+        latency.record(self.symbol, "snapshot", time.perf_counter() - scheduled)
+
+    async def check_long_condition(
+        self, price_above_ema: bool, price_above_short_ema: bool, run_trend_up: bool
+    ):
+        position = await self.binance_api.get_real_position()
+        if position < 0 and price_above_ema:
+            await self.binance_api.exit_short_market()
+            await asyncio.sleep(self.delay)
+            if run_trend_up and price_above_ema and price_above_short_ema:
+                await self.binance_api.enter_long_market()
+                await asyncio.sleep(self.delay)
+                await self.binance_api.place_long_stop_signal()
+                logging.info("Exit short and Enter long")
+            else:
+                logging.info("Exit short")
+        elif (
+            position == 0 and run_trend_up and price_above_ema and price_above_short_ema
+        ):
+            await self.binance_api.cancel_all_orders()
+            await self.binance_api.enter_long_market()
+            await asyncio.sleep(self.delay)
+            await self.binance_api.place_long_stop_signal()
+            logging.info("Enter long")
+        else:
+            logging.info("No Long condition")
+
+    async def check_short_condition(
+        self, price_below_ema: bool, price_below_short_ema: bool, run_trend_down: bool
+    ):
+        position = await self.binance_api.get_real_position()
+        if position > 0 and price_below_ema:
+            await self.binance_api.exit_long_market()
+            await asyncio.sleep(self.delay)
+            if run_trend_down and price_below_ema and price_below_short_ema:
+                await self.binance_api.enter_short_market()
+                await asyncio.sleep(self.delay)
+                await self.binance_api.place_short_stop_signal()
+                logging.info("Exit long and Enter short")
+            else:
+                logging.info("Exit long")
+        elif (
+            position == 0
+            and run_trend_down
+            and price_below_ema
+            and price_below_short_ema
+        ):
+            await self.binance_api.cancel_all_orders()
+            await self.binance_api.enter_short_market()
+            await asyncio.sleep(self.delay)
+            await self.binance_api.place_short_stop_signal()
+            logging.info("Enter short")
+        else:
+            logging.info("No Short condition")
+
+    async def check_close_long_condition(self, price_below_ema: bool):
+        position = await self.binance_api.get_real_position()
+        if position > 0 and price_below_ema:
+            await self.binance_api.exit_long_market()
+            logging.info("Exit long")
+        else:
+            logging.info("No Close long condition")
+
+    async def check_close_short_condition(self, price_above_ema: bool):
+        position = await self.binance_api.get_real_position()
+        if position < 0 and price_above_ema:
+            await self.binance_api.exit_short_market()
+            logging.info("Exit short")
+        else:
+            logging.info("No Close short condition")
+
+    async def execute_signal(self, signal: dict):
+        async with self.lock:
+            self.binance_api.bar_received = signal.get("received")
+            if signal["buy_condition"]:
+                await self.check_long_condition(
+                    price_above_ema=signal["price_above_ema"],
+                    price_above_short_ema=signal["price_above_short_ema"],
+                    run_trend_up=signal["run_trend_up"],
+                )
+            elif signal["close_long_condition"]:
+                await self.check_close_long_condition(
+                    price_below_ema=signal["price_below_ema"]
+                )
+
+            if signal["sell_condition"]:
+                await self.check_short_condition(
+                    price_below_ema=signal["price_below_ema"],
+                    price_below_short_ema=signal["price_below_short_ema"],
+                    run_trend_down=signal["run_trend_down"],
+                )
+            elif signal["close_short_condition"]:
+                await self.check_close_short_condition(
+                    price_above_ema=signal["price_above_ema"]
+                )
+
+    def schedule_signal(self, signal: dict):
+        """Run the order flow as a task so the socket keeps being read."""
+        task = asyncio.create_task(self.execute_signal(signal))
+        self.tasks.add(task)
+        task.add_done_callback(self._signal_done)
+
+    def _signal_done(self, task: asyncio.Task):
+        self.tasks.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logging.error("Order flow failed: %s", task.exception())
+            notifier.notify(f"Error: {task.exception()}")
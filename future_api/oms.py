@@ -0,0 +1,177 @@
+import logging
+from collections import defaultdict
+from typing import Callable, Dict, List, Optional
+
+from future_api.user_events import Bracket, OrderTable, OrderUpdate
+
+# Lifecycle events: one per order status, plus "entry" once a bracket has
+# all its legs on the book and "exit" once one of its legs has filled
+ORDER_EVENTS = ("new", "partially_filled", "filled", "canceled", "expired", "rejected")
+LIFECYCLE_EVENTS = ORDER_EVENTS + ("entry", "exit")
+
+Callback = Callable[[OrderUpdate, Optional[Bracket]], None]
+
+
+def rest_order_event(order: dict) -> dict:
+    """A REST order (``futures_get_open_orders``) as an ORDER_TRADE_UPDATE."""
+    return {
+        "e": "ORDER_TRADE_UPDATE",
+        "E": order.get("updateTime", 0),
+        "o": {
+            "s": order.get("symbol"),
+            "c": order.get("clientOrderId"),
+            "S": order.get("side"),
+            "o": order.get("type"),
+            "ot": order.get("origType", order.get("type")),
+            "f": order.get("timeInForce"),
+            "q": order.get("origQty", "0"),
+            "ap": order.get("avgPrice", "0"),
+            "sp": order.get("stopPrice", "0"),
+            "AP": order.get("activatePrice"),
+            "cr": order.get("priceRate"),
+            "x": "NEW",
+            "X": order.get("status"),
+            "i": order.get("orderId"),
+            "l": "0",
+            "z": order.get("executedQty", "0"),
+            "L": "0",
+            "T": order.get("updateTime", 0),
+            "cp": order.get("closePosition", False),
+            "ps": order.get("positionSide", "BOTH"),
+            "rp": "0",
+        },
+    }
+
+
+class OrderManager(OrderTable):
+    """
+    Every live order of the account, kept from the user data stream.
+
+    On top of ``OrderTable`` (orders by id and symbol, one bracket per
+    symbol) the live orders are indexed by client order id, original type
+    and status, protective legs are linked to their entry, and callbacks
+    registered with ``on`` run for every lifecycle event. A bracket is
+    closed as soon as it exits.
+
+    ``synced`` is False until ``load_open_orders`` has seen a REST snapshot
+    and again after ``mark_stale``; readers fall back to REST meanwhile.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.by_client_id: Dict[str, OrderUpdate] = {}
+        self.by_type: Dict[str, Dict[int, OrderUpdate]] = defaultdict(dict)
+        self.by_status: Dict[str, Dict[int, OrderUpdate]] = defaultdict(dict)
+        # leg order id -> entry order id
+        self.parents: Dict[int, int] = {}
+        self.callbacks: Dict[str, List[Callback]] = {
+            event: [] for event in LIFECYCLE_EVENTS
+        }
+        self.synced = False
+
+    def on(self, event: str, callback: Callback) -> None:
+        """Call ``callback(update, bracket)`` on every ``event``."""
+        if event not in self.callbacks:
+            raise ValueError(f"Unknown order event: {event}")
+        self.callbacks[event].append(callback)
+
+    def _emit(self, event: str, update: OrderUpdate, bracket: Optional[Bracket]):
+        for callback in self.callbacks.get(event, ()):
+            try:
+                callback(update, bracket)
+            except Exception as e:
+                logging.error(f"Order {event} callback failed: {e}")
+
+    def _unindex(self, order: OrderUpdate) -> None:
+        self.by_client_id.pop(order.client_order_id, None)
+        self.by_type[order.original_type].pop(order.order_id, None)
+        self.by_status[order.status].pop(order.order_id, None)
+
+    def _index(self, order: OrderUpdate) -> None:
+        self.by_client_id[order.client_order_id] = order
+        self.by_type[order.original_type][order.order_id] = order
+        self.by_status[order.status][order.order_id] = order
+
+    def apply(self, update: OrderUpdate) -> Optional[Bracket]:
+        previous = self.orders.get(update.order_id)
+        if previous is not None:
+            self._unindex(previous)
+        bracket = super().apply(update)
+        if update.is_open:
+            self._index(update)
+            if bracket is not None and update is not bracket.entry:
+                self.parents[update.order_id] = bracket.entry.order_id
+        else:
+            self.parents.pop(update.order_id, None)
+
+        self._emit(update.status.lower(), update, bracket)
+        if bracket is None:
+            return None
+        if not bracket.placed and bracket.is_placed():
+            bracket.placed = True
+            self._emit("entry", update, bracket)
+        elif update is not bracket.entry and bracket.exit() is not None:
+            self.close_bracket(bracket.symbol)
+            self._emit("exit", update, bracket)
+        return bracket
+
+    def load_open_orders(self, orders: List[dict]) -> None:
+        """
+        Replace the book with a REST snapshot of open orders. Brackets are
+        kept and legs in the snapshot attach to them again.
+        """
+        for order in list(self.orders.values()):
+            self._unindex(order)
+        self.orders.clear()
+        self.by_symbol.clear()
+        self.parents.clear()
+        for order in orders:
+            self.apply(OrderUpdate(rest_order_event(order)))
+        self.synced = True
+
+    def mark_stale(self) -> None:
+        """Events may have been missed (e.g. the stream dropped)."""
+        self.synced = False
+
+    def get(self, order_id: int) -> Optional[OrderUpdate]:
+        return self.orders.get(order_id)
+
+    def get_by_client_id(self, client_order_id: str) -> Optional[OrderUpdate]:
+        return self.by_client_id.get(client_order_id)
+
+    def orders_of_type(
+        self, original_type: str, symbol: str = None
+    ) -> List[OrderUpdate]:
+        return [
+            order
+            for order in self.by_type[original_type].values()
+            if symbol is None or order.symbol == symbol
+        ]
+
+    def orders_with_status(self, status: str, symbol: str = None) -> List[OrderUpdate]:
+        return [
+            order
+            for order in self.by_status[status].values()
+            if symbol is None or order.symbol == symbol
+        ]
+
+    def parent(self, order_id: int) -> Optional[OrderUpdate]:
+        """The entry order a live leg protects."""
+        entry_id = self.parents.get(order_id)
+        if entry_id is None:
+            return None
+        bracket = self.brackets.get(self.orders[order_id].symbol)
+        if bracket is None or bracket.entry.order_id != entry_id:
+            return None
+        return bracket.entry
+
+    def children(self, order_id: int) -> List[OrderUpdate]:
+        """Live legs of an entry order."""
+        return [
+            self.orders[leg_id]
+            for leg_id, entry_id in self.parents.items()
+            if entry_id == order_id
+        ]
+
+    def has_open_orders(self, symbol: str) -> bool:
+        return bool(self.by_symbol.get(symbol))
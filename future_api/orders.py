@@ -16,19 +16,17 @@ from binance.enums import (
     TIME_IN_FORCE_GTC,
     TIME_IN_FORCE_IOC,
 )
-from dotenv import find_dotenv, load_dotenv
 
-load_dotenv(
-    find_dotenv(filename=".env.local", raise_error_if_not_found=True),
-    override=True,
-)
+from utils.env import load_env
+
+load_env()
 API_KEY = os.getenv("API_KEY")
 API_SECRET = os.getenv("API_SECRET")
 
 # print(API_KEY)
 # print(API_SECRET)
 
-client = Client(API_KEY, API_SECRET)
+client = Client(API_KEY, API_SECRET, ping=False)
 
 
 def place_order():
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+from binance.ws.reconnecting_websocket import ReconnectingWebsocket
+
+
+class Backoff:
+    """
+    Exponential backoff with jitter: the n-th delay is drawn uniformly from
+    ``[base, min(cap, base * factor ** n)]``, so clients that dropped
+    together do not reconnect together.
+    """
+
+    def __init__(self, base: float = 1.0, cap: float = 60.0, factor: float = 2.0):
+        self.base = base
+        self.cap = cap
+        self.factor = factor
+        self.attempts = 0
+
+    def next_delay(self) -> float:
+        ceiling = min(self.cap, self.base * self.factor**self.attempts)
+        self.attempts += 1
+        return random.uniform(self.base, max(self.base, ceiling))
+
+    def reset(self) -> None:
+        self.attempts = 0
+
+
+class StreamSupervisor:
+    """
+    Keeps one python-binance websocket stream alive.
+
+    ``open_socket`` builds a new socket (e.g. ``lambda:
+    bm.kline_futures_socket(...)``). The socket's own reconnect loop is
+    turned off: on an error event, a closed read loop or no message for
+    ``stale_after`` seconds the socket is closed and a new one is opened
+    after a jittered backoff. The new socket is open (and queueing
+    messages) before ``on_reconnect`` runs, so a backfill there leaves no
+    hole; duplicates are for the consumer to drop.
+
+    Use as an async context manager and read with ``recv``.
+    """
+
+    def __init__(
+        self,
+        open_socket: Callable[[], ReconnectingWebsocket],
+        name: str,
+        on_reconnect: Callable[[], Awaitable[Any]] = None,
+        stale_after: float = 30.0,
+        backoff: Optional[Backoff] = None,
+    ) -> None:
+        self.open_socket = open_socket
+        self.name = name
+        self.on_reconnect = on_reconnect
+        self.stale_after = stale_after
+        self.backoff = backoff or Backoff()
+        self.socket: Optional[ReconnectingWebsocket] = None
+        self.reconnects = 0
+
+    async def connect(self) -> None:
+        socket = self.open_socket()
+        # reconnects go through ``reconnect`` so that gaps get backfilled
+        socket.MAX_RECONNECTS = 0
+        await socket.__aenter__()
+        self.socket = socket
+
+    async def close(self) -> None:
+        socket, self.socket = self.socket, None
+        if socket is None:
+            return
+        try:
+            await socket.__aexit__(None, None, None)
+        except Exception as e:
+            logging.warning(f"{self.name} socket close failed: {e}")
+
+    async def __aenter__(self) -> "StreamSupervisor":
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        await self.close()
+
+    async def reconnect(self, reason: str) -> None:
+        """Reopen the stream until it is up and ``on_reconnect`` succeeded."""
+        await self.close()
+        down_since = time.monotonic()
+        while True:
+            delay = self.backoff.next_delay()
+            logging.warning(
+                f"{self.name} stream down ({reason}), reconnecting in {delay:.1f}s"
+            )
+            await asyncio.sleep(delay)
+            try:
+                await self.connect()
+                if self.on_reconnect is not None:
+                    await self.on_reconnect()
+                break
+            except Exception as e:
+                reason = f"{e.__class__.__name__}: {e}"
+                await self.close()
+        self.reconnects += 1
+        logging.info(
+            f"{self.name} stream reconnected after "
+            f"{time.monotonic() - down_since:.1f}s"
+        )
+
+    async def recv(self) -> dict:
+        """The next stream message, reconnecting as often as needed."""
+        while True:
+            if self.socket is None:
+                await self.reconnect("not connected")
+            try:
+                message = await asyncio.wait_for(
+                    self.socket.recv(), timeout=self.stale_after
+                )
+            except asyncio.TimeoutError:
+                await self.reconnect(f"no message in {self.stale_after:.0f}s")
+                continue
+            except Exception as e:
+                # e.g. ReadLoopClosed once the socket gave up
+                await self.reconnect(f"{e.__class__.__name__}: {e}")
+                continue
+            if message.get("e") == "error":
+                await self.reconnect(f"{message.get('type')}: {message.get('m')}")
+                continue
+            # only a delivered message proves the connection healthy
+            self.backoff.reset()
+            return message
@@ -0,0 +1,215 @@
+from typing import Dict, List, Optional, Tuple, Union
+
+# Order statuses that keep an order on the book
+OPEN_ORDER_STATUSES = ("NEW", "PARTIALLY_FILLED")
+
+# Original order type of a bracket leg -> Bracket attribute
+LEG_TYPES = {
+    "TAKE_PROFIT_MARKET": "tp",
+    "STOP_MARKET": "sl",
+    "TRAILING_STOP_MARKET": "ts",
+}
+
+
+class OrderUpdate:
+    """The ``o`` payload of an ORDER_TRADE_UPDATE event, with numbers parsed."""
+
+    __slots__ = (
+        "event_time",
+        "symbol",
+        "client_order_id",
+        "side",
+        "order_type",
+        "original_type",
+        "time_in_force",
+        "quantity",
+        "average_price",
+        "stop_price",
+        "activation_price",
+        "callback_rate",
+        "execution_type",
+        "status",
+        "order_id",
+        "last_quantity",
+        "filled_quantity",
+        "last_price",
+        "time",
+        "close_position",
+        "position_side",
+        "realized_pnl",
+    )
+
+    def __init__(self, event: dict) -> None:
+        o = event["o"]
+        self.event_time = event["E"]
+        self.symbol = o["s"]
+        self.client_order_id = o["c"]
+        self.side = o["S"]
+        self.order_type = o["o"]
+        self.original_type = o["ot"]
+        self.time_in_force = o["f"]
+        self.quantity = float(o["q"])
+        self.average_price = float(o["ap"])
+        self.stop_price = float(o["sp"])
+        activation_price = o.get("AP")
+        self.activation_price = (
+            None if activation_price is None else float(activation_price)
+        )
+        callback_rate = o.get("cr")
+        self.callback_rate = None if callback_rate is None else float(callback_rate)
+        self.execution_type = o["x"]
+        self.status = o["X"]
+        self.order_id = o["i"]
+        self.last_quantity = float(o["l"])
+        self.filled_quantity = float(o["z"])
+        self.last_price = float(o["L"])
+        self.time = o["T"]
+        # "cp" is a bool, or "True"/"False" in some recordings
+        self.close_position = o["cp"] in (True, "True", "true")
+        self.position_side = o["ps"]
+        self.realized_pnl = float(o["rp"])
+
+    @property
+    def is_open(self) -> bool:
+        return self.status in OPEN_ORDER_STATUSES
+
+
+class BalanceUpdate:
+    __slots__ = ("asset", "wallet", "cross_wallet")
+
+    def __init__(self, data: dict) -> None:
+        self.asset = data["a"]
+        self.wallet = float(data["wb"])
+        self.cross_wallet = float(data["cw"])
+
+
+class PositionUpdate:
+    __slots__ = ("symbol", "amount", "entry_price", "unrealized_pnl", "position_side")
+
+    def __init__(self, data: dict) -> None:
+        self.symbol = data["s"]
+        self.amount = float(data["pa"])
+        self.entry_price = float(data["ep"])
+        self.unrealized_pnl = float(data["up"])
+        self.position_side = data["ps"]
+
+
+class AccountUpdate:
+    """An ACCOUNT_UPDATE event with its balances and positions."""
+
+    __slots__ = ("event_time", "reason", "balances", "positions")
+
+    def __init__(self, event: dict) -> None:
+        update = event["a"]
+        self.event_time = event["E"]
+        self.reason = update.get("m")
+        self.balances = [BalanceUpdate(data) for data in update.get("B", ())]
+        self.positions = [PositionUpdate(data) for data in update.get("P", ())]
+
+
+UserEvent = Union[OrderUpdate, AccountUpdate]
+
+
+def decode_user_event(event: dict) -> Optional[UserEvent]:
+    """User data stream event -> ``OrderUpdate``/``AccountUpdate``, or None."""
+    event_type = event.get("e")
+    if event_type == "ORDER_TRADE_UPDATE":
+        return OrderUpdate(event)
+    if event_type == "ACCOUNT_UPDATE":
+        return AccountUpdate(event)
+    return None
+
+
+class Bracket:
+    """
+    The entry order of a position and its TP, SL and trailing-stop legs.
+
+    A triggered leg keeps its order id, so its MARKET fill replaces the leg
+    (the mock exchange fills it under the leg's own type).
+    """
+
+    __slots__ = ("symbol", "entry", "tp", "sl", "ts", "placed")
+
+    def __init__(self, symbol: str, entry: OrderUpdate) -> None:
+        self.symbol = symbol
+        self.entry = entry
+        self.tp: Optional[OrderUpdate] = None
+        self.sl: Optional[OrderUpdate] = None
+        self.ts: Optional[OrderUpdate] = None
+        # all legs have been on the book
+        self.placed = False
+
+    def legs(self) -> Tuple[Optional[OrderUpdate], ...]:
+        return self.tp, self.sl, self.ts
+
+    def open_legs(self) -> List[OrderUpdate]:
+        return [leg for leg in self.legs() if leg is not None and leg.is_open]
+
+    def is_placed(self) -> bool:
+        """Entry filled and all three legs on the book."""
+        return self.entry.status == "FILLED" and all(
+            leg is not None and leg.status == "NEW" for leg in self.legs()
+        )
+
+    def exit(self) -> Optional[Tuple[str, OrderUpdate]]:
+        """``("TP"|"SL"|"TS", fill)`` once a triggered leg has filled."""
+        for name, leg in zip(("TP", "SL", "TS"), self.legs()):
+            if leg is not None and leg.status == "FILLED":
+                return name, leg
+        return None
+
+
+class OrderTable:
+    """
+    Open orders by id and by symbol, plus the current bracket of every
+    symbol, kept from ORDER_TRADE_UPDATE events.
+
+    A MARKET order with a new id starts a new bracket for its symbol; legs
+    join the bracket when they are placed, and later events of the same
+    order ids update them. Events of legs that belong to no current bracket
+    (e.g. the other legs expiring after an exit) only touch the open orders.
+    """
+
+    def __init__(self) -> None:
+        self.orders: Dict[int, OrderUpdate] = {}
+        self.by_symbol: Dict[str, Dict[int, OrderUpdate]] = {}
+        self.brackets: Dict[str, Bracket] = {}
+
+    def apply(self, update: OrderUpdate) -> Optional[Bracket]:
+        """Apply one order update; returns the bracket it belongs to."""
+        symbol_orders = self.by_symbol.get(update.symbol)
+        if symbol_orders is None:
+            symbol_orders = self.by_symbol[update.symbol] = {}
+        if update.is_open:
+            self.orders[update.order_id] = update
+            symbol_orders[update.order_id] = update
+        else:
+            self.orders.pop(update.order_id, None)
+            symbol_orders.pop(update.order_id, None)
+
+        bracket = self.brackets.get(update.symbol)
+        if update.original_type == "MARKET":
+            if bracket is None or bracket.entry.order_id != update.order_id:
+                bracket = self.brackets[update.symbol] = Bracket(update.symbol, update)
+            else:
+                bracket.entry = update
+            return bracket
+
+        name = LEG_TYPES.get(update.original_type)
+        if bracket is None or name is None:
+            return None
+        leg = getattr(bracket, name)
+        if (
+            leg is None
+            and update.status == "NEW"
+            or (leg is not None and leg.order_id == update.order_id)
+        ):
+            setattr(bracket, name, update)
+            return bracket
+        return None
+
+    def close_bracket(self, symbol: str) -> None:
+        self.brackets.pop(symbol, None)
+
+    def open_orders(self, symbol: str) -> List[OrderUpdate]:
+        return list(self.by_symbol.get(symbol, {}).values())
@@ -0,0 +1,154 @@
+"""
+Run the multi-symbol bot against the local mock exchange and report latency.
+
+    python -m mock_exchange.load_test --symbols OP,ARB,SOL --bar-seconds 2 \
+        --ticks-per-second 500 --duration 60
+
+The mock runs in its own process (or use ``--url`` for one already
+running), the client and socket URLs are pointed at it, and
+``run_multi.main`` trades for ``--duration`` seconds. Kline and exchange
+info caches go to a temporary ``BOT_DATA_DIR``. Needs a ``.env.local``
+like the bot itself; the keys are not checked.
+"""
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+from typing import Dict, List
+
+import aiohttp
+from aiohttp import web
+
+from mock_exchange.server import add_arguments, build_exchange
+
+
+def serve(args: argparse.Namespace) -> None:
+    web.run_app(build_exchange(args).app(), host=args.host, port=args.port, print=None)
+
+
+async def wait_ready(url: str, timeout: float = 30) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while True:
+            try:
+                async with session.get(f"{url}/mock/stats") as response:
+                    if response.status == 200:
+                        return
+            except aiohttp.ClientError:
+                if time.monotonic() > deadline:
+                    raise
+            await asyncio.sleep(0.2)
+
+
+async def fetch_stats(url: str) -> dict:
+    async with aiohttp.ClientSession() as session:
+        async with session.get(f"{url}/mock/stats") as response:
+            return await response.json()
+
+
+def point_at(url: str) -> None:
+    """Send every REST, websocket and Telegram request to ``url``."""
+    from binance import BinanceSocketManager
+    from binance.base_client import BaseClient
+
+    from utils.telegram_notifier import notifier
+
+    BaseClient.API_URL = f"{url}/api"
+    BaseClient.FUTURES_URL = f"{url}/fapi"
+    BinanceSocketManager.FSTREAM_URL = f"{url.replace('http', 'ws', 1)}/"
+    notifier.url = f"{url}/botmock/sendMessage"
+
+
+def summarize(snapshot: Dict[str, dict]) -> Dict[str, dict]:
+    """Worst p50/p99/max of each stage across symbols."""
+    stages: Dict[str, dict] = {}
+    for stats in snapshot.values():
+        for stage, values in stats.items():
+            merged = stages.setdefault(
+                stage, {"count": 0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+            )
+            merged["count"] += values["count"]
+            for key in ("p50", "p99", "max"):
+                merged[key] = max(merged[key], values[key])
+    return stages
+
+
+async def run(args: argparse.Namespace, url: str) -> dict:
+    import run_multi
+    from utils.latency import latency
+
+    await wait_ready(url)
+    before = await fetch_stats(url)
+    started = time.monotonic()
+    try:
+        await asyncio.wait_for(
+            run_multi.main(
+                base_assets=args.symbols.split(","),
+                quote_asset="USDT",
+                interval=args.interval,
+                limit=args.limit,
+            ),
+            args.duration,
+        )
+    except asyncio.TimeoutError:
+        pass
+    elapsed = time.monotonic() - started
+    after = await fetch_stats(url)
+
+    events = after["stats"].get("events", 0) - before["stats"].get("events", 0)
+    return {
+        "duration": elapsed,
+        "events": events,
+        "events_per_second": events / elapsed,
+        "server": after,
+        "latency_ms": summarize(latency.snapshot()),
+    }
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--url", default=None, help="use a running mock exchange")
+    parser.add_argument("--duration", type=float, default=60)
+    parser.add_argument("--limit", type=int, default=250)
+    parser.add_argument("--output", default="logs/load_test.json")
+    args = parser.parse_args(argv)
+
+    os.environ["BOT_DATA_DIR"] = tempfile.mkdtemp(prefix="mock_exchange_")
+    server = None
+    url = args.url
+    if url is None:
+        url = f"http://{args.host}:{args.port}"
+        server = multiprocessing.Process(target=serve, args=(args,), daemon=True)
+        server.start()
+    point_at(url)
+    try:
+        result = asyncio.run(run(args, url))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.join()
+
+    print(f"{result['events']} events in {result['duration']:.1f}s")
+    print(f"{result['events_per_second']:.0f} events/s")
+    print(f"\n{'stage':<20} {'count':>8} {'p50 ms':>10} {'p99 ms':>10} {'max ms':>10}")
+    for stage, stats in result["latency_ms"].items():
+        print(
+            f"{stage:<20} {stats['count']:>8} {stats['p50']:>10.3f}"
+            f" {stats['p99']:>10.3f} {stats['max']:>10.3f}"
+        )
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved to {args.output}")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
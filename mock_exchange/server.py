@@ -0,0 +1,935 @@
+"""
+Local stand-in for the Binance USD-M futures REST API and websocket streams.
+
+    python -m mock_exchange.server --symbols OP,ARB --interval 1m --bar-seconds 5
+
+Serves the endpoints used by ``BinanceFuturesAPI``/``AsyncBinanceFuturesAPI``
+(account, positionRisk, ticker, exchangeInfo, klines, order, batchOrders,
+openOrders, allOpenOrders, algoOrder, openAlgoOrders, algoOpenOrders, listenKey),
+continuous kline and aggTrade streams, the user data stream, and a Telegram
+``sendMessage`` stub. Prices are a random walk; bars close every
+``bar_seconds`` of wall time whatever the interval is.
+``/mock/stats`` reports request, event and order counters.
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import math
+import random
+import time
+from collections import defaultdict
+from typing import Dict, List, Set, Tuple
+
+from aiohttp import WSMsgType, web
+
+from strategys.kline_cache import interval_to_ms
+
+# Request weights of the endpoints we serve (1 when not listed)
+REQUEST_WEIGHTS = {
+    "account": 5,
+    "positionRisk": 5,
+    "batchOrders": 5,
+}
+TAKER_FEE = 0.0004
+# Conditional types only go through the algoOrder endpoint
+ALGO_ORDER_TYPES = (
+    "STOP",
+    "STOP_MARKET",
+    "TAKE_PROFIT",
+    "TAKE_PROFIT_MARKET",
+    "TRAILING_STOP_MARKET",
+)
+
+
+def kline_weight(limit: int) -> int:
+    if limit < 100:
+        return 1
+    if limit < 500:
+        return 2
+    if limit <= 1000:
+        return 5
+    return 10
+
+
+class ExchangeError(Exception):
+    def __init__(self, code: int, msg: str, status: int = 400) -> None:
+        super().__init__(msg)
+        self.code = code
+        self.msg = msg
+        self.status = status
+
+
+class MockSymbol:
+    """Price, forming bar, closed history and orders of one symbol."""
+
+    def __init__(self, symbol: str, price: float, interval_ms: int) -> None:
+        self.symbol = symbol
+        self.price = price
+        self.interval_ms = interval_ms
+        # closed bars in the layout of ``futures_klines``
+        self.history: List[list] = []
+        self.position = 0.0
+        self.entry_price = 0.0
+        # open conditional orders: order id -> order
+        self.orders: Dict[int, dict] = {}
+        self.trade_id = 0
+        self.open_bar(0)
+
+    def open_bar(self, open_time: int) -> None:
+        self.bar = {
+            "t": open_time,
+            "o": self.price,
+            "h": self.price,
+            "l": self.price,
+            "c": self.price,
+            "v": 0.0,
+            "q": 0.0,
+            "n": 0,
+            "V": 0.0,
+            "Q": 0.0,
+        }
+
+    def trade(self, price: float, qty: float, taker_buy: bool) -> None:
+        bar = self.bar
+        self.price = price
+        bar["h"] = max(bar["h"], price)
+        bar["l"] = min(bar["l"], price)
+        bar["c"] = price
+        bar["v"] += qty
+        bar["q"] += qty * price
+        bar["n"] += 1
+        if taker_buy:
+            bar["V"] += qty
+            bar["Q"] += qty * price
+        self.trade_id += 1
+
+    def bar_row(self) -> list:
+        """The forming bar in the layout of ``futures_klines``."""
+        bar = self.bar
+        return [
+            bar["t"],
+            *[f"{bar[key]:.8f}" for key in "ohlcv"],
+            bar["t"] + self.interval_ms - 1,
+            f"{bar['q']:.8f}",
+            bar["n"],
+            f"{bar['V']:.8f}",
+            f"{bar['Q']:.8f}",
+            "0",
+        ]
+
+    def close_bar(self) -> None:
+        self.history.append(self.bar_row())
+        self.open_bar(self.bar["t"] + self.interval_ms)
+
+
+class MockExchange:
+    """
+    Simulated futures exchange served by ``aiohttp``.
+
+    Every symbol moves ``ticks_per_second`` times a second and each move is
+    pushed to the kline and trade streams subscribed to it, so the event
+    rate is ``len(symbols) * ticks_per_second``. REST requests and user
+    stream events are delayed by ``latency_ms`` plus up to ``jitter_ms``,
+    carry ``X-MBX-USED-WEIGHT-1M`` and are refused with 429 once a minute's
+    weight passes ``weight_limit``. MARKET orders fill at the last price;
+    stop, take-profit and trailing orders trigger on the random walk.
+    """
+
+    def __init__(
+        self,
+        symbols: List[str],
+        interval: str = "1m",
+        bar_seconds: float = 60,
+        ticks_per_second: float = 4,
+        volatility: float = 0.01,
+        latency_ms: float = 0,
+        jitter_ms: float = 0,
+        weight_limit: int = 2400,
+        balance: float = 1000.0,
+        history: int = 1500,
+        seed: int = 0,
+    ) -> None:
+        self.interval = interval
+        self.interval_ms = interval_to_ms(interval)
+        self.bar_seconds = bar_seconds
+        self.ticks_per_second = ticks_per_second
+        self.ticks_per_bar = max(int(bar_seconds * ticks_per_second), 1)
+        # per tick, so a bar moves about ``volatility``
+        self.sigma = volatility / math.sqrt(self.ticks_per_bar)
+        self.latency = latency_ms / 1000
+        self.jitter = jitter_ms / 1000
+        self.weight_limit = weight_limit
+        self.wallet = balance
+        self.random = random.Random(seed)
+        self.order_ids = itertools.count(1)
+
+        self.symbols: Dict[str, MockSymbol] = {}
+        now_ms = int(time.time() * 1000)
+        forming = now_ms // self.interval_ms * self.interval_ms
+        for symbol in symbols:
+            price = self.random.uniform(1, 100)
+            self.symbols[symbol] = MockSymbol(symbol, price, self.interval_ms)
+            # closed bars up to the wall clock, so caches see no gap
+            for i in range(history, 0, -1):
+                self._walk_bar(self.symbols[symbol], forming - i * self.interval_ms)
+            self.symbols[symbol].open_bar(forming)
+
+        # stream name -> websockets; raw connections get bare events
+        self.streams: Dict[str, Set[Tuple[web.WebSocketResponse, bool]]] = defaultdict(
+            set
+        )
+        self.user_sockets: Set[web.WebSocketResponse] = set()
+        self.weight_minute = 0
+        self.weight_used = 0
+        self.stats: Dict[str, int] = defaultdict(int)
+        self.telegram: List[str] = []
+
+    def _walk_bar(self, mock: MockSymbol, open_time: int) -> None:
+        mock.open_bar(open_time)
+        for _ in range(20):
+            mock.trade(*self._next_trade(mock, self.sigma * math.sqrt(20)))
+        mock.close_bar()
+
+    def _next_trade(
+        self, mock: MockSymbol, sigma: float = None
+    ) -> Tuple[float, float, bool]:
+        sigma = self.sigma if sigma is None else sigma
+        price = mock.price * math.exp(self.random.gauss(0, sigma))
+        qty = round(self.random.uniform(1, 100), 1)
+        return price, qty, self.random.random() < 0.5
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_route("*", "/{path:.*}", self.dispatch)
+        app.on_startup.append(self._start_market)
+        app.on_shutdown.append(self._close_sockets)
+        return app
+
+    async def _start_market(self, app: web.Application) -> None:
+        app["market"] = asyncio.create_task(self.run_market())
+
+    async def _close_sockets(self, app: web.Application) -> None:
+        app["market"].cancel()
+        sockets = {ws for conns in self.streams.values() for ws, _ in conns}
+        for ws in sockets | self.user_sockets:
+            await ws.close()
+
+    async def dispatch(self, request: web.Request) -> web.StreamResponse:
+        path = request.match_info["path"]
+        if path.startswith(("api/", "fapi/")):
+            return await self.rest(request, path)
+        if path.startswith("bot") and path.endswith("/sendMessage"):
+            data = await request.post()
+            self.telegram.append(data.get("text", ""))
+            self.stats["telegram"] += 1
+            return web.json_response({"ok": True, "result": {}})
+        if path == "mock/stats":
+            return web.json_response(self.snapshot())
+        if request.headers.get("Upgrade", "").lower() == "websocket":
+            return await self.websocket(request, path)
+        raise web.HTTPNotFound()
+
+    def snapshot(self) -> dict:
+        return {
+            "stats": dict(self.stats),
+            "wallet": self.wallet,
+            "positions": {
+                symbol: {"amount": mock.position, "entry_price": mock.entry_price}
+                for symbol, mock in self.symbols.items()
+            },
+            "open_orders": sum(len(mock.orders) for mock in self.symbols.values()),
+            "subscribers": sum(len(conns) for conns in self.streams.values()),
+        }
+
+    def _use_weight(self, weight: int) -> int:
+        minute = int(time.time() // 60)
+        if minute != self.weight_minute:
+            self.weight_minute, self.weight_used = minute, 0
+        self.weight_used += weight
+        return self.weight_used
+
+    async def rest(self, request: web.Request, path: str) -> web.Response:
+        params = dict(request.query)
+        if request.can_read_body:
+            params.update(await request.post())
+        endpoint = path.split("/", 2)[-1]
+        weight = REQUEST_WEIGHTS.get(endpoint, 1)
+        if endpoint == "klines":
+            weight = kline_weight(int(params.get("limit", 500)))
+        elif endpoint == "openOrders" and "symbol" not in params:
+            weight = 40
+        used = self._use_weight(weight)
+        headers = {"X-MBX-USED-WEIGHT-1M": str(used)}
+        self.stats["requests"] += 1
+
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + self.random.uniform(0, self.jitter))
+        if used > self.weight_limit:
+            self.stats["rate_limited"] += 1
+            headers["Retry-After"] = str(60 - int(time.time()) % 60)
+            return web.json_response(
+                {"code": -1003, "msg": "Too many requests; current limit exceeded."},
+                status=429,
+                headers=headers,
+            )
+        try:
+            body = self.handle(request.method, endpoint, params)
+        except ExchangeError as e:
+            self.stats["errors"] += 1
+            return web.json_response(
+                {"code": e.code, "msg": e.msg}, status=e.status, headers=headers
+            )
+        return web.json_response(body, headers=headers)
+
+    def handle(self, method: str, endpoint: str, params: dict):
+        if endpoint in ("ping", "listenKey") and method != "POST":
+            return {}
+        if endpoint == "time":
+            return {"serverTime": int(time.time() * 1000)}
+        if endpoint == "listenKey":
+            return {"listenKey": f"mock{self.random.getrandbits(64):016x}"}
+        if endpoint == "exchangeInfo":
+            return self.exchange_info()
+        if endpoint == "klines":
+            return self.klines(params)
+        if endpoint == "account":
+            return self.account()
+        if endpoint == "positionRisk":
+            return [
+                self._position_risk(mock)
+                for mock in self.symbols.values()
+                if params.get("symbol") in (None, mock.symbol)
+            ]
+        if endpoint == "ticker/price":
+            mock = self._symbol(params)
+            return {
+                "symbol": mock.symbol,
+                "price": f"{mock.price:.8f}",
+                "time": int(time.time() * 1000),
+            }
+        if endpoint == "order" and method == "POST":
+            return self.place_order(params)
+        if endpoint == "order" and method == "DELETE":
+            mock = self._symbol(params)
+            order = mock.orders.get(int(params.get("orderId", 0)))
+            if order is None or order["algo"]:
+                raise ExchangeError(-2011, "Unknown order sent.")
+            self.cancel(mock, order)
+            return self._public(order)
+        if endpoint == "openOrders" and method == "GET":
+            return [
+                self._public(order) for order in self._open_orders(params, algo=False)
+            ]
+        if endpoint == "batchOrders" and method == "POST":
+            return self.place_batch(params)
+        if endpoint == "allOpenOrders" and method == "DELETE":
+            mock = self._symbol(params)
+            for order in self._open_orders(params, algo=False):
+                self.cancel(mock, order)
+            return {
+                "code": 200,
+                "msg": "The operation of cancel all open order is done.",
+            }
+        if endpoint == "algoOrder" and method == "POST":
+            return self.place_algo_order(params)
+        if endpoint == "algoOrder" and method == "DELETE":
+            mock = self._symbol(params)
+            order = mock.orders.get(int(params.get("algoId", 0)))
+            if order is None or not order["algo"]:
+                raise ExchangeError(-2011, "Unknown order sent.")
+            self.cancel(mock, order)
+            return {
+                "algoId": order["orderId"],
+                "clientAlgoId": order["clientOrderId"],
+                "code": "200",
+                "msg": "success",
+            }
+        if endpoint == "openAlgoOrders" and method == "GET":
+            return [
+                self._algo_public(order)
+                for order in self._open_orders(params, algo=True)
+            ]
+        if endpoint == "algoOpenOrders" and method == "DELETE":
+            mock = self._symbol(params)
+            for order in self._open_orders(params, algo=True):
+                self.cancel(mock, order)
+            return {
+                "code": 200,
+                "msg": "The operation of cancel all open order is done.",
+            }
+        raise ExchangeError(-5000, f"Path {method} {endpoint} not supported.", 404)
+
+    def _open_orders(self, params: dict, algo: bool) -> List[dict]:
+        """Open regular or algo orders, of ``params["symbol"]`` if given."""
+        return [
+            order
+            for mock in self.symbols.values()
+            if params.get("symbol") in (None, mock.symbol)
+            for order in list(mock.orders.values())
+            if order["algo"] == algo
+        ]
+
+    def _symbol(self, params: dict) -> MockSymbol:
+        mock = self.symbols.get(params.get("symbol"))
+        if mock is None:
+            raise ExchangeError(-1121, "Invalid symbol.")
+        return mock
+
+    def exchange_info(self) -> dict:
+        return {
+            "timezone": "UTC",
+            "serverTime": int(time.time() * 1000),
+            "symbols": [
+                {
+                    "symbol": symbol,
+                    "pair": symbol,
+                    "contractType": "PERPETUAL",
+                    "status": "TRADING",
+                    "baseAsset": symbol[:-4],
+                    "quoteAsset": "USDT",
+                    "marginAsset": "USDT",
+                    "pricePrecision": 4,
+                    "quantityPrecision": 1,
+                    "filters": [
+                        {
+                            "filterType": "PRICE_FILTER",
+                            "minPrice": "0.0001",
+                            "maxPrice": "200000",
+                            "tickSize": "0.0001",
+                        },
+                        {
+                            "filterType": "LOT_SIZE",
+                            "minQty": "0.1",
+                            "maxQty": "1000000",
+                            "stepSize": "0.1",
+                        },
+                        {
+                            "filterType": "MARKET_LOT_SIZE",
+                            "minQty": "0.1",
+                            "maxQty": "100000",
+                            "stepSize": "0.1",
+                        },
+                        {"filterType": "MIN_NOTIONAL", "notional": "5"},
+                    ],
+                }
+                for symbol in self.symbols
+            ],
+        }
+
+    def klines(self, params: dict) -> List[list]:
+        mock = self._symbol(params)
+        limit = min(int(params.get("limit", 500)), 1500)
+        rows = mock.history + [mock.bar_row()]
+        start, end = params.get("startTime"), params.get("endTime")
+        if start is not None:
+            rows = [row for row in rows if row[0] >= int(start)]
+        if end is not None:
+            rows = [row for row in rows if row[0] <= int(end)]
+        return rows[:limit] if start is not None else rows[-limit:]
+
+    def _margin(self) -> float:
+        return sum(abs(m.position) * m.entry_price for m in self.symbols.values())
+
+    def _unrealized(self, mock: MockSymbol) -> float:
+        return mock.position * (mock.price - mock.entry_price)
+
+    def account(self) -> dict:
+        unrealized = sum(self._unrealized(mock) for mock in self.symbols.values())
+        available = self.wallet + min(unrealized, 0) - self._margin()
+        return {
+            "totalWalletBalance": f"{self.wallet:.8f}",
+            "totalUnrealizedProfit": f"{unrealized:.8f}",
+            "availableBalance": f"{available:.8f}",
+            "assets": [
+                {
+                    "asset": "USDT",
+                    "walletBalance": f"{self.wallet:.8f}",
+                    "unrealizedProfit": f"{unrealized:.8f}",
+                    "crossWalletBalance": f"{self.wallet:.8f}",
+                    "availableBalance": f"{available:.8f}",
+                }
+            ],
+            "positions": [
+                {
+                    "symbol": mock.symbol,
+                    "positionAmt": f"{mock.position:.1f}",
+                    "entryPrice": f"{mock.entry_price:.8f}",
+                    "unrealizedProfit": f"{self._unrealized(mock):.8f}",
+                    "positionSide": "BOTH",
+                }
+                for mock in self.symbols.values()
+            ],
+        }
+
+    def _position_risk(self, mock: MockSymbol) -> dict:
+        return {
+            "symbol": mock.symbol,
+            "positionAmt": f"{mock.position:.1f}",
+            "entryPrice": f"{mock.entry_price:.8f}",
+            "markPrice": f"{mock.price:.8f}",
+            "unRealizedProfit": f"{self._unrealized(mock):.8f}",
+            "positionSide": "BOTH",
+            "updateTime": int(time.time() * 1000),
+        }
+
+    def place_batch(self, params: dict) -> List[dict]:
+        orders = json.loads(params.get("batchOrders", "[]"))
+        if not 0 < len(orders) <= 5:
+            raise ExchangeError(-1102, "Mandatory parameter 'batchOrders' invalid.")
+        results = []
+        for order in orders:
+            try:
+                results.append(self.place_order(order))
+            except ExchangeError as e:
+                results.append({"code": e.code, "msg": e.msg})
+        return results
+
+    def place_algo_order(self, params: dict) -> dict:
+        """
+        A conditional order as ``algoOrder`` takes it (``triggerPrice``,
+        ``activatePrice``, ``clientAlgoId``); it goes on the book like any
+        other order and fills under its own type once triggered.
+        """
+        if params.get("algoType") != "CONDITIONAL":
+            raise ExchangeError(-1102, "Mandatory parameter 'algoType' invalid.")
+        if params.get("type") not in ALGO_ORDER_TYPES:
+            raise ExchangeError(-1116, "Invalid orderType.")
+        renames = {
+            "triggerPrice": "stopPrice",
+            "activatePrice": "activationPrice",
+            "clientAlgoId": "newClientOrderId",
+        }
+        order = self.place_order(
+            {renames.get(k, k): v for k, v in params.items()}, algo=True
+        )
+        return self._algo_public(order)
+
+    def place_order(self, params: dict, algo: bool = False) -> dict:
+        mock = self._symbol(params)
+        side, order_type = params.get("side"), params.get("type")
+        if order_type in ALGO_ORDER_TYPES and not algo:
+            raise ExchangeError(
+                -4120,
+                "Order type not supported for this endpoint. "
+                "Please use the Algo Order API endpoints instead.",
+            )
+        if side not in ("BUY", "SELL"):
+            raise ExchangeError(-1102, "Mandatory parameter 'side' was not sent.")
+        close_position = str(params.get("closePosition", "false")).lower() == "true"
+        quantity = float(params.get("quantity", 0))
+        if not close_position and quantity <= 0:
+            raise ExchangeError(-1102, "Mandatory parameter 'quantity' was not sent.")
+        if order_type in ("STOP_MARKET", "TAKE_PROFIT_MARKET"):
+            if "stopPrice" not in params:
+                raise ExchangeError(-1102, "Mandatory parameter 'stopPrice' invalid.")
+            stop_price = float(params["stopPrice"])
+            rising = (order_type == "STOP_MARKET") == (side == "BUY")
+            # a trigger already crossed would fire at once
+            if mock.price >= stop_price if rising else mock.price <= stop_price:
+                raise ExchangeError(-2021, "Order would immediately trigger.")
+        elif order_type == "TRAILING_STOP_MARKET":
+            if not 0.1 <= float(params.get("callbackRate", 0)) <= 5:
+                raise ExchangeError(-2007, "Invalid callBack rate.")
+        elif order_type != "MARKET":
+            raise ExchangeError(-1116, "Invalid orderType.")
+
+        now = int(time.time() * 1000)
+        order = {
+            "orderId": next(self.order_ids),
+            "symbol": mock.symbol,
+            "status": "NEW",
+            "clientOrderId": params.get("newClientOrderId")
+            or f"mock{self.random.getrandbits(64):016x}",
+            "price": "0",
+            "avgPrice": "0.00",
+            "origQty": f"{quantity:.1f}",
+            "executedQty": "0",
+            "cumQuote": "0",
+            "timeInForce": params.get("timeInForce", "GTC"),
+            "type": order_type,
+            "reduceOnly": close_position,
+            "closePosition": close_position,
+            "side": side,
+            "positionSide": "BOTH",
+            "stopPrice": params.get("stopPrice", "0"),
+            "workingType": "CONTRACT_PRICE",
+            "origType": order_type,
+            "updateTime": now,
+            "algo": algo,
+        }
+        if order_type == "TRAILING_STOP_MARKET":
+            order["activatePrice"] = params.get("activationPrice", f"{mock.price}")
+            order["priceRate"] = params.get("callbackRate")
+            order["activated"] = "activationPrice" not in params
+            order["extreme"] = mock.price
+        self.stats["orders"] += 1
+        self.push_user(self._order_event(order, mock, "NEW"))
+        if order_type == "MARKET":
+            self.fill(mock, order)
+        else:
+            mock.orders[order["orderId"]] = order
+        return self._public(order)
+
+    @staticmethod
+    def _public(order: dict) -> dict:
+        """``order`` without the mock's own bookkeeping."""
+        return {
+            k: v for k, v in order.items() if k not in ("activated", "extreme", "algo")
+        }
+
+    @staticmethod
+    def _algo_public(order: dict) -> dict:
+        """``order`` in the layout of an ``algoOrder`` response."""
+        return {
+            "algoId": order["orderId"],
+            "clientAlgoId": order["clientOrderId"],
+            "algoType": "CONDITIONAL",
+            "orderType": order["type"],
+            "symbol": order["symbol"],
+            "side": order["side"],
+            "positionSide": order["positionSide"],
+            "timeInForce": order["timeInForce"],
+            "quantity": order["origQty"],
+            "algoStatus": order["status"],
+            "triggerPrice": order["stopPrice"],
+            "price": order["price"],
+            "workingType": order["workingType"],
+            "closePosition": order["closePosition"],
+            "reduceOnly": order["reduceOnly"],
+            "activatePrice": order.get("activatePrice", ""),
+            "callbackRate": order.get("priceRate", ""),
+            "createTime": order["updateTime"],
+            "updateTime": order["updateTime"],
+        }
+
+    def fill(self, mock: MockSymbol, order: dict) -> None:
+        sign = 1 if order["side"] == "BUY" else -1
+        quantity = (
+            abs(mock.position) if order["closePosition"] else float(order["origQty"])
+        )
+        price = mock.price
+        before = mock.position
+        after = round(before + sign * quantity, 8)
+
+        realized = 0.0
+        if before and (before > 0) != (sign > 0):
+            closed = min(quantity, abs(before))
+            realized = closed * (price - mock.entry_price) * (1 if before > 0 else -1)
+        if after == 0:
+            mock.entry_price = 0.0
+        elif before == 0 or (before > 0) != (after > 0):
+            mock.entry_price = price
+        elif abs(after) > abs(before):
+            mock.entry_price = (
+                abs(before) * mock.entry_price + quantity * price
+            ) / abs(after)
+        mock.position = after
+        fee = quantity * price * TAKER_FEE
+        self.wallet += realized - fee
+
+        order.update(
+            status="FILLED",
+            avgPrice=f"{price:.8f}",
+            executedQty=f"{quantity:.1f}",
+            cumQuote=f"{quantity * price:.8f}",
+            updateTime=int(time.time() * 1000),
+        )
+        mock.orders.pop(order["orderId"], None)
+        self.stats["fills"] += 1
+        self.push_user(self._account_event(mock))
+        self.push_user(
+            self._order_event(order, mock, "TRADE", quantity, price, fee, realized)
+        )
+        if after == 0:
+            # close-position orders go with the position
+            for other in list(mock.orders.values()):
+                if other["closePosition"] or other["type"] == "TRAILING_STOP_MARKET":
+                    self.cancel(mock, other)
+
+    def cancel(self, mock: MockSymbol, order: dict) -> None:
+        mock.orders.pop(order["orderId"], None)
+        order.update(status="CANCELED", updateTime=int(time.time() * 1000))
+        self.push_user(self._order_event(order, mock, "CANCELED"))
+
+    def _triggered(self, mock: MockSymbol, order: dict) -> bool:
+        price, buy = mock.price, order["side"] == "BUY"
+        if order["type"] == "TRAILING_STOP_MARKET":
+            activation = float(order["activatePrice"])
+            if not order["activated"]:
+                if (price <= activation) if buy else (price >= activation):
+                    order.update(activated=True, extreme=price)
+                return False
+            extreme = order["extreme"] = (
+                min(order["extreme"], price) if buy else max(order["extreme"], price)
+            )
+            callback = float(order["priceRate"]) / 100
+            return (
+                price >= extreme * (1 + callback)
+                if buy
+                else (price <= extreme * (1 - callback))
+            )
+        stop = float(order["stopPrice"])
+        rising = (order["type"] == "STOP_MARKET") == buy
+        return price >= stop if rising else price <= stop
+
+    def _order_event(
+        self,
+        order: dict,
+        mock: MockSymbol,
+        execution: str,
+        last_qty: float = 0.0,
+        last_price: float = 0.0,
+        fee: float = 0.0,
+        realized: float = 0.0,
+    ) -> dict:
+        now = int(time.time() * 1000)
+        return {
+            "e": "ORDER_TRADE_UPDATE",
+            "T": now,
+            "E": now,
+            "o": {
+                "s": mock.symbol,
+                "c": order["clientOrderId"],
+                "S": order["side"],
+                "o": order["type"],
+                "f": order["timeInForce"],
+                "q": order["origQty"],
+                "p": "0",
+                "ap": order["avgPrice"],
+                "sp": order["stopPrice"],
+                "x": execution,
+                "X": order["status"],
+                "i": order["orderId"],
+                "l": f"{last_qty:.1f}",
+                "z": order["executedQty"],
+                "L": f"{last_price:.8f}",
+                "n": f"{fee:.8f}",
+                "N": "USDT",
+                "T": now,
+                "t": mock.trade_id if execution == "TRADE" else 0,
+                "b": "0",
+                "a": "0",
+                "m": False,
+                "R": order["reduceOnly"],
+                "wt": "CONTRACT_PRICE",
+                "ot": order["origType"],
+                "ps": "BOTH",
+                "cp": order["closePosition"],
+                "AP": order.get("activatePrice", "0"),
+                "cr": order.get("priceRate", "0"),
+                "rp": f"{realized:.8f}",
+            },
+        }
+
+    def _account_event(self, mock: MockSymbol) -> dict:
+        now = int(time.time() * 1000)
+        return {
+            "e": "ACCOUNT_UPDATE",
+            "T": now,
+            "E": now,
+            "a": {
+                "m": "ORDER",
+                "B": [
+                    {
+                        "a": "USDT",
+                        "wb": f"{self.wallet:.8f}",
+                        "cw": f"{self.wallet:.8f}",
+                        "bc": "0",
+                    }
+                ],
+                "P": [
+                    {
+                        "s": mock.symbol,
+                        "pa": f"{mock.position:.1f}",
+                        "ep": f"{mock.entry_price:.8f}",
+                        "cr": "0",
+                        "up": f"{self._unrealized(mock):.8f}",
+                        "mt": "cross",
+                        "iw": "0",
+                        "ps": "BOTH",
+                        "ma": "USDT",
+                    }
+                ],
+            },
+        }
+
+    def _kline_event(self, mock: MockSymbol, closed: bool, now: int) -> dict:
+        bar = mock.bar
+        return {
+            "e": "continuous_kline",
+            "E": now,
+            "ps": mock.symbol,
+            "ct": "PERPETUAL",
+            "k": {
+                "t": bar["t"],
+                "T": bar["t"] + self.interval_ms - 1,
+                "i": self.interval,
+                "f": 0,
+                "L": mock.trade_id,
+                "o": f"{bar['o']:.8f}",
+                "c": f"{bar['c']:.8f}",
+                "h": f"{bar['h']:.8f}",
+                "l": f"{bar['l']:.8f}",
+                "v": f"{bar['v']:.8f}",
+                "n": bar["n"],
+                "x": closed,
+                "q": f"{bar['q']:.8f}",
+                "V": f"{bar['V']:.8f}",
+                "Q": f"{bar['Q']:.8f}",
+                "B": "0",
+            },
+        }
+
+    def push_user(self, event: dict) -> None:
+        if not self.user_sockets:
+            return
+        text = json.dumps(event)
+        delay = self.latency + self.random.uniform(0, self.jitter)
+        for ws in list(self.user_sockets):
+            # call_later keeps the NEW -> ACCOUNT_UPDATE -> FILLED order
+            # as long as there is no jitter
+            asyncio.get_running_loop().call_later(
+                delay, asyncio.ensure_future, self._send(ws, text)
+            )
+
+    async def _send(self, ws: web.WebSocketResponse, text: str) -> None:
+        try:
+            await ws.send_str(text)
+            self.stats["events"] += 1
+        except (ConnectionError, RuntimeError):
+            pass
+
+    async def run_market(self) -> None:
+        period = 1 / self.ticks_per_second
+        ticks = 0
+        next_tick = time.monotonic()
+        while True:
+            next_tick += period
+            await asyncio.sleep(max(next_tick - time.monotonic(), 0))
+            ticks += 1
+            closed = ticks % self.ticks_per_bar == 0
+            now = int(time.time() * 1000)
+            sends = []
+            for mock in self.symbols.values():
+                price, qty, taker_buy = self._next_trade(mock)
+                mock.trade(price, qty, taker_buy)
+                sends += self._publish(mock, closed, now, qty, taker_buy)
+                for order in list(mock.orders.values()):
+                    # an earlier fill may have canceled it
+                    if order["orderId"] in mock.orders and self._triggered(mock, order):
+                        self.fill(mock, order)
+                if closed:
+                    mock.close_bar()
+            if sends:
+                await asyncio.gather(*sends)
+
+    def _publish(
+        self, mock: MockSymbol, closed: bool, now: int, qty: float, taker_buy: bool
+    ) -> list:
+        sends = []
+        name = mock.symbol.lower()
+        kline_stream = f"{name}_perpetual@continuousKline_{self.interval}"
+        for stream, event in (
+            (kline_stream, lambda: self._kline_event(mock, closed, now)),
+            (f"{name}@aggTrade", lambda: self._trade_event(mock, qty, taker_buy, now)),
+        ):
+            conns = self.streams.get(stream)
+            if not conns:
+                continue
+            data = event()
+            raw, combined = json.dumps(data), None
+            for ws, is_raw in list(conns):
+                if not is_raw and combined is None:
+                    combined = json.dumps({"stream": stream, "data": data})
+                sends.append(self._send(ws, raw if is_raw else combined))
+        return sends
+
+    def _trade_event(
+        self, mock: MockSymbol, qty: float, taker_buy: bool, now: int
+    ) -> dict:
+        return {
+            "e": "aggTrade",
+            "E": now,
+            "s": mock.symbol,
+            "a": mock.trade_id,
+            "p": f"{mock.price:.8f}",
+            "q": f"{qty:.1f}",
+            "f": mock.trade_id,
+            "l": mock.trade_id,
+            "T": now,
+            "m": not taker_buy,
+        }
+
+    async def websocket(self, request: web.Request, path: str) -> web.StreamResponse:
+        parts = path.split("/")
+        streams: List[str] = []
+        raw = True
+        user = False
+        if parts[-1] == "stream" and "streams" in request.query:
+            streams, raw = request.query["streams"].split("/"), False
+        elif parts[-1] == "ws" and "listenKey" in request.query:
+            user = True
+        elif len(parts) >= 2 and parts[-2] == "ws":
+            # a listen key has no "@"
+            user = "@" not in parts[-1]
+            streams = [] if user else [parts[-1]]
+        else:
+            raise web.HTTPNotFound()
+
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        if user:
+            self.user_sockets.add(ws)
+        for stream in streams:
+            self.streams[stream].add((ws, raw))
+        self.stats["connections"] += 1
+        try:
+            async for msg in ws:
+                if msg.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self.user_sockets.discard(ws)
+            for stream in streams:
+                self.streams[stream].discard((ws, raw))
+        return ws
+
+
+def build_exchange(args: argparse.Namespace) -> MockExchange:
+    return MockExchange(
+        symbols=[f"{asset}USDT" for asset in args.symbols.split(",")],
+        interval=args.interval,
+        bar_seconds=args.bar_seconds,
+        ticks_per_second=args.ticks_per_second,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        weight_limit=args.weight_limit,
+        seed=args.seed,
+    )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--symbols", default="OP", help="comma separated assets")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--bar-seconds", type=float, default=60)
+    parser.add_argument("--ticks-per-second", type=float, default=4)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--jitter-ms", type=float, default=0)
+    parser.add_argument("--weight-limit", type=int, default=2400)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    add_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    web.run_app(build_exchange(args).app(), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
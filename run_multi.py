@@ -0,0 +1,210 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+# before binance, so the modules it imports but we never use load lazily
+import utils.lazy_imports  # noqa: F401
+
+from binance import AsyncClient, BinanceSocketManager
+
+from future_api.account_state import AccountState
+from future_api.connection import create_client
+from future_api.exchange_info import ExchangeInfoCache
+from future_api.handler import BinanceHandler
+from future_api.oms import OrderManager
+from future_api.supervisor import StreamSupervisor
+from strategys.adx_strategy import Strategy
+from utils.env import load_env
+from utils.latency import latency
+from utils.telegram_api import send_message
+from utils.telegram_notifier import notifier
+
+load_env()
+API_KEY = os.getenv("API_KEY")
+API_SECRET = os.getenv("API_SECRET")
+# "streaming" updates the indicators per bar in O(1); "batch" recomputes
+# the whole window with pandas_ta
+COMPUTE_MODE = os.getenv("STRATEGY_COMPUTE_MODE", "streaming")
+
+
+logging.getLogger("MULTI_SYMBOL_ALGO_TRADING")
+logging.basicConfig(
+    level=logging.INFO,
+    filename="logs/"
+    + os.path.basename(__file__)
+    + f"{datetime.now():%Y-%m-%d_%H:%M:%S%z}.log",
+    format="{asctime} [{levelname:8}] {process} {thread} {module}: {message}",
+    style="{",
+)
+
+# Binance futures limit for one combined stream connection
+MAX_STREAMS_PER_CONNECTION = 200
+# Concurrent warm-ups (account, exchange info, history) at startup
+MAX_CONCURRENT_WARMUP = 10
+
+Dispatch = Dict[str, Tuple[BinanceHandler, Strategy]]
+
+
+def kline_stream_name(symbol: str, interval: str) -> str:
+    return f"{symbol.lower()}_perpetual@continuousKline_{interval}"
+
+
+async def create_handlers(
+    client: AsyncClient,
+    base_assets: List[str],
+    quote_asset: str,
+    interval: str,
+    limit: int,
+) -> Dispatch:
+    """
+    One handler and strategy per symbol, sharing the client, the account
+    state and order manager (fed by a single user stream) and the exchange
+    info.
+    """
+    account = AccountState()
+    orders = OrderManager()
+    exchange_info = ExchangeInfoCache()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_WARMUP)
+    strategies = {
+        base_asset: Strategy(compute_mode=COMPUTE_MODE) for base_asset in base_assets
+    }
+
+    async def create(base_asset: str, user_stream: bool) -> BinanceHandler:
+        async with semaphore:
+            handler = await BinanceHandler.create(
+                base_asset=base_asset,
+                quote_asset=quote_asset,
+                interval=interval,
+                limit=limit,
+                client=client,
+                account=account,
+                exchange_info=exchange_info,
+                orders=orders,
+                user_stream=user_stream,
+                strategy=strategies[base_asset],
+            )
+        return handler
+
+    # the first one loads the shared state, the rest reuse it
+    handlers = [await create(base_assets[0], user_stream=True)]
+    handlers += await asyncio.gather(
+        *[create(base_asset, user_stream=False) for base_asset in base_assets[1:]]
+    )
+    # every symbol sizes its entries against an even share of the wallet at
+    # startup, not against whatever the symbols before it left available
+    allocation = (account.wallet_balance(quote_asset) or 0) / len(base_assets)
+    for handler in handlers:
+        handler.binance_api.allocation = allocation
+    return {
+        handler.symbol: (handler, strategies[handler.base_asset])
+        for handler in handlers
+    }
+
+
+async def backfill(dispatch: Dispatch, symbols: List[str]) -> int:
+    """Append the bars of ``symbols`` that closed while their stream was down."""
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_WARMUP)
+
+    async def backfill_symbol(symbol: str) -> int:
+        handler, strategy = dispatch[symbol]
+        async with semaphore:
+            return await handler.backfill(strategy)
+
+    counts = await asyncio.gather(*[backfill_symbol(symbol) for symbol in symbols])
+    return sum(counts)
+
+
+async def run_connection(
+    bm: BinanceSocketManager, streams: List[str], dispatch: Dispatch
+):
+    """
+    Read one combined stream and route closed bars to their handler; after
+    a reconnect the bars missed by every symbol on it are backfilled.
+    """
+    symbols = [stream.split("_", 1)[0].upper() for stream in streams]
+
+    async def on_reconnect():
+        count = await backfill(dispatch, symbols)
+        notifier.notify(f"Socket reconnected, backfilled {count} bars")
+
+    stream = StreamSupervisor(
+        lambda: bm.futures_multiplex_socket(streams),
+        name=f"{len(streams)} streams",
+        on_reconnect=on_reconnect,
+    )
+    count_alive = 0
+    async with stream:
+        while True:
+            response = await stream.recv()
+            received = time.time()
+            count_alive += 1
+            data = response.get("data", {})
+            if data.get("e") == "continuous_kline":
+                if data.get("k").get("x"):
+                    try:
+                        handler, strategy = dispatch[data.get("ps")]
+                        handler.on_closed_kline(
+                            strategy=strategy, kline=data, received=received
+                        )
+                    except Exception as e:
+                        # one symbol's failure must not end the other streams
+                        logging.exception(f"{data.get('ps')} closed kline failed")
+                        notifier.notify(f"{data.get('ps')} error: {e}")
+            else:
+                logging.error(response)
+
+            if count_alive > 3000 * len(streams):
+                logging.info(f"Still alive ({len(streams)} streams)")
+                count_alive = 0
+                latency.dump()
+
+
+async def main(base_assets: List[str], quote_asset: str, interval: str, limit: int):
+    client = await create_client(API_KEY, API_SECRET)
+    # every symbol pushes an update about every 250 ms
+    bm = BinanceSocketManager(client, max_queue_size=10 * MAX_STREAMS_PER_CONNECTION)
+    dispatch: Dispatch = {}
+    try:
+        dispatch = await create_handlers(
+            client=client,
+            base_assets=base_assets,
+            quote_asset=quote_asset,
+            interval=interval,
+            limit=limit,
+        )
+        streams = [kline_stream_name(symbol, interval) for symbol in dispatch]
+
+        await notifier.start()
+        logging.info(f"Start trading {len(dispatch)} symbols")
+        notifier.notify(f"Start trading {', '.join(dispatch)}")
+        await asyncio.gather(
+            *[
+                run_connection(
+                    bm, streams[i : i + MAX_STREAMS_PER_CONNECTION], dispatch
+                )
+                for i in range(0, len(streams), MAX_STREAMS_PER_CONNECTION)
+            ]
+        )
+    finally:
+        latency.dump()
+        await notifier.close()
+        for handler, _ in dispatch.values():
+            if handler.user_stream_task is not None:
+                handler.user_stream_task.cancel()
+        await client.close_connection()
+
+
+if __name__ == "__main__":
+    loop = asyncio.get_event_loop()
+    loop.run_until_complete(
+        main(
+            base_assets=["OP", "ARB", "SOL"],
+            quote_asset="USDT",
+            interval="1h",
+            limit=250,
+        )
+    )
+    send_message(msg="Trading stopped")
@@ -1,20 +1,25 @@
 import asyncio
 import logging
 import os
+import time
 from datetime import datetime
+from typing import List, Optional, Set
 
 from binance import AsyncClient, BinanceSocketManager
-from dotenv import find_dotenv, load_dotenv
 
-from utils.telegram_api import send_message
+from future_api.connection import create_client
+from future_api.oms import OrderManager
+from future_api.user_events import Bracket, OrderUpdate
+from utils.env import load_env
 from utils.telegram_msg import TelegramMessage
+from utils.stream_recorder import StreamRecorder, read_records, replay
+from utils.telegram_notifier import notifier
 
-load_dotenv(
-    find_dotenv(filename=".env.local", raise_error_if_not_found=True),
-    override=True,
-)
+load_env()
 API_KEY = os.getenv("API_KEY")
 API_SECRET = os.getenv("API_SECRET")
+# set to record every raw user data event under this directory
+RECORD_DIR = os.getenv("STREAM_RECORD_DIR")
 
 logging.getLogger("USER_DATA_STREAM")
 logging.basicConfig(
@@ -27,23 +32,98 @@ logging.basicConfig(
 )
 
 
-async def main():
-    client = await AsyncClient.create(API_KEY, API_SECRET)
+def cancel_open_legs(client: AsyncClient, orders: OrderManager) -> Set[asyncio.Task]:
+    """
+    On every exit, cancel the legs of the bracket that are still on the book,
+    as known locally, without holding up the stream.
+    """
+    tasks: Set[asyncio.Task] = set()
+
+    async def cancel(leg: OrderUpdate) -> None:
+        try:
+            await client.futures_cancel_order(symbol=leg.symbol, orderId=leg.order_id)
+        except Exception as e:
+            # the exchange may have expired it first
+            logging.warning(f"Cancel {leg.symbol} {leg.order_id}: {e}")
+
+    async def cancel_algo(symbol: str) -> None:
+        # legs that have not triggered yet are algo orders, which no
+        # ORDER_TRADE_UPDATE has told us about
+        try:
+            await client.futures_cancel_all_algo_open_orders(symbol=symbol)
+        except Exception as e:
+            logging.warning(f"Cancel {symbol} algo orders: {e}")
+
+    def on_exit(update: OrderUpdate, bracket: Bracket) -> None:
+        cancels = [cancel(leg) for leg in bracket.open_legs()]
+        cancels.append(cancel_algo(bracket.symbol))
+        for coro in cancels:
+            task = asyncio.create_task(coro)
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+
+    orders.on("exit", on_exit)
+    return tasks
+
+
+def handle_event(telegram_msg: TelegramMessage, response: dict) -> None:
+    event_type = response.get("e")
+    if event_type == "ORDER_TRADE_UPDATE":
+        telegram_msg.new_order_message(response=response)
+        msg = telegram_msg.entry_message()
+        if msg is not None:
+            notifier.notify(msg)
+        msg = telegram_msg.exit_message()
+        if msg is not None:
+            notifier.notify(msg)
+
+
+async def main(record_dir: Optional[str] = RECORD_DIR):
+    client = await create_client(API_KEY, API_SECRET)
     bm = BinanceSocketManager(client)
     ts = bm.futures_user_socket()
-    telegram_msg = TelegramMessage()
-    async with ts as tscm:
-        while True:
-            response = await tscm.recv()
-            event_type = response.get("e")
-            if event_type == "ORDER_TRADE_UPDATE":
-                telegram_msg.new_order_message(response=response)
-                msg = telegram_msg.entry_message()
-                if msg is not None:
-                    send_message(msg=msg)
-                msg = telegram_msg.exit_message()
-                if msg is not None:
-                    send_message(msg=msg)
+    orders = OrderManager()
+    orders.load_open_orders(await client.futures_get_open_orders())
+    cancel_open_legs(client, orders)
+    telegram_msg = TelegramMessage(orders)
+    recorder = StreamRecorder(record_dir, name="user_data") if record_dir else None
+    await notifier.start()
+    try:
+        async with ts as tscm:
+            while True:
+                response = await tscm.recv()
+                if recorder is not None:
+                    recorder.write("user_data", response, time.time())
+                handle_event(telegram_msg, response)
+    finally:
+        if recorder is not None:
+            recorder.close()
+        await notifier.close()
+
+
+async def replay_main(
+    paths: List[str], exchange_url: str, speed: Optional[float] = 1.0
+) -> dict:
+    """
+    Push a recording of ``main`` through the same handler. Leg cancels go
+    to the mock exchange at ``exchange_url`` and Telegram messages are not
+    sent.
+    """
+    from mock_exchange.load_test import point_at
+
+    point_at(exchange_url)
+    client = await create_client(API_KEY, API_SECRET)
+    orders = OrderManager()
+    cancel_open_legs(client, orders)
+    telegram_msg = TelegramMessage(orders)
+
+    async def handle(stream: str, message: dict, received: float) -> None:
+        handle_event(telegram_msg, message)
+
+    try:
+        return await replay(read_records(paths), handle, speed=speed)
+    finally:
+        await client.close_connection()
 
 
 if __name__ == "__main__":
@@ -1,24 +1,38 @@
 import asyncio
+import importlib
 import logging
 import os
 import time
+from contextlib import AsyncExitStack
 from datetime import datetime
+from typing import List, Optional
 
-import pandas as pd
-from binance import AsyncClient, BinanceSocketManager
-from dotenv import find_dotenv, load_dotenv
+# before binance, so the modules it imports but we never use load lazily
+import utils.lazy_imports  # noqa: F401
 
-from future_api.client import BinanceFuturesAPI
+import numpy as np
+from binance import BinanceSocketManager
+
+from future_api.connection import create_client
+from future_api.handler import BinanceHandler
+from future_api.supervisor import StreamSupervisor
 from strategys.adx_strategy import Strategy
-from utils.helpers import kline_to_dataframe
+from strategys.ring_buffer import OHLCVRingBuffer
+from utils.env import load_env
+from utils.latency import latency
+from utils.startup import startup
+from utils.stream_recorder import StreamRecorder, read_records, replay
 from utils.telegram_api import send_message
+from utils.telegram_notifier import notifier
 
-load_dotenv(
-    find_dotenv(filename=".env.local", raise_error_if_not_found=True),
-    override=True,
-)
+load_env()
 API_KEY = os.getenv("API_KEY")
 API_SECRET = os.getenv("API_SECRET")
+# set to record every raw kline message under this directory
+RECORD_DIR = os.getenv("STREAM_RECORD_DIR")
+# "streaming" updates the indicators per bar in O(1); "batch" recomputes
+# the whole window with pandas_ta
+COMPUTE_MODE = os.getenv("STRATEGY_COMPUTE_MODE", "streaming")
 
 
 logging.getLogger("OPUSDT_ALGO_TRADING_V2")
@@ -32,179 +46,158 @@ logging.basicConfig(
 )
 
 
-class BinanceHandler:
-    def __init__(
-        self, base_asset: str, quote_asset: str, interval: str = "1h", limit: int = 250
-    ):
-        self.symbol = f"{base_asset}{quote_asset}"
-        self.interval = interval
-        self.limit = limit
-
-        self.binance_api = BinanceFuturesAPI(
-            base_asset=base_asset, quote_asset=quote_asset
-        )
-        self.data = self.binance_api.historical_kline(
-            symbol=self.symbol, interval=self.interval, limit=self.limit
-        )
-
-        self.delay = 2
-
-    def update_dataframe(self, kline: dict):
-        new_kline = kline_to_dataframe(kline)
-        self.data = pd.concat([self.data, new_kline])
-        self.data = self.data.iloc[-self.limit :]
-
-    def check_long_condition(
-        self, price_above_ema: bool, price_above_short_ema: bool, run_trend_up: bool
-    ):
-        position = self.binance_api.get_real_position()
-        if position < 0 and price_above_ema:
-            self.binance_api.exit_short_market()
-            time.sleep(self.delay)
-            if run_trend_up and price_above_ema and price_above_short_ema:
-                self.binance_api.enter_long_market()
-                time.sleep(self.delay)
-                self.binance_api.place_long_stop_signal()
-                logging.info("Exit short and Enter long")
-            else:
-                logging.info("Exit short")
-        elif (
-            position == 0 and run_trend_up and price_above_ema and price_above_short_ema
-        ):
-            self.binance_api.cancel_all_orders()
-            self.binance_api.enter_long_market()
-            time.sleep(self.delay)
-            self.binance_api.place_long_stop_signal()
-            logging.info("Enter long")
-        else:
-            logging.info("No Long condition")
-
-    def check_short_condition(
-        self, price_below_ema: bool, price_below_short_ema: bool, run_trend_down: bool
-    ):
-        position = self.binance_api.get_real_position()
-        if position > 0 and price_below_ema:
-            self.binance_api.exit_long_market()
-            time.sleep(self.delay)
-            if run_trend_down and price_below_ema and price_below_short_ema:
-                self.binance_api.enter_short_market()
-                time.sleep(self.delay)
-                self.binance_api.place_short_stop_signal()
-                logging.info("Exit long and Enter short")
-            else:
-                logging.info("Exit long")
-        elif (
-            position == 0
-            and run_trend_down
-            and price_below_ema
-            and price_below_short_ema
-        ):
-            self.binance_api.cancel_all_orders()
-            self.binance_api.enter_short_market()
-            time.sleep(self.delay)
-            self.binance_api.place_short_stop_signal()
-            logging.info("Enter short")
-        else:
-            logging.info("No Short condition")
-
-    def check_close_long_condition(self, price_below_ema: bool):
-        position = self.binance_api.get_real_position()
-        if position > 0 and price_below_ema:
-            self.binance_api.exit_long_market()
-            logging.info("Exit long")
-        else:
-            logging.info("No Close long condition")
-
-    def check_close_short_condition(self, price_above_ema: bool):
-        position = self.binance_api.get_real_position()
-        if position < 0 and price_above_ema:
-            self.binance_api.exit_short_market()
-            logging.info("Exit short")
-        else:
-            logging.info("No Close short condition")
-
-
-async def main(base_asset: str, quote_asset: str, interval: str, limit: int):
+def handle_kline(
+    bn_handler: BinanceHandler, strategy: Strategy, response: dict, received: float
+) -> bool:
+    """Feed one kline stream message; ``False`` if it is not a kline."""
+    if response.get("e") != "continuous_kline":
+        return False
+    if response.get("k").get("x"):
+        bn_handler.on_closed_kline(strategy=strategy, kline=response, received=received)
+    return True
+
+
+def bars_message(bars: OHLCVRingBuffer) -> dict:
+    """The warm-up bars as a recordable message, so a replay starts alike."""
+    return {
+        "timestamps": bars.timestamps.tolist(),
+        "columns": bars.columns,
+        "values": np.column_stack([bars[column] for column in bars.columns]).tolist(),
+    }
+
+
+async def main(
+    base_asset: str,
+    quote_asset: str,
+    interval: str,
+    limit: int,
+    record_dir: Optional[str] = RECORD_DIR,
+):
+    startup.mark("imports")
     symbol = f"{base_asset}{quote_asset}"
-    client = await AsyncClient.create()
+    client = await startup.timed("client", create_client(API_KEY, API_SECRET))
     bm = BinanceSocketManager(client)
-    ts = bm.kline_futures_socket(symbol=symbol, interval=interval)
-
-    bn_handler = BinanceHandler(
-        base_asset=base_asset, quote_asset=quote_asset, interval=interval, limit=limit
+    stream = StreamSupervisor(
+        lambda: bm.kline_futures_socket(symbol=symbol, interval=interval),
+        name=symbol,
     )
-    strategy = Strategy()
+    strategy = Strategy(compute_mode=COMPUTE_MODE)
+    recorder = None
+    bn_handler = None
     count_alive = 0
-    logging.info("Start trading")
-    send_message(msg="Start trading")
-    async with ts as tscm:
-        while True:
-            response = await tscm.recv()
-            count_alive += 1
-            if response.get("e") == "continuous_kline":
-                if response.get("k").get("x"):
-                    logging.info(response)
-                    bn_handler.update_dataframe(kline=response)
-                    strategy.compute_signal(
-                        close_price=bn_handler.data["close"],
-                        high_price=bn_handler.data["high"],
-                        low_price=bn_handler.data["low"],
+    try:
+        async with AsyncExitStack() as stack:
+            # the socket connects while the handler warms up; a bar closing
+            # meanwhile waits in the socket queue
+            warm_up = [
+                startup.timed("socket", stack.enter_async_context(stream)),
+                BinanceHandler.create(
+                    base_asset=base_asset,
+                    quote_asset=quote_asset,
+                    interval=interval,
+                    limit=limit,
+                    client=client,
+                    strategy=strategy,
+                ),
+                notifier.start(),
+            ]
+            if strategy.compute_mode == "batch":
+                # the indicator library imports while the requests are in flight
+                warm_up.append(
+                    startup.timed(
+                        "pandas_ta",
+                        asyncio.to_thread(importlib.import_module, "pandas_ta"),
                     )
-                    strategy.condition(close_price=bn_handler.data["close"].iloc[-1])
-                    long_condition = {
-                        "Long": strategy.buy_condition,
-                        "Close_Long": strategy.close_long_condition,
-                        "Price_above_EMA": strategy.price_above_ema,
-                        "Price_above_short_EMA": strategy.price_above_short_ema,
-                        "Run_trend_up": strategy.run_trend_up,
-                    }
-                    short_condition = {
-                        "Short": strategy.sell_condition,
-                        "Close_Short": strategy.close_short_condition,
-                        "Price_below_EMA": strategy.price_below_ema,
-                        "Price_below_short_EMA": strategy.price_below_short_ema,
-                        "Run_trend_down": strategy.run_trend_down,
-                    }
-                    logging.info(long_condition)
-                    logging.info(short_condition)
-
-                    if strategy.buy_condition:
-                        bn_handler.check_long_condition(
-                            price_above_ema=strategy.price_above_ema,
-                            price_above_short_ema=strategy.price_above_short_ema,
-                            run_trend_up=strategy.run_trend_up,
-                        )
-                    elif strategy.close_long_condition:
-                        bn_handler.check_close_long_condition(
-                            price_below_ema=strategy.price_below_ema
-                        )
-
-                    if strategy.sell_condition:
-                        bn_handler.check_short_condition(
-                            price_below_ema=strategy.price_below_ema,
-                            price_below_short_ema=strategy.price_below_short_ema,
-                            run_trend_down=strategy.run_trend_down,
-                        )
-                    elif strategy.close_short_condition:
-                        bn_handler.check_close_short_condition(
-                            price_above_ema=strategy.price_above_ema
-                        )
-                else:
-                    # print("Not closed")
-                    pass
-            else:
-                logging.error(response)
-                ts.close()
-                logging.info("Restarting socket")
-                send_message(msg="Restarting socket")
-                ts = bm.kline_futures_socket(symbol=symbol, interval=interval)
-                count_alive = 0
-                continue
-
-            if count_alive > 3000:
-                logging.info("Still alive")
-                count_alive = 0
-                send_message(msg="Still alive")
+                )
+            _, bn_handler, *_ = await startup.timed("warm_up", asyncio.gather(*warm_up))
+
+            async def on_reconnect():
+                count = await bn_handler.backfill(strategy)
+                if recorder is not None:
+                    # a replay picks up the backfilled window from here
+                    recorder.write("bars", bars_message(bn_handler.bars), time.time())
+                notifier.notify(f"Socket reconnected, backfilled {count} bars")
+
+            stream.on_reconnect = on_reconnect
+            if record_dir:
+                recorder = StreamRecorder(record_dir, name=symbol)
+                recorder.write("bars", bars_message(bn_handler.bars), time.time())
+            startup.mark("ready")
+            logging.info("Start trading")
+            notifier.notify("Start trading")
+            while True:
+                # reconnects and backfills are handled inside ``recv``
+                response = await stream.recv()
+                received = time.time()
+                if recorder is not None:
+                    recorder.write("kline", response, received)
+                count_alive += 1
+                if not handle_kline(bn_handler, strategy, response, received):
+                    logging.error(response)
+                    continue
+
+                if "first_message" not in startup.marks:
+                    startup.mark("first_message")
+                    startup.log()
+                    startup.dump()
+                if count_alive > 3000:
+                    logging.info("Still alive")
+                    count_alive = 0
+                    notifier.notify("Still alive")
+                    latency.dump()
+    finally:
+        if recorder is not None:
+            recorder.close()
+        latency.dump()
+        await notifier.close()
+        if bn_handler is not None and bn_handler.user_stream_task is not None:
+            bn_handler.user_stream_task.cancel()
+        await client.close_connection()
+
+
+async def replay_main(
+    paths: List[str],
+    base_asset: str,
+    quote_asset: str,
+    interval: str,
+    limit: int,
+    exchange_url: str,
+    speed: Optional[float] = 1.0,
+) -> dict:
+    """
+    Push a recording of ``main`` through the same handler. Orders go to the
+    mock exchange at ``exchange_url`` and Telegram messages are not sent.
+    """
+    from mock_exchange.load_test import point_at
+
+    point_at(exchange_url)
+    client = await create_client(API_KEY, API_SECRET)
+    bn_handler = await BinanceHandler.create(
+        base_asset=base_asset,
+        quote_asset=quote_asset,
+        interval=interval,
+        limit=limit,
+        client=client,
+    )
+    strategy = Strategy(compute_mode=COMPUTE_MODE)
+
+    async def handle(stream: str, message: dict, received: float) -> None:
+        if stream == "bars":
+            # start from the recorded warm-up bars, not the mock's history
+            bn_handler.bars = OHLCVRingBuffer(
+                capacity=limit, columns=message["columns"]
+            )
+            bn_handler.bars.extend(message["timestamps"], np.array(message["values"]))
+        else:
+            handle_kline(bn_handler, strategy, message, received)
+
+    try:
+        return await replay(read_records(paths), handle, speed=speed)
+    finally:
+        if bn_handler.user_stream_task is not None:
+            bn_handler.user_stream_task.cancel()
+        latency.dump("logs/latency_replay")
+        await client.close_connection()
 
 
 if __name__ == "__main__":
@@ -1,9 +1,12 @@
 # import vectorbtpro as vbt
-from typing import List
+import math
+from typing import List, Tuple
 
 import numpy as np
 import pandas as pd
-import pandas_ta as ta
+
+# pandas_ta takes long to import and only the batch indicators use it, so
+# it is imported in the functions that need it
 
 
 def ta_change(series: pd.Series, period: int = 1) -> pd.Series:
@@ -29,6 +32,8 @@ def calculate_minus_dm(upMove: pd.Series, downMove: pd.Series) -> pd.Series:
 def true_range_rma(
     high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14
 ) -> pd.Series:
+    import pandas_ta as ta
+
     tr = ta.true_range(high=high, low=low, close=close)
     trur = ta.rma(close=tr, length=period)
     return trur
@@ -37,6 +42,8 @@ def true_range_rma(
 def DX(
     plusDM: pd.Series, minusDM: pd.Series, trur: pd.Series, period: int = 14
 ) -> List[pd.Series]:
+    import pandas_ta as ta
+
     # rma_plusDM = vbt.pandas_ta("RMA").run(plusDM, length=period)
     # rma_minusDM = vbt.pandas_ta("RMA").run(minusDM, length=period)
     rma_plusDM = ta.rma(close=plusDM, length=period)
@@ -56,6 +63,8 @@ def DX(
 def ADX(
     high: pd.Series, low: pd.Series, close: pd.Series, period: int = 14
 ) -> List[pd.Series]:
+    import pandas_ta as ta
+
     upMove = ta_change(high)
     downMove = -ta_change(low)
     plusDM = calculate_plus_dm(upMove, downMove)
@@ -65,3 +74,200 @@ def ADX(
     # adx = vbt.pandas_ta("RMA").run(dx, length=14)
     adx = ta.rma(close=dx, length=period)
     return adx, plusDI, minusDI
+
+
+def rma_2d(values: np.ndarray, period: int = 14) -> np.ndarray:
+    """
+    Row-wise ``ta.rma`` over a ``(n_symbols, n_bars)`` array, vectorized
+    across symbols.
+    """
+    n_symbols, n_bars = values.shape
+    decay = 1.0 - 1.0 / period
+    out = np.full((n_symbols, n_bars), np.nan)
+    weighted = np.full(n_symbols, np.nan)
+    old_wt = np.ones(n_symbols)
+    nobs = np.zeros(n_symbols, dtype=np.int64)
+    for i in range(n_bars):
+        cur = values[:, i]
+        is_observation = ~np.isnan(cur)
+        nobs += is_observation
+        started = ~np.isnan(weighted)
+        old_wt[started] *= decay
+        update = started & is_observation
+        weighted[update] = (old_wt[update] * weighted[update] + cur[update]) / (
+            old_wt[update] + 1.0
+        )
+        old_wt[update] += 1.0
+        first = ~started & is_observation
+        weighted[first] = cur[first]
+        ready = nobs >= period
+        out[ready, i] = weighted[ready]
+    return out
+
+
+def ADX_2d(
+    high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pure-NumPy ADX over ``(n_symbols, n_bars)`` high/low/close arrays.
+    Returns ``(adx, plusDI, minusDI)`` matrices of the same shape.
+    """
+    high = np.asarray(high, dtype=float)
+    low = np.asarray(low, dtype=float)
+    close = np.asarray(close, dtype=float)
+    n_symbols, n_bars = close.shape
+
+    up_move = np.full((n_symbols, n_bars), np.nan)
+    down_move = np.full((n_symbols, n_bars), np.nan)
+    up_move[:, 1:] = high[:, 1:] - high[:, :-1]
+    down_move[:, 1:] = low[:, :-1] - low[:, 1:]
+    plus_dm = np.where((up_move > down_move) & (up_move > 0), up_move, 0.0)
+    minus_dm = np.where((down_move > up_move) & (down_move > 0), down_move, 0.0)
+
+    true_range = np.full((n_symbols, n_bars), np.nan)
+    prev_close = close[:, :-1]
+    true_range[:, 1:] = np.maximum(
+        high[:, 1:] - low[:, 1:],
+        np.maximum(np.abs(high[:, 1:] - prev_close), np.abs(prev_close - low[:, 1:])),
+    )
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        trur = rma_2d(true_range, period)
+        plusDI = 100 * rma_2d(plus_dm, period) / trur
+        minusDI = 100 * rma_2d(minus_dm, period) / trur
+        dx = 100 * rma_2d(np.abs(plusDI - minusDI) / (plusDI + minusDI), period)
+    adx = rma_2d(dx, period)
+    return adx, plusDI, minusDI
+
+
+def _safe_div(numerator: float, denominator: float) -> float:
+    if denominator == 0:
+        if numerator == 0 or math.isnan(numerator):
+            return math.nan
+        return math.copysign(math.inf, numerator)
+    return numerator / denominator
+
+
+class RMAState:
+    """
+    Incremental Wilder RMA matching ``ta.rma`` (``ewm(alpha=1/period,
+    min_periods=period, adjust=True).mean()``) one value at a time.
+    """
+
+    def __init__(self, period: int = 14) -> None:
+        self.period = period
+        self.alpha = 1.0 / period
+        self.weighted: float = math.nan
+        self.old_wt: float = 1.0
+        self.nobs: int = 0
+
+    def update(self, value: float) -> float:
+        is_observation = not math.isnan(value)
+        self.nobs += is_observation
+        if not math.isnan(self.weighted):
+            self.old_wt *= 1.0 - self.alpha
+            if is_observation:
+                if self.weighted != value:
+                    self.weighted = (self.old_wt * self.weighted + value) / (
+                        self.old_wt + 1.0
+                    )
+                self.old_wt += 1.0
+        elif is_observation:
+            self.weighted = value
+        return self.weighted if self.nobs >= self.period else math.nan
+
+
+class StreamingADX:
+    """
+    Stateful ADX/+DI/-DI that updates in O(1) per closed bar.
+
+    Seed it once with ``seed`` on the initial history, then feed each new
+    bar to ``update``. Values track ``ADX()`` on the same bars up to the
+    warm-up difference of the rolling window.
+    """
+
+    def __init__(self, period: int = 14) -> None:
+        self.period = period
+        self.prev_high: float = math.nan
+        self.prev_low: float = math.nan
+        self.prev_close: float = math.nan
+        self.tr_rma = RMAState(period)
+        self.plus_dm_rma = RMAState(period)
+        self.minus_dm_rma = RMAState(period)
+        self.dx_rma = RMAState(period)
+        self.adx_rma = RMAState(period)
+
+        self.adx: float = math.nan
+        self.plusDI: float = math.nan
+        self.minusDI: float = math.nan
+
+    def seed(
+        self, high: pd.Series, low: pd.Series, close: pd.Series
+    ) -> Tuple[float, float, float]:
+        for h, lo, c in zip(
+            np.asarray(high, dtype=float),
+            np.asarray(low, dtype=float),
+            np.asarray(close, dtype=float),
+        ):
+            self.update(h, lo, c)
+        return self.adx, self.plusDI, self.minusDI
+
+    def update(
+        self, high: float, low: float, close: float
+    ) -> Tuple[float, float, float]:
+        up_move = high - self.prev_high
+        down_move = self.prev_low - low
+        plus_dm = up_move if up_move > down_move and up_move > 0 else 0.0
+        minus_dm = down_move if down_move > up_move and down_move > 0 else 0.0
+        true_range = max(
+            high - low,
+            abs(high - self.prev_close),
+            abs(self.prev_close - low),
+        )
+        if math.isnan(self.prev_close):
+            true_range = math.nan
+
+        trur = self.tr_rma.update(true_range)
+        rma_plus_dm = self.plus_dm_rma.update(plus_dm)
+        rma_minus_dm = self.minus_dm_rma.update(minus_dm)
+
+        self.plusDI = 100 * _safe_div(rma_plus_dm, trur)
+        self.minusDI = 100 * _safe_div(rma_minus_dm, trur)
+        dx = 100 * self.dx_rma.update(
+            _safe_div(abs(self.plusDI - self.minusDI), self.plusDI + self.minusDI)
+        )
+        self.adx = self.adx_rma.update(dx)
+
+        self.prev_high = high
+        self.prev_low = low
+        self.prev_close = close
+        return self.adx, self.plusDI, self.minusDI
+
+
+if __name__ == "__main__":
+    # Compare the streaming engine against the pandas_ta batch output.
+    rng = np.random.default_rng(0)
+    close = pd.Series(100 + rng.standard_normal(1000).cumsum())
+    high = close + rng.random(1000)
+    low = close - rng.random(1000)
+
+    adx, plusDI, minusDI = ADX(high=high, low=low, close=close)
+    streaming = StreamingADX()
+    streaming.seed(high=high[:250], low=low[:250], close=close[:250])
+    max_diff = 0.0
+    for i in range(250, len(close)):
+        values = streaming.update(high.iloc[i], low.iloc[i], close.iloc[i])
+        expected = (adx.iloc[i], plusDI.iloc[i], minusDI.iloc[i])
+        max_diff = max(max_diff, *(abs(v - e) for v, e in zip(values, expected)))
+    print(f"max abs diff vs pandas_ta: {max_diff:.3e}")
+
+    batch = ADX_2d(
+        high=np.vstack([high, high * 2]),
+        low=np.vstack([low, low * 2]),
+        close=np.vstack([close, close * 2]),
+    )
+    max_diff = max(
+        np.nanmax(np.abs(matrix[0] - series.to_numpy()))
+        for matrix, series in zip(batch, (adx, plusDI, minusDI))
+    )
+    print(f"max abs diff of ADX_2d vs pandas_ta: {max_diff:.3e}")
@@ -1,10 +1,11 @@
 import logging
+from typing import Optional, Union
 
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 
 # from adx import ADX
-from .adx import ADX
+from .adx import ADX, StreamingADX
 from .adx_config import (
     adxSetting,
     emaSetting,
@@ -12,16 +13,53 @@ from .adx_config import (
     stochasticSetting,
     stopSetting,
 )
+from .snapshot import restore_state, to_state
+from .streaming import StreamingEMA, StreamingStochRSI
 
 # import numpy as np
 # import vectorbtpro as vbt
 
 
-# from typing import Union
+COMPUTE_MODES = ("batch", "streaming")
+
+# Fields kept across restarts by ``get_state``/``set_state``: the simulated
+# position with its stops, and the streaming indicators with their values
+POSITION_FIELDS = (
+    "current_position",
+    "long_stop_loss",
+    "long_take_profit",
+    "long_trail_stop_activate",
+    "long_trail_stop_execute",
+    "long_highest_price",
+    "long_trail_stop",
+    "short_stop_loss",
+    "short_take_profit",
+    "short_trail_stop_activate",
+    "short_trail_stop_execute",
+    "short_lowest_price",
+    "short_trail_stop",
+)
+INDICATOR_FIELDS = (
+    "streaming_adx",
+    "streaming_stoch_rsi",
+    "streaming_ema",
+    "streaming_ema_short",
+)
+VALUE_FIELDS = ("adx", "plusDI", "minusDI", "k", "d", "ema", "ema_short")
+
+
+def _last(series: Union[pd.Series, np.ndarray]) -> float:
+    if isinstance(series, pd.Series):
+        return float(series.iloc[-1])
+    return float(series[-1])
 
 
 class Strategy:
-    def __init__(self):
+    def __init__(self, compute_mode: str = "batch"):
+        if compute_mode not in COMPUTE_MODES:
+            raise ValueError(f"Compute mode {compute_mode} is not supported")
+        self.compute_mode = compute_mode
+
         self.adx_setting = adxSetting()
         self.ema_setting = emaSetting()
         self.rsi_setting = rsiSetting()
@@ -67,12 +105,106 @@ class Strategy:
         self.long_highest_price: float = None
         self.short_lowest_price: float = None
 
+        self.streaming_adx: StreamingADX = None
+        self.streaming_stoch_rsi: StreamingStochRSI = None
+        self.streaming_ema: StreamingEMA = None
+        self.streaming_ema_short: StreamingEMA = None
+
+    def indicator_settings(self) -> dict:
+        """The settings the streaming indicators are built from."""
+        return {
+            name: getattr(self, name).model_dump()
+            for name in (
+                "adx_setting",
+                "ema_setting",
+                "rsi_setting",
+                "stochastic_setting",
+            )
+        }
+
+    def get_state(self) -> dict:
+        """
+        Position, stops and (once seeded) streaming indicator state as
+        JSON-able values, for ``strategys.snapshot.StateSnapshot``.
+        """
+        state = {
+            "position": {name: getattr(self, name, None) for name in POSITION_FIELDS},
+            "indicators": None,
+        }
+        if self.streaming_adx is not None:
+            state["indicators"] = {
+                "settings": self.indicator_settings(),
+                "values": {name: getattr(self, name) for name in VALUE_FIELDS},
+                **{name: to_state(getattr(self, name)) for name in INDICATOR_FIELDS},
+            }
+        return state
+
+    def set_state(self, state: dict, indicators: bool = True) -> bool:
+        """
+        Restore ``get_state`` output. The indicators are only restored in
+        streaming mode with unchanged settings, and only if ``indicators``
+        (i.e. the bars they were computed on are still current); returns
+        whether they were, otherwise they seed on the next ``compute_signal``.
+        """
+        for name, value in state["position"].items():
+            if name in POSITION_FIELDS:
+                setattr(self, name, value)
+
+        saved = state.get("indicators")
+        if (
+            not indicators
+            or saved is None
+            or self.compute_mode != "streaming"
+            or saved["settings"] != self.indicator_settings()
+        ):
+            return False
+        self.seed_signal(close_price=(), high_price=(), low_price=())
+        for name in INDICATOR_FIELDS:
+            restore_state(getattr(self, name), saved[name])
+        for name, value in saved["values"].items():
+            setattr(self, name, value)
+        return True
+
+    def reset_streaming(self) -> None:
+        """Drop the streaming state; it reseeds from the window next bar."""
+        for name in INDICATOR_FIELDS:
+            setattr(self, name, None)
+
     def compute_signal(
         self,
         close_price: pd.Series,
         high_price: pd.Series,
         low_price: pd.Series,
     ) -> None:
+        """
+        Batch mode recomputes every indicator over the whole window.
+        Streaming mode seeds its state from the window on the first call and
+        afterwards only consumes the last bar, so it must be called once per
+        closed bar.
+        """
+        if self.compute_mode == "streaming":
+            if self.streaming_adx is None:
+                self.seed_signal(
+                    close_price=close_price,
+                    high_price=high_price,
+                    low_price=low_price,
+                )
+            else:
+                self.update_signal(
+                    close_price=_last(close_price),
+                    high_price=_last(high_price),
+                    low_price=_last(low_price),
+                )
+            return
+
+        # only the batch path needs it; see strategys/adx.py
+        import pandas_ta as ta
+
+        if not isinstance(close_price, pd.Series):
+            close_price = pd.Series(close_price)
+            high_price = pd.Series(high_price)
+            low_price = pd.Series(low_price)
+
         adx, plusDI, minusDI = ADX(
             high=high_price,
             low=low_price,
@@ -122,6 +254,43 @@ class Strategy:
             length=self.ema_setting.ema_short_length,
         ).iloc[-1]
 
+    def seed_signal(
+        self,
+        close_price: pd.Series,
+        high_price: pd.Series,
+        low_price: pd.Series,
+    ) -> None:
+        self.streaming_adx = StreamingADX(period=self.adx_setting.adx_lenght)
+        self.streaming_stoch_rsi = StreamingStochRSI(
+            length=self.stochastic_setting.stochastic_lenght,
+            rsi_length=self.rsi_setting.rsi_lenght,
+            k=self.stochastic_setting.smooth_k,
+            d=self.stochastic_setting.smooth_d,
+        )
+        self.streaming_ema = StreamingEMA(length=self.ema_setting.ema_length)
+        self.streaming_ema_short = StreamingEMA(
+            length=self.ema_setting.ema_short_length
+        )
+
+        close_price = np.asarray(close_price, dtype=float)
+        high_price = np.asarray(high_price, dtype=float)
+        low_price = np.asarray(low_price, dtype=float)
+        for close, high, low in zip(close_price, high_price, low_price):
+            self.update_signal(close_price=close, high_price=high, low_price=low)
+
+    def update_signal(
+        self,
+        close_price: float,
+        high_price: float,
+        low_price: float,
+    ) -> None:
+        self.adx, self.plusDI, self.minusDI = self.streaming_adx.update(
+            high=high_price, low=low_price, close=close_price
+        )
+        self.k, self.d = self.streaming_stoch_rsi.update(close_price)
+        self.ema = self.streaming_ema.update(close_price)
+        self.ema_short = self.streaming_ema_short.update(close_price)
+
     def condition(self, close_price: float) -> None:
         self.buy_condition = (
             (self.plusDI > self.minusDI)
@@ -215,6 +384,7 @@ class Strategy:
         self.short_trail_stop_activate = price * (
             1 - self.stop_setting.trail_stop_activate
         )
+        self.short_lowest_price = None
 
         print("Take Profit: ", self.short_take_profit)
         print("Stop Loss: ", self.short_stop_loss)
@@ -226,6 +396,7 @@ class Strategy:
         self.long_trail_stop_activate = price * (
             1 + self.stop_setting.trail_stop_activate
         )
+        self.long_highest_price = None
 
         logging.info("Take Profit: %s", self.long_take_profit)
         logging.info("Stop Loss: %s", self.long_stop_loss)
@@ -292,11 +463,13 @@ class Strategy:
         open_price: float,
         high_price: float,
         low_price: float,
-    ) -> None:
+    ) -> Optional[str]:
         """
         Check high price against trail stop activation
         For backtesting purposes: use high price instead of current price
+        Returns the first stop that closed the position ("TS", "TP" or "SL")
         """
+        reason = None
         if self.current_position > 0:
             if high_price >= self.long_trail_stop_activate:
                 print("Trail Stop Activate")
@@ -315,10 +488,14 @@ class Strategy:
                         ts = self.long_trail_stop
                         print(f"TSL | bm: {benchmark} | trail stop: {ts}")
                         self.current_position = 0
+                        reason = "TS"
 
             if high_price >= self.long_take_profit:
                 print("Take Profit")
                 self.current_position = 0
+                reason = reason or "TP"
             elif high_price <= self.long_stop_loss:
                 print("Stop Loss")
                 self.current_position = 0
+                reason = reason or "SL"
+        return reason
@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta
-from typing import Union
-import vectorbtpro as vbt
+from typing import Optional, Union
 import pandas as pd
 
-from adx_strategy import Strategy
+from strategys.adx_strategy import Strategy
+from strategys.kline_cache import KlineCache
+from strategys.tick_backtest import load_trades, simulate_long_ticks
+from strategys.utils import SPOT_KLINE_COLUMNS, binance_data_fetcher
+from strategys.vectorized import condition_arrays, signal_arrays, simulate_long
 
 
 def bar_range_converter(
@@ -38,12 +41,14 @@ class Backtest:
         start_date: datetime,
         window_size: int = 250,
         time_frame: str = "1h",
+        tick_path: Optional[str] = None,
     ) -> None:
 
         self.symbol = symbol
         self.time_frame = time_frame
         self.end_date = end_date
         self.window_size = window_size
+        self.tick_path = tick_path
 
         if isinstance(start_date, datetime):
             if time_frame == "1h":
@@ -55,6 +60,7 @@ class Backtest:
 
         self.get_historical_data()
         self.strategy = Strategy()
+        self.trades = []
 
     def get_historical_data(self) -> pd.DataFrame:
         if self.time_frame == '1h':
@@ -62,16 +68,86 @@ class Backtest:
         else:
             raise ValueError("Only 1h timeframe is supported")
 
-        data = vbt.BinanceData.fetch(
-            self.symbol.upper(),
-            start=self.start_date,
-            end=self.end_date,
-            timeframe=timeframe,
-            tz="Asia/Bangkok",
+        self.data = KlineCache(market="spot").get(
+            symbol=self.symbol,
+            interval=self.time_frame,
+            start_ms=int(
+                pd.Timestamp(self.start_date, tz="Asia/Bangkok").value // 10**6
+            ),
+            end_ms=int(
+                pd.Timestamp(self.end_date, tz="Asia/Bangkok").value // 10**6
+            ),
+            fetch=binance_data_fetcher(symbol=self.symbol, timeframe=timeframe),
+            columns=SPOT_KLINE_COLUMNS,
         )
-        self.data = data.data[self.symbol.upper()]
 
-    def simulate(self) -> None:
+    def simulate(self, mode: str = "window") -> None:
+        if mode == "window":
+            self.simulate_window()
+        elif mode == "vectorized":
+            self.simulate_vectorized()
+        elif mode == "ticks":
+            self.simulate_ticks()
+        else:
+            raise ValueError(f"Mode {mode} is not supported")
+
+    def simulate_vectorized(self) -> None:
+        """
+        Compute indicators once over the whole history and run only the
+        position state machine per bar. Simulates the same bars as
+        simulate_window; indicator values differ from the windowed ones
+        only by the window's warm-up truncation.
+        """
+        self.strategy = Strategy()
+        signals = signal_arrays(
+            self.strategy,
+            close_price=self.data['Close'],
+            high_price=self.data['High'],
+            low_price=self.data['Low'],
+        )
+        conditions = condition_arrays(
+            self.strategy, signals=signals, close_price=self.data['Close']
+        )
+        self.trades = simulate_long(
+            self.strategy,
+            conditions=conditions,
+            high_price=self.data['High'],
+            close_price=self.data['Close'],
+            start=self.window_size,
+        )
+
+    def simulate_ticks(self) -> None:
+        """
+        Like simulate_vectorized, but TP/SL/trailing stops are checked on
+        the recorded trade ticks in ``tick_path`` with the live
+        execute_stop_order_long rules, so intrabar trailing is reproduced.
+        """
+        if self.tick_path is None:
+            raise ValueError("tick_path is required for tick replay")
+        tick_times, tick_prices = load_trades(self.tick_path)
+        self.strategy = Strategy()
+        signals = signal_arrays(
+            self.strategy,
+            close_price=self.data['Close'],
+            high_price=self.data['High'],
+            low_price=self.data['Low'],
+        )
+        conditions = condition_arrays(
+            self.strategy, signals=signals, close_price=self.data['Close']
+        )
+        self.trades = simulate_long_ticks(
+            self.strategy,
+            conditions=conditions,
+            close_price=self.data['Close'],
+            tick_times=tick_times,
+            tick_prices=tick_prices,
+            interval=self.time_frame,
+            start=self.window_size,
+        )
+
+    def simulate_window(self) -> None:
+        self.strategy = Strategy()
+        self.trades = []
         for index in range(1, self.bar_range + 1):
             data = self.data[index:index + self.window_size]
             cur_date = data.index[-1]
@@ -87,12 +163,26 @@ class Backtest:
                 close_price=data['Close'].iloc[-1],
             )
 
+            position = self.strategy.current_position
             self.strategy.execute_order_long(
                 close_price=data['Close'].iloc[-1],
                 open_price=data['Open'].iloc[-1],
                 high_price=data['High'].iloc[-1],
                 low_price=data['Low'].iloc[-1],
             )
+            if position <= 0 and self.strategy.current_position > 0:
+                self.trades.append({
+                    "datetime": cur_date,
+                    "action": "entry",
+                    "price": data['Close'].iloc[-1],
+                })
+            elif position > 0 and self.strategy.current_position == 0:
+                self.trades.append({
+                    "datetime": cur_date,
+                    "action": "exit",
+                    "reason": "signal",
+                    "price": data['Close'].iloc[-1],
+                })
 
             # self.strategy.execute_order_short(
             #     close_price=data['Close'].iloc[-1],
@@ -101,12 +191,24 @@ class Backtest:
             #     low_price=data['Low'].iloc[-1],
             # )
 
-            self.strategy.execute_stop_order_long_backtest(
+            reason = self.strategy.execute_stop_order_long_backtest(
                 close_price=data['Close'].iloc[-1],
                 open_price=data['Open'].iloc[-1],
                 high_price=data['High'].iloc[-1],
                 low_price=data['Low'].iloc[-1],
             )
+            if reason is not None:
+                exit_price = {
+                    "TS": data['High'].iloc[-1],
+                    "TP": self.strategy.long_take_profit,
+                    "SL": self.strategy.long_stop_loss,
+                }[reason]
+                self.trades.append({
+                    "datetime": cur_date,
+                    "action": "exit",
+                    "reason": reason,
+                    "price": exit_price,
+                })
             print()
 
 
@@ -0,0 +1,222 @@
+import json
+import logging
+import os
+import re
+import time
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+INTERVAL_UNIT_MS = {
+    "m": 60_000,
+    "h": 3_600_000,
+    "d": 86_400_000,
+    "w": 604_800_000,
+}
+
+# fetch(start_ms, end_ms) -> bars with open time in [start_ms, end_ms)
+Fetcher = Callable[[int, int], pd.DataFrame]
+
+# Markets are cached apart: the same symbol has other prices and columns
+MARKETS = ("futures", "spot")
+
+
+def interval_to_ms(interval: str) -> int:
+    match = re.fullmatch(r"(\d+)([mhdw])", interval)
+    if match is None:
+        raise ValueError(f"Interval {interval} is not supported.")
+    return int(match.group(1)) * INTERVAL_UNIT_MS[match.group(2)]
+
+
+class KlineCache:
+    """
+    On-disk cache of closed bars per market, symbol and interval.
+
+    Each series is one ``.npy`` array (open time in column 0, bar values
+    after it) loaded memory-mapped, plus a small ``.json`` with column
+    names and dtypes. ``get`` serves a range from disk and only calls the
+    fetcher for the missing head, tail or internal gaps.
+    """
+
+    def __init__(self, market: str, root: Optional[str] = None) -> None:
+        if market not in MARKETS:
+            raise ValueError(f"Market {market} is not supported.")
+        self.market = market
+        # BOT_DATA_DIR keeps e.g. mock exchange runs apart from real data
+        root = root or os.path.join(os.getenv("BOT_DATA_DIR", "data"), "klines")
+        self.root = os.path.join(root, market)
+
+    def _paths(self, symbol: str, interval: str) -> Tuple[str, str]:
+        base = os.path.join(self.root, f"{symbol.upper()}_{interval}")
+        return f"{base}.npy", f"{base}.json"
+
+    def load(self, symbol: str, interval: str) -> Tuple[np.ndarray, dict]:
+        values_path, meta_path = self._paths(symbol, interval)
+        if not (os.path.exists(values_path) and os.path.exists(meta_path)):
+            return np.empty((0, 0)), {}
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return np.load(values_path, mmap_mode="r"), meta
+
+    def save(self, symbol: str, interval: str, values: np.ndarray, meta: dict) -> None:
+        values_path, meta_path = self._paths(symbol, interval)
+        os.makedirs(self.root, exist_ok=True)
+        for path, write in (
+            (values_path, lambda f: np.save(f, values)),
+            (meta_path, lambda f: f.write(json.dumps(meta).encode())),
+        ):
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+
+    def get(
+        self,
+        symbol: str,
+        interval: str,
+        start_ms: int,
+        end_ms: int,
+        fetch: Fetcher,
+        columns: Optional[Sequence[str]] = None,
+    ) -> pd.DataFrame:
+        """
+        Closed bars with open time in ``[start_ms, end_ms)``. A series cached
+        with other ``columns`` than the fetcher returns counts as a miss and
+        is replaced.
+        """
+        interval_ms = interval_to_ms(interval)
+        start_ms = start_ms // interval_ms * interval_ms
+        # never cache the bar that is still forming
+        last_closed = (int(time.time() * 1000) // interval_ms - 1) * interval_ms
+        end_ms = min(-(-end_ms // interval_ms) * interval_ms, last_closed + interval_ms)
+
+        values, meta = self.load(symbol, interval)
+        if meta and columns is not None and meta["columns"] != list(columns):
+            logging.warning(
+                "Cached %s %s %s bars have columns %s, expected %s; refetching",
+                self.market,
+                symbol,
+                interval,
+                meta["columns"],
+                list(columns),
+            )
+            values, meta = np.empty((0, 0)), {}
+        missing = self._missing_ranges(values, meta, start_ms, end_ms, interval_ms)
+        if missing:
+            values, meta = self._fill(
+                symbol, interval, values, meta, missing, interval_ms, fetch
+            )
+
+        return self._to_dataframe(values, meta, start_ms, end_ms)
+
+    def _missing_ranges(
+        self,
+        values: np.ndarray,
+        meta: dict,
+        start_ms: int,
+        end_ms: int,
+        interval_ms: int,
+    ) -> List[Tuple[int, int]]:
+        if len(values) == 0:
+            return [(start_ms, end_ms)] if start_ms < end_ms else []
+
+        timestamps = values[:, 0].astype(np.int64)
+        missing = []
+        # bars before head_ms were already requested, the exchange has none
+        head_ms = min(int(timestamps[0]), meta.get("head_ms", timestamps[0]))
+        if start_ms < head_ms:
+            missing.append((start_ms, head_ms))
+        # a short backfill only needs the part of the tail it asks for
+        tail_ms = max(int(timestamps[-1]) + interval_ms, start_ms)
+        if end_ms > tail_ms:
+            missing.append((tail_ms, end_ms))
+
+        lo, hi = np.searchsorted(timestamps, [start_ms, end_ms])
+        window = timestamps[max(lo - 1, 0) : hi + 1]
+        known_gaps = {tuple(gap) for gap in meta.get("gaps", [])}
+        for i in np.flatnonzero(np.diff(window) != interval_ms):
+            gap = (int(window[i]) + interval_ms, int(window[i + 1]))
+            if gap not in known_gaps:
+                missing.append(gap)
+        return missing
+
+    def _fill(
+        self,
+        symbol: str,
+        interval: str,
+        values: np.ndarray,
+        meta: dict,
+        missing: List[Tuple[int, int]],
+        interval_ms: int,
+        fetch: Fetcher,
+    ) -> Tuple[np.ndarray, dict]:
+        frames = []
+        for start_ms, end_ms in missing:
+            logging.info(
+                "Fetching %s %s bars %s - %s", symbol, interval, start_ms, end_ms
+            )
+            df = fetch(start_ms, end_ms)
+            df = df[
+                (df.index >= pd.Timestamp(start_ms, unit="ms", tz="UTC"))
+                & (df.index < pd.Timestamp(end_ms, unit="ms", tz="UTC"))
+            ]
+            if len(df):
+                frames.append(df)
+
+        if not meta:
+            if not frames:
+                return values, meta
+            index = frames[0].index
+            meta = {
+                "columns": list(frames[0].columns),
+                "dtypes": {
+                    column: str(dtype) for column, dtype in frames[0].dtypes.items()
+                },
+                "tz": str(index.tz) if index.tz is not None else "UTC",
+                "index_name": index.name,
+            }
+        fetched = [
+            np.column_stack(
+                [
+                    df.index.as_unit("ms").asi8.astype(np.float64),
+                    df[meta["columns"]].to_numpy(dtype=np.float64),
+                ]
+            )
+            for df in frames
+        ]
+        merged = np.concatenate([np.asarray(values)] * (len(values) > 0) + fetched)
+        # keep the most recently fetched copy of a duplicated open time
+        order = np.argsort(merged[:, 0], kind="stable")[::-1]
+        _, first = np.unique(merged[order, 0], return_index=True)
+        merged = merged[order[first]]
+
+        # whatever is still missing inside a fetched range does not exist on
+        # the exchange (e.g. maintenance); remember it instead of refetching
+        timestamps = merged[:, 0].astype(np.int64)
+        gaps = {tuple(gap) for gap in meta.get("gaps", [])}
+        for i in np.flatnonzero(np.diff(timestamps) != interval_ms):
+            gap = (int(timestamps[i]) + interval_ms, int(timestamps[i + 1]))
+            if any(start <= gap[0] and gap[1] <= end for start, end in missing):
+                gaps.add(gap)
+        meta["gaps"] = sorted(gaps)
+        meta["head_ms"] = min(
+            [int(timestamps[0]), meta.get("head_ms", int(timestamps[0]))]
+            + [start for start, _ in missing]
+        )
+
+        self.save(symbol, interval, merged, meta)
+        return self.load(symbol, interval)
+
+    @staticmethod
+    def _to_dataframe(
+        values: np.ndarray, meta: dict, start_ms: int, end_ms: int
+    ) -> pd.DataFrame:
+        if not meta:
+            return pd.DataFrame()
+        lo, hi = np.searchsorted(values[:, 0], [start_ms, end_ms])
+        rows = np.array(values[lo:hi])
+        index = pd.to_datetime(rows[:, 0].astype(np.int64), unit="ms", utc=True)
+        index = index.tz_convert(meta["tz"]).rename(meta["index_name"])
+        df = pd.DataFrame(rows[:, 1:], index=index, columns=meta["columns"])
+        return df.astype(meta["dtypes"])
@@ -0,0 +1,45 @@
+import json
+from typing import Tuple, Union
+
+try:
+    import orjson
+
+    json_loads = orjson.loads
+except ImportError:
+    json_loads = json.loads
+
+# Raw kline payload keys, in the column order of KLINE_COLUMNS in ring_buffer
+KLINE_KEYS = ("o", "h", "l", "c", "v", "q", "n", "V", "Q")
+UNICORNFY_KLINE_KEYS = (
+    "open_price",
+    "high_price",
+    "low_price",
+    "close_price",
+    "base_volume",
+    "quote",
+    "number_of_trades",
+    "taker_by_base_asset_volume",
+    "taker_by_quote_asset_volume",
+)
+
+Kline = Tuple[int, Tuple[float, ...]]
+
+
+def decode_kline(bar: dict) -> Kline:
+    """
+    ``k`` payload of a kline/continuous_kline event -> ``(open_time_ms,
+    values)``, ready for ``OHLCVRingBuffer.append``.
+    """
+    return bar["t"], tuple([float(bar[key]) for key in KLINE_KEYS])
+
+
+def decode_unicornfy_kline(kline: dict) -> Kline:
+    return kline["kline_start_time"], tuple(
+        [float(kline[key]) for key in UNICORNFY_KLINE_KEYS]
+    )
+
+
+def decode_kline_message(message: Union[str, bytes]) -> Tuple[bool, Kline]:
+    """Raw websocket text -> ``(is_closed, kline)``."""
+    bar = json_loads(message)["k"]
+    return bar["x"], decode_kline(bar)
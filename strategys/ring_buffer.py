@@ -0,0 +1,143 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+KLINE_COLUMNS = (
+    "open",
+    "high",
+    "low",
+    "close",
+    "volume",
+    "quote_asset",
+    "trades",
+    "taker_buy_base",
+    "take_buy_quote",
+)
+
+
+class OHLCVRingBuffer:
+    """
+    Fixed-capacity bar store backed by NumPy.
+
+    Every row is written twice, at ``i`` and ``i + capacity``, so the last
+    ``capacity`` bars are always one contiguous slice. Column access returns
+    zero-copy, chronologically ordered views that stay valid until the next
+    ``append``. Timestamps are bar open times in epoch milliseconds.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        columns: Sequence[str] = KLINE_COLUMNS,
+        tz: str = "Asia/Bangkok",
+        index_name: str = "datetime",
+        dtypes: Optional[Dict[str, str]] = None,
+    ) -> None:
+        self.capacity = capacity
+        self.columns = list(columns)
+        self.tz = tz
+        self.index_name = index_name
+        self.dtypes = dtypes or {}
+        self._column_index = {name: i for i, name in enumerate(self.columns)}
+        self._values = np.zeros((len(self.columns), 2 * capacity), dtype=np.float64)
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+        self._count = 0
+
+    @classmethod
+    def from_dataframe(
+        cls,
+        df: pd.DataFrame,
+        capacity: int,
+        columns: Optional[Sequence[str]] = None,
+    ) -> "OHLCVRingBuffer":
+        columns = list(df.columns if columns is None else columns)
+        index = df.index
+        buffer = cls(
+            capacity=capacity,
+            columns=columns,
+            tz=str(index.tz) if index.tz is not None else "UTC",
+            index_name=index.name or "datetime",
+            dtypes={
+                column: str(df[column].dtype)
+                for column in columns
+                if df[column].dtype != np.float64
+            },
+        )
+        buffer.extend(
+            timestamps=index.as_unit("ms").asi8[-capacity:],
+            values=df[columns].to_numpy(dtype=np.float64)[-capacity:],
+        )
+        return buffer
+
+    def __len__(self) -> int:
+        return min(self._count, self.capacity)
+
+    @property
+    def _start(self) -> int:
+        if self._count <= self.capacity:
+            return 0
+        return self._count % self.capacity
+
+    @property
+    def last_timestamp(self) -> Optional[int]:
+        if self._count == 0:
+            return None
+        return int(self._timestamps[(self._count - 1) % self.capacity])
+
+    def append(self, timestamp: int, values: Sequence[float]) -> bool:
+        """
+        Append one bar in O(1). A bar with the same open time as the last
+        one replaces it; an older bar is ignored and ``False`` is returned.
+        """
+        last_timestamp = self.last_timestamp
+        if last_timestamp is not None and timestamp <= last_timestamp:
+            if timestamp < last_timestamp:
+                return False
+            self._count -= 1
+
+        position = self._count % self.capacity
+        self._values[:, position] = values
+        self._values[:, position + self.capacity] = values
+        self._timestamps[position] = timestamp
+        self._timestamps[position + self.capacity] = timestamp
+        self._count += 1
+        return True
+
+    def append_dataframe(self, df: pd.DataFrame) -> None:
+        self.extend(
+            timestamps=df.index.as_unit("ms").asi8,
+            values=df[self.columns].to_numpy(dtype=np.float64),
+        )
+
+    def extend(self, timestamps: Sequence[int], values: np.ndarray) -> None:
+        for timestamp, row in zip(timestamps, values):
+            self.append(int(timestamp), row)
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        start = self._start
+        return self._values[self._column_index[column], start : start + len(self)]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        start = self._start
+        return self._timestamps[start : start + len(self)]
+
+    def last(self, column: str) -> float:
+        return float(
+            self._values[self._column_index[column], (self._count - 1) % self.capacity]
+        )
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Copy the buffer into a DataFrame, for logging and debugging."""
+        index = pd.to_datetime(self.timestamps, unit="ms", utc=True).tz_convert(self.tz)
+        index.name = self.index_name
+        start = self._start
+        df = pd.DataFrame(
+            self._values[:, start : start + len(self)].T.copy(),
+            index=index,
+            columns=self.columns,
+        )
+        if self.dtypes:
+            df = df.astype(self.dtypes)
+        return df
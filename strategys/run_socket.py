@@ -1,13 +1,22 @@
 import asyncio
-import json
+import random
+import time
 import pandas as pd
 import pytz
 # import vectorbtpro as vbt
 import websockets
 import logging
 
-from utils import get_historical_data, msg_to_dataframe
-from adx_strategy import Strategy
+from strategys.utils import get_historical_data
+from strategys.adx_strategy import Strategy
+from strategys.kline_cache import interval_to_ms
+from strategys.kline_decoder import decode_kline, json_loads
+from strategys.ring_buffer import OHLCVRingBuffer
+
+# A connection with no message for this long is treated as dead
+STALE_AFTER = 30
+# Reconnect backoff: uniform in [1, min(MAX_BACKOFF, 2 ** attempts)] seconds
+MAX_BACKOFF = 60
 
 
 class BinanceWebsocketHandler:
@@ -16,13 +25,19 @@ class BinanceWebsocketHandler:
         symbol: str = "btcusdt",
         interval: str = "1m",
         bar_range: int = 250,
-        sql: bool = True
+        sql: bool = True,
+        recorder=None,
     ) -> None:
+        """
+        ``recorder`` (a ``utils.stream_recorder.StreamRecorder``) gets every
+        raw message with its receive time, keyed by the stream URI.
+        """
         self.symbol = symbol
         self.intreval = interval
         self.tz = pytz.timezone('Asia/Bangkok')
         self.bar_range = bar_range
         self.sql = sql
+        self.recorder = recorder
 
         self.connections = []
         self.connections.append(
@@ -32,44 +47,50 @@ class BinanceWebsocketHandler:
             f'wss://stream.binance.com:9443/ws/{self.symbol}@trade'
         )
 
-        self.data = get_historical_data(
-            symbol=self.symbol,
-            interval=self.intreval,
-            bar_range=self.bar_range
+        self.bars = OHLCVRingBuffer.from_dataframe(
+            get_historical_data(
+                symbol=self.symbol,
+                interval=self.intreval,
+                bar_range=self.bar_range
+            ),
+            capacity=self.bar_range,
         )
         self.strategy = Strategy()
 
         # Start Trade #
         self.strategy.compute_signal(
-            close_price=self.data['Close'],
-            high_price=self.data['High'],
-            low_price=self.data['Low'],
+            close_price=self.bars['Close'],
+            high_price=self.bars['High'],
+            low_price=self.bars['Low'],
         )
 
         self.strategy.condition(
-            close_price=self.data['Close'].iloc[-1],
+            close_price=self.bars.last('Close'),
         )
 
         self.strategy.execute_order_long(
-            close_price=self.data['Close'].iloc[-1],
-            open_price=self.data['Open'].iloc[-1],
-            high_price=self.data['High'].iloc[-1],
-            low_price=self.data['Low'].iloc[-1],
+            close_price=self.bars.last('Close'),
+            open_price=self.bars.last('Open'),
+            high_price=self.bars.last('High'),
+            low_price=self.bars.last('Low'),
         )
 
+    @property
+    def data(self) -> pd.DataFrame:
+        return self.bars.to_dataframe()
+
     def update_dataframe(self, lastest_df: pd.DataFrame) -> None:
-        self.data = pd.concat([self.data, lastest_df])
-        self.data = self.data[-self.bar_range:]
+        self.bars.append_dataframe(lastest_df)
 
     async def handle_trade_message(self, message) -> None:
-        msg = json.loads(message)
+        msg = json_loads(message)
         current_price = float(msg['p'])
         self.strategy.execute_stop_order_long(
             current_price=current_price,
         )
 
     async def handle_kline_1m_message(self, message) -> None:
-        msg = json.loads(message)
+        msg = json_loads(message)
         bar = msg['k']
         is_close = bar['x']
         # print(
@@ -85,24 +106,27 @@ class BinanceWebsocketHandler:
         #     low_price=float(bar['l']),
         # )
         if is_close:
-            df = msg_to_dataframe(info=bar, interval=self.intreval, tz=self.tz)
-            self.update_dataframe(df)
+            timestamp, values = decode_kline(bar)
+            if timestamp <= self.bars.last_timestamp:
+                # already backfilled after a reconnect
+                return
+            self.bars.append(timestamp, values)
 
             self.strategy.compute_signal(
-                close_price=self.data['Close'],
-                high_price=self.data['High'],
-                low_price=self.data['Low'],
+                close_price=self.bars['Close'],
+                high_price=self.bars['High'],
+                low_price=self.bars['Low'],
             )
 
             self.strategy.condition(
-                close_price=self.data['Close'].iloc[-1],
+                close_price=self.bars.last('Close'),
             )
 
             self.strategy.execute_order_long(
-                close_price=self.data['Close'].iloc[-1],
-                open_price=self.data['Open'].iloc[-1],
-                high_price=self.data['High'].iloc[-1],
-                low_price=self.data['Low'].iloc[-1],
+                close_price=self.bars.last('Close'),
+                open_price=self.bars.last('Open'),
+                high_price=self.bars.last('High'),
+                low_price=self.bars.last('Low'),
             )
             # self.strategy.execute_order_short(
             #     close_price=self.data['Close'].iloc[-1],
@@ -111,24 +135,91 @@ class BinanceWebsocketHandler:
             #     low_price=self.data['Low'].iloc[-1],
             # )
 
-    async def handle_socket(self, uri):
-        async with websockets.connect(uri) as websocket:
-            if 'kline_1m' in uri:
-                handle_message = self.handle_kline_1m_message
-            elif 'kline_1h' in uri:
-                handle_message = self.handle_kline_1m_message
-            elif "trade" in uri:
-                handle_message = self.handle_trade_message
+    def message_handler(self, uri):
+        if 'kline_1m' in uri:
+            return self.handle_kline_1m_message
+        elif 'kline_1h' in uri:
+            return self.handle_kline_1m_message
+        elif "trade" in uri:
+            return self.handle_trade_message
+
+    async def handle_recorded(self, uri, message, received) -> None:
+        """Replay entry point for ``utils.stream_recorder.replay``."""
+        await self.message_handler(uri)(message)
+
+    async def backfill(self) -> None:
+        """
+        Append the bars closed while the kline stream was down. The REST
+        fetch blocks, so it runs in a thread; the bars and the strategy are
+        only updated back on the event loop, where the trade stream uses
+        them too.
+        """
+        missed = int(
+            (time.time() * 1000 - self.bars.last_timestamp)
+            // interval_to_ms(self.intreval)
+        )
+        df = await asyncio.to_thread(
+            get_historical_data,
+            symbol=self.symbol,
+            interval=self.intreval,
+            bar_range=min(missed + 1, self.bar_range),
+        )
+        df = df[df.index.as_unit('ms').asi8 > self.bars.last_timestamp]
+        logging.info(f"Backfilling {len(df)} bars")
+        if len(df) == 0:
+            return
+        self.update_dataframe(df)
+        self.strategy.compute_signal(
+            close_price=self.bars['Close'],
+            high_price=self.bars['High'],
+            low_price=self.bars['Low'],
+        )
+        self.strategy.condition(
+            close_price=self.bars.last('Close'),
+        )
 
+    async def handle_socket(self, uri):
+        """
+        Read ``uri`` forever. A dropped or silent connection is opened again
+        after a jittered exponential backoff; for the kline stream the bars
+        missed meanwhile are backfilled before reading on.
+        """
+        handle_message = self.message_handler(uri)
+        attempts = 0
+        reconnecting = False
+        while True:
             try:
-                async for message in websocket:
-                    await handle_message(message)
-            except asyncio.TimeoutError:
-                logging.warning(f"Connection to {uri} timed out. Retrying...")
-                # print(f"Connection to {uri} timed out. Retrying...")
-                await self.handle_socket(uri)  # retry connection
-            async for message in websocket:
-                await handle_message(message)
+                async with websockets.connect(
+                    uri, ping_interval=20, ping_timeout=20
+                ) as websocket:
+                    if reconnecting and 'kline' in uri:
+                        try:
+                            await self.backfill()
+                        except Exception as e:
+                            # reconnect and try again rather than trade on a gap
+                            raise ConnectionError(f"backfill failed: {e}") from e
+                    reconnecting = False
+                    while True:
+                        message = await asyncio.wait_for(
+                            websocket.recv(), timeout=STALE_AFTER
+                        )
+                        attempts = 0
+                        if self.recorder is not None:
+                            self.recorder.write(uri, message, time.time())
+                        await handle_message(message)
+            except (
+                asyncio.TimeoutError,
+                websockets.ConnectionClosed,
+                OSError,
+            ) as e:
+                delay = random.uniform(1, min(MAX_BACKOFF, 2 ** attempts))
+                attempts += 1
+                reconnecting = True
+                logging.warning(
+                    f"Connection to {uri} lost ({e!r}). "
+                    f"Retrying in {delay:.1f}s..."
+                )
+                await asyncio.sleep(delay)
 
     async def run(self):
         await asyncio.gather(
@@ -0,0 +1,126 @@
+import json
+import logging
+import os
+import time
+import zipfile
+from collections import deque
+from typing import Any, Optional, Tuple
+
+import numpy as np
+
+from .ring_buffer import OHLCVRingBuffer
+
+SNAPSHOT_VERSION = 1
+
+
+def to_state(value: Any) -> Any:
+    """
+    JSON-able copy of a streaming indicator: objects become dicts of their
+    attributes, deques and tuples become lists. NaN is kept (``json``
+    writes it as ``NaN``).
+    """
+    if hasattr(value, "__dict__"):
+        return {name: to_state(item) for name, item in vars(value).items()}
+    if isinstance(value, (deque, list, tuple)):
+        return [to_state(item) for item in value]
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def restore_state(target: Any, state: dict) -> None:
+    """
+    Load ``to_state`` output into a freshly built ``target`` of the same
+    type; nested objects and deques are refilled in place of new ones.
+    """
+    for name, value in state.items():
+        current = getattr(target, name, None)
+        if isinstance(current, deque):
+            items = (tuple(item) if isinstance(item, list) else item for item in value)
+            setattr(target, name, deque(items, maxlen=current.maxlen))
+        elif hasattr(current, "__dict__") and isinstance(value, dict):
+            restore_state(current, value)
+        else:
+            setattr(target, name, value)
+
+
+class StateSnapshot:
+    """
+    Crash-safe snapshot of one symbol's bar buffer and strategy state.
+
+    One ``.npz`` per symbol and interval holds the bar open times, the bar
+    values and the state as JSON (strategy fields plus buffer metadata).
+    It is written and fsynced to a temporary file and renamed over the old
+    one, so a crash or power loss leaves either snapshot intact.
+    """
+
+    def __init__(self, symbol: str, interval: str, root: Optional[str] = None):
+        self.symbol = symbol.upper()
+        self.interval = interval
+        self.root = root or os.path.join(os.getenv("BOT_DATA_DIR", "data"), "snapshots")
+        self.path = os.path.join(self.root, f"{self.symbol}_{interval}.npz")
+
+    def save(self, bars: OHLCVRingBuffer, state: dict) -> None:
+        meta = {
+            "version": SNAPSHOT_VERSION,
+            "symbol": self.symbol,
+            "interval": self.interval,
+            "saved": time.time(),
+            "capacity": bars.capacity,
+            "columns": bars.columns,
+            "tz": bars.tz,
+            "index_name": bars.index_name,
+            "dtypes": bars.dtypes,
+            "state": state,
+        }
+        values = np.column_stack([bars[column] for column in bars.columns])
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez(
+                f,
+                timestamps=bars.timestamps,
+                values=values,
+                meta=np.frombuffer(json.dumps(meta).encode(), dtype=np.uint8),
+            )
+            # on disk before the rename, or a crash can leave it truncated
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # the rename is only durable once the directory entry is
+        dir_fd = os.open(self.root, os.O_RDONLY)
+        try:
+            os.fsync(dir_fd)
+        finally:
+            os.close(dir_fd)
+
+    def load(self) -> Optional[Tuple[OHLCVRingBuffer, dict]]:
+        """The saved bars and state, or None if there is no usable snapshot."""
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with np.load(self.path) as data:
+                meta = json.loads(data["meta"].tobytes())
+                timestamps = data["timestamps"]
+                values = data["values"]
+        except (OSError, EOFError, ValueError, KeyError, zipfile.BadZipFile) as e:
+            logging.warning(f"Ignoring unreadable snapshot {self.path}: {e}")
+            return None
+        if (
+            len(timestamps) == 0
+            or meta.get("version") != SNAPSHOT_VERSION
+            or meta.get("symbol") != self.symbol
+            or meta.get("interval") != self.interval
+        ):
+            logging.warning(f"Ignoring empty or mismatched snapshot {self.path}")
+            return None
+
+        bars = OHLCVRingBuffer(
+            capacity=meta["capacity"],
+            columns=meta["columns"],
+            tz=meta["tz"],
+            index_name=meta["index_name"],
+            dtypes=meta["dtypes"],
+        )
+        bars.extend(timestamps, values)
+        return bars, meta["state"]
@@ -0,0 +1,215 @@
+from typing import Tuple
+
+import numpy as np
+
+try:
+    from numba import njit, prange
+except ImportError:
+    prange = range
+
+    def njit(*args, **kwargs):
+        """No numba: run the kernels as plain Python."""
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
+
+# Exit reason codes returned by the kernels, as indices into EXIT_REASONS
+EXIT_OPEN, EXIT_SIGNAL, EXIT_TS, EXIT_TP, EXIT_SL = range(5)
+EXIT_REASONS = ("open", "signal", "TS", "TP", "SL")
+
+# Columns of the parameter matrix for sweep_stops
+STOP_PARAMS = ("stop_loss", "take_profit", "trail_stop_activate", "trail_stop_execute")
+# Columns of the sweep_stops result
+SWEEP_STATS = ("n_trades", "win_rate", "total_return", "max_drawdown")
+
+
+@njit(cache=True)
+def _stop_exits(
+    entries: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    exit_signal: np.ndarray,
+    side: int,
+    stop_loss: float,
+    take_profit: float,
+    trail_activate: float,
+    trail_execute: float,
+):
+    n_bars = close.shape[0]
+    n_entries = entries.shape[0]
+    taken = np.empty(n_entries, np.int64)
+    exit_index = np.full(n_entries, -1, np.int64)
+    reason = np.zeros(n_entries, np.int8)
+    exit_price = np.full(n_entries, np.nan)
+    has_signal = exit_signal.shape[0] > 0
+
+    count = 0
+    last_exit = -1
+    for k in range(n_entries):
+        i = entries[k]
+        if i <= last_exit:
+            continue
+        entry = close[i]
+        stop = entry * (1 - side * stop_loss)
+        target = entry * (1 + side * take_profit)
+        activate = entry * (1 + side * trail_activate)
+        extreme = np.nan
+        taken[count] = i
+
+        j = i
+        while j < n_bars:
+            if has_signal and j > i and exit_signal[j]:
+                reason[count] = EXIT_SIGNAL
+                exit_price[count] = close[j]
+                break
+            code = EXIT_OPEN
+            price = 0.0
+            if side > 0:
+                bar = high[j]
+                if bar >= activate:
+                    if np.isnan(extreme) or bar > extreme:
+                        extreme = bar
+                    if bar <= extreme * (1 - trail_execute):
+                        code, price = EXIT_TS, bar
+                if bar >= target:
+                    if code == EXIT_OPEN:
+                        code, price = EXIT_TP, target
+                elif bar <= stop:
+                    if code == EXIT_OPEN:
+                        code, price = EXIT_SL, stop
+            else:
+                bar = low[j]
+                if bar <= activate:
+                    if np.isnan(extreme) or bar < extreme:
+                        extreme = bar
+                    if bar >= extreme * (1 + trail_execute):
+                        code, price = EXIT_TS, bar
+                if bar <= target:
+                    if code == EXIT_OPEN:
+                        code, price = EXIT_TP, target
+                elif bar >= stop:
+                    if code == EXIT_OPEN:
+                        code, price = EXIT_SL, stop
+            if code != EXIT_OPEN:
+                reason[count] = code
+                exit_price[count] = price
+                break
+            j += 1
+
+        count += 1
+        if j == n_bars:
+            # still open at the last bar, later entries cannot happen
+            break
+        exit_index[count - 1] = j
+        last_exit = j
+    return taken[:count], exit_index[:count], reason[:count], exit_price[:count]
+
+
+def stop_exits(
+    entries: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    stop_loss: float,
+    take_profit: float,
+    trail_stop_activate: float,
+    trail_stop_execute: float,
+    exit_signal: np.ndarray = None,
+    side: int = 1,
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Run the TP/SL/trailing-stop state machine of
+    ``execute_stop_order_long_backtest`` for every trade at once.
+
+    ``entries`` are candidate entry bars in ascending order, entered at the
+    close; a candidate while a position is open is skipped. Stops are
+    checked from the entry bar on with the bar high (``side=1``) or, for
+    shorts, the mirrored rules on the bar low (``side=-1``). If
+    ``exit_signal`` is given, a True bar after the entry closes the trade
+    at its close before stops are checked.
+
+    Returns ``(entry_index, exit_index, reason, exit_price)``; ``reason``
+    indexes ``EXIT_REASONS`` and a trade still open at the end has exit
+    index -1.
+    """
+    if exit_signal is None:
+        exit_signal = np.empty(0, dtype=np.bool_)
+    return _stop_exits(
+        np.ascontiguousarray(entries, dtype=np.int64),
+        np.ascontiguousarray(high, dtype=np.float64),
+        np.ascontiguousarray(low, dtype=np.float64),
+        np.ascontiguousarray(close, dtype=np.float64),
+        np.ascontiguousarray(exit_signal, dtype=np.bool_),
+        side,
+        stop_loss,
+        take_profit,
+        trail_stop_activate,
+        trail_stop_execute,
+    )
+
+
+@njit(cache=True, parallel=True)
+def _sweep_stops(entries, high, low, close, exit_signal, side, params):
+    stats = np.empty((params.shape[0], 4))
+    for c in prange(params.shape[0]):
+        taken, exit_index, _, exit_price = _stop_exits(
+            entries,
+            high,
+            low,
+            close,
+            exit_signal,
+            side,
+            params[c, 0],
+            params[c, 1],
+            params[c, 2],
+            params[c, 3],
+        )
+        n_trades = 0
+        wins = 0
+        equity = 1.0
+        peak = 1.0
+        max_drawdown = 0.0
+        for k in range(taken.shape[0]):
+            if exit_index[k] < 0:
+                continue
+            ret = side * (exit_price[k] / close[taken[k]] - 1)
+            n_trades += 1
+            if ret > 0:
+                wins += 1
+            equity *= 1 + ret
+            peak = max(peak, equity)
+            max_drawdown = max(max_drawdown, 1 - equity / peak)
+        stats[c, 0] = n_trades
+        stats[c, 1] = wins / n_trades if n_trades else np.nan
+        stats[c, 2] = equity - 1
+        stats[c, 3] = max_drawdown
+    return stats
+
+
+def sweep_stops(
+    entries: np.ndarray,
+    high: np.ndarray,
+    low: np.ndarray,
+    close: np.ndarray,
+    params: np.ndarray,
+    exit_signal: np.ndarray = None,
+    side: int = 1,
+) -> np.ndarray:
+    """
+    ``stop_exits`` for every row of ``params`` (columns ``STOP_PARAMS``),
+    in parallel. Returns one row of ``SWEEP_STATS`` per parameter row, the
+    same numbers ``sweep.summarize_trades`` gives for the trades.
+    """
+    if exit_signal is None:
+        exit_signal = np.empty(0, dtype=np.bool_)
+    return _sweep_stops(
+        np.ascontiguousarray(entries, dtype=np.int64),
+        np.ascontiguousarray(high, dtype=np.float64),
+        np.ascontiguousarray(low, dtype=np.float64),
+        np.ascontiguousarray(close, dtype=np.float64),
+        np.ascontiguousarray(exit_signal, dtype=np.bool_),
+        side,
+        np.ascontiguousarray(params, dtype=np.float64).reshape(-1, len(STOP_PARAMS)),
+    )
@@ -0,0 +1,159 @@
+import math
+from collections import deque
+from typing import Deque, Iterable, Tuple
+
+import numpy as np
+
+from .adx import RMAState, _safe_div
+
+EPSILON = float(np.finfo(float).eps)
+
+
+class StreamingEMA:
+    """
+    O(1) EMA matching ``ta.ema``: SMA seed over the first ``length`` values,
+    then ``ewm(span=length, adjust=False)``.
+    """
+
+    def __init__(self, length: int = 10) -> None:
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count: int = 0
+        self.seed_sum: float = 0.0
+        self.value: float = math.nan
+
+    def seed(self, values: Iterable[float]) -> float:
+        for value in values:
+            self.update(value)
+        return self.value
+
+    def update(self, value: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            self.seed_sum += value
+        elif self.count == self.length:
+            self.value = (self.seed_sum + value) / self.length
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * value
+        return self.value
+
+
+class StreamingRSI:
+    """
+    O(1) RSI matching ``ta.rsi`` with Wilder RMA state for gains and losses.
+    """
+
+    def __init__(self, length: int = 14) -> None:
+        self.length = length
+        self.prev_close: float = math.nan
+        self.gain_rma = RMAState(length)
+        self.loss_rma = RMAState(length)
+        self.value: float = math.nan
+
+    def seed(self, values: Iterable[float]) -> float:
+        for value in values:
+            self.update(value)
+        return self.value
+
+    def update(self, close: float) -> float:
+        change = close - self.prev_close
+        if math.isnan(change):
+            positive = negative = math.nan
+        else:
+            positive = max(change, 0.0)
+            negative = min(change, 0.0)
+        gain = self.gain_rma.update(positive)
+        loss = self.loss_rma.update(negative)
+        self.value = 100 * _safe_div(gain, gain + abs(loss))
+        self.prev_close = close
+        return self.value
+
+
+class RollingMean:
+    """Fixed-length rolling mean; NaN inside the window yields NaN."""
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self.values: Deque[float] = deque(maxlen=length)
+        self.index: int = -1
+        self.last_nan: int = -1
+
+    def update(self, value: float) -> float:
+        self.index += 1
+        self.values.append(value)
+        if math.isnan(value):
+            self.last_nan = self.index
+        if self.index - self.last_nan < self.length:
+            return math.nan
+        return sum(self.values) / self.length
+
+
+class RollingMinMax:
+    """
+    Rolling min/max over ``length`` values with monotonic deques, amortised
+    O(1) per update. NaN inside the window yields NaN like ``rolling().min()``.
+    """
+
+    def __init__(self, length: int) -> None:
+        self.length = length
+        self.min_deque: Deque[Tuple[int, float]] = deque()
+        self.max_deque: Deque[Tuple[int, float]] = deque()
+        self.index: int = -1
+        self.last_nan: int = -1
+
+    def update(self, value: float) -> Tuple[float, float]:
+        self.index += 1
+        expired = self.index - self.length
+        if math.isnan(value):
+            self.last_nan = self.index
+        else:
+            while self.min_deque and self.min_deque[-1][1] >= value:
+                self.min_deque.pop()
+            self.min_deque.append((self.index, value))
+            while self.max_deque and self.max_deque[-1][1] <= value:
+                self.max_deque.pop()
+            self.max_deque.append((self.index, value))
+
+        while self.min_deque and self.min_deque[0][0] <= expired:
+            self.min_deque.popleft()
+        while self.max_deque and self.max_deque[0][0] <= expired:
+            self.max_deque.popleft()
+
+        if self.index - self.last_nan < self.length:
+            return math.nan, math.nan
+        return self.min_deque[0][1], self.max_deque[0][1]
+
+
+class StreamingStochRSI:
+    """
+    O(1) StochRSI matching ``ta.stochrsi`` with ``mamode="sma"``.
+
+    RSI uses Wilder state, the stochastic window uses monotonic min/max
+    deques and K/D are running SMAs of length ``k`` and ``d``.
+    """
+
+    def __init__(
+        self, length: int = 14, rsi_length: int = 14, k: int = 3, d: int = 3
+    ) -> None:
+        self.rsi = StreamingRSI(rsi_length)
+        self.min_max = RollingMinMax(length)
+        self.k_mean = RollingMean(k)
+        self.d_mean = RollingMean(d)
+        self.k: float = math.nan
+        self.d: float = math.nan
+
+    def seed(self, values: Iterable[float]) -> Tuple[float, float]:
+        for value in values:
+            self.update(value)
+        return self.k, self.d
+
+    def update(self, close: float) -> Tuple[float, float]:
+        rsi = self.rsi.update(close)
+        lowest, highest = self.min_max.update(rsi)
+        rsi_range = highest - lowest
+        if rsi_range == 0:
+            rsi_range = EPSILON
+        stoch = 100 * _safe_div(rsi - lowest, rsi_range)
+        self.k = self.k_mean.update(stoch)
+        self.d = self.d_mean.update(self.k)
+        return self.k, self.d
@@ -0,0 +1,196 @@
+import itertools
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .adx_strategy import Strategy
+from .stop_kernel import STOP_PARAMS, SWEEP_STATS, sweep_stops
+from .vectorized import condition_arrays, long_signals, signal_arrays, simulate_long
+
+OHLC_COLUMNS = ["Open", "High", "Low", "Close"]
+
+# Worker-side view of the shared OHLC block, set by _attach_shared.
+_shared: Dict[str, Any] = {}
+
+
+def expand_grid(grid: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """
+    ``{"stop_setting.stop_loss": [0.02, 0.03], ...}`` -> one dict per
+    combination. Keys are ``<Strategy setting attribute>.<field>``.
+    """
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*grid.values())]
+
+
+def build_strategy(params: Dict[str, Any]) -> Strategy:
+    strategy = Strategy()
+    fields: Dict[str, Dict[str, Any]] = {}
+    for key, value in params.items():
+        setting_name, field = key.split(".")
+        fields.setdefault(setting_name, {})[field] = value
+    for setting_name, values in fields.items():
+        setting = getattr(strategy, setting_name)
+        setattr(strategy, setting_name, type(setting)(**values))
+    return strategy
+
+
+def summarize_trades(trades: List[dict]) -> Dict[str, float]:
+    """Compounded return and max drawdown of closed long trades."""
+    entries = [trade["price"] for trade in trades if trade["action"] == "entry"]
+    exits = [trade["price"] for trade in trades if trade["action"] == "exit"]
+    n_trades = len(exits)
+    if n_trades == 0:
+        return {
+            "n_trades": 0,
+            "win_rate": np.nan,
+            "total_return": 0.0,
+            "max_drawdown": 0.0,
+        }
+
+    returns = np.asarray(exits) / np.asarray(entries[:n_trades]) - 1
+    equity = np.cumprod(1 + returns)
+    peak = np.maximum.accumulate(np.concatenate(([1.0], equity)))[1:]
+    return {
+        "n_trades": n_trades,
+        "win_rate": float(np.mean(returns > 0)),
+        "total_return": float(equity[-1] - 1),
+        "max_drawdown": float(np.max(1 - equity / peak)),
+    }
+
+
+def _attach_shared(name: str, n_bars: int, index: np.ndarray, start: int) -> None:
+    shm = shared_memory.SharedMemory(name=name)
+    values = np.ndarray((len(OHLC_COLUMNS), n_bars), dtype=np.float64, buffer=shm.buf)
+    index = pd.DatetimeIndex(index)
+    _shared["shm"] = shm
+    _shared["start"] = start
+    _shared["series"] = {
+        column: pd.Series(values[i], index=index, copy=False)
+        for i, column in enumerate(OHLC_COLUMNS)
+    }
+
+
+def _run_combination(params: Dict[str, Any]) -> Dict[str, Any]:
+    series = _shared["series"]
+    strategy = build_strategy(params)
+    signals = signal_arrays(
+        strategy,
+        close_price=series["Close"],
+        high_price=series["High"],
+        low_price=series["Low"],
+    )
+    conditions = condition_arrays(
+        strategy, signals=signals, close_price=series["Close"]
+    )
+    trades = simulate_long(
+        strategy,
+        conditions=conditions,
+        high_price=series["High"],
+        close_price=series["Close"],
+        start=_shared["start"],
+    )
+    return {**params, **summarize_trades(trades)}
+
+
+def run_sweep(
+    data: pd.DataFrame,
+    grid: Dict[str, List[Any]],
+    start: int = 0,
+    max_workers: Optional[int] = None,
+    chunksize: int = 16,
+) -> pd.DataFrame:
+    """
+    Run the vectorized backtest for every combination in ``grid`` over a
+    process pool. The OHLC block is placed in shared memory once and
+    attached by each worker, so tasks only carry their parameters.
+
+    Results are ranked by total return, then by drawdown.
+    """
+    combinations = expand_grid(grid)
+    values = data[OHLC_COLUMNS].to_numpy(dtype=np.float64).T
+    shm = shared_memory.SharedMemory(create=True, size=values.nbytes)
+    try:
+        shared = np.ndarray(values.shape, dtype=np.float64, buffer=shm.buf)
+        shared[:] = values
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_shared,
+            initargs=(shm.name, values.shape[1], data.index.to_numpy(), start),
+        ) as executor:
+            results = list(
+                executor.map(_run_combination, combinations, chunksize=chunksize)
+            )
+    finally:
+        shm.close()
+        shm.unlink()
+
+    return (
+        pd.DataFrame(results)
+        .sort_values(["total_return", "max_drawdown"], ascending=[False, True])
+        .reset_index(drop=True)
+    )
+
+
+def run_stop_sweep(
+    data: pd.DataFrame,
+    grid: Dict[str, List[Any]],
+    params: Optional[Dict[str, Any]] = None,
+    start: int = 0,
+) -> pd.DataFrame:
+    """
+    Like ``run_sweep`` for a grid of ``stop_setting`` fields only. The
+    signals do not depend on them, so they are computed once (with
+    ``params`` for the other settings) and every combination runs in the
+    compiled ``sweep_stops`` kernel.
+    """
+    strategy = build_strategy(params or {})
+    signals = signal_arrays(
+        strategy,
+        close_price=data["Close"],
+        high_price=data["High"],
+        low_price=data["Low"],
+    )
+    conditions = condition_arrays(strategy, signals=signals, close_price=data["Close"])
+    entries, exit_signal = long_signals(conditions)
+
+    combinations = expand_grid(grid)
+    defaults = strategy.stop_setting.model_dump()
+    stop_params = np.array(
+        [
+            [
+                combination.get(f"stop_setting.{name}", defaults[name])
+                for name in STOP_PARAMS
+            ]
+            for combination in combinations
+        ]
+    )
+    stats = sweep_stops(
+        entries=np.flatnonzero(entries[start:]) + start,
+        high=data["High"].to_numpy(),
+        low=data["Low"].to_numpy(),
+        close=data["Close"].to_numpy(),
+        params=stop_params,
+        exit_signal=exit_signal,
+    )
+    results = pd.DataFrame(combinations).join(pd.DataFrame(stats, columns=SWEEP_STATS))
+    results["n_trades"] = results["n_trades"].astype(int)
+    return results.sort_values(
+        ["total_return", "max_drawdown"], ascending=[False, True]
+    ).reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    # python -m strategys.sweep ohlc.csv
+    data = pd.read_csv(sys.argv[1], index_col=0, parse_dates=True)
+    grid = {
+        "adx_setting.adx_level": [15, 20, 25],
+        "ema_setting.ema_length": [20, 50],
+        "stop_setting.stop_loss": [0.02, 0.03, 0.05],
+        "stop_setting.take_profit": [0.04, 0.06, 0.1],
+        "stop_setting.trail_stop_activate": [0.01, 0.02],
+    }
+    print(run_sweep(data, grid, start=250).head(20))
@@ -0,0 +1,182 @@
+import ast
+import json
+from typing import List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .adx_strategy import Strategy
+from .kline_cache import interval_to_ms
+
+# Exit reasons in the order execute_stop_order_long checks them
+STOP_REASONS = ("TS", "TP", "SL")
+
+
+def _records(text: str) -> List[dict]:
+    text = text.strip()
+    try:
+        if text.startswith("["):
+            return json.loads(text)
+        decoder = json.JSONDecoder()
+        records, pos = [], 0
+        while pos < len(text):
+            record, pos = decoder.raw_decode(text, pos)
+            records.append(record)
+            while pos < len(text) and text[pos].isspace():
+                pos += 1
+        return records
+    except json.JSONDecodeError:
+        # example_data/trade_from_ws.json is a Python repr (False/True)
+        records = ast.literal_eval(text)
+        return records if isinstance(records, list) else [records]
+
+
+def load_trades(path: str) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Trade ticks from a recording of the ``<symbol>@trade`` stream, either
+    UnicornFied records (``trade_time``/``price``, like
+    example_data/trade_from_ws.json) or raw events (``T``/``p``), one after
+    another or in a JSON array. Returns trade times in ms and prices, sorted
+    by time.
+    """
+    with open(path) as f:
+        records = _records(f.read())
+    times = np.fromiter(
+        (record.get("trade_time", record.get("T")) for record in records),
+        dtype=np.int64,
+        count=len(records),
+    )
+    prices = np.fromiter(
+        (float(record.get("price", record.get("p"))) for record in records),
+        dtype=np.float64,
+        count=len(records),
+    )
+    order = np.argsort(times, kind="stable")
+    return times[order], prices[order]
+
+
+def _first(mask: np.ndarray) -> int:
+    """Index of the first True, or ``len(mask)``."""
+    if mask.size == 0:
+        # argmax raises on an empty mask, e.g. no ticks before the exit bar
+        return mask.size
+    index = int(np.argmax(mask))
+    return index if mask[index] else mask.size
+
+
+def scan_long_stops(
+    prices: np.ndarray,
+    stop_loss: float,
+    take_profit: float,
+    trail_activate: float,
+    trail_execute: float,
+) -> Tuple[int, Optional[str]]:
+    """
+    First tick at which ``execute_stop_order_long`` would close a long, as
+    ``(index, reason)``, or ``(len(prices), None)`` if it stays open.
+
+    The trail only follows ticks at or above the activation price, like the
+    live check, so the highest price is a running max over those ticks.
+    """
+    active = prices >= trail_activate
+    highest = np.maximum.accumulate(np.where(active, prices, -np.inf))
+    hits = (
+        _first(active & (prices <= highest * (1 - trail_execute))),
+        _first(prices >= take_profit),
+        _first(prices <= stop_loss),
+    )
+    index = min(hits)
+    if index == prices.size:
+        return index, None
+    return index, STOP_REASONS[hits.index(index)]
+
+
+def simulate_long_ticks(
+    strategy: Strategy,
+    conditions: pd.DataFrame,
+    close_price: pd.Series,
+    tick_times: np.ndarray,
+    tick_prices: np.ndarray,
+    interval: str = "1h",
+    start: int = 0,
+) -> List[dict]:
+    """
+    ``simulate_long`` with stops replayed on trade ticks instead of bar highs.
+
+    Entries and signal exits still happen at bar closes. After an entry, the
+    ticks up to the next signal exit are scanned at once with
+    ``scan_long_stops``; on a stop the position is flat from that tick and
+    the next bar close may enter again. Only bars closing inside the tick
+    recording are simulated.
+    """
+    stop_setting = strategy.stop_setting
+    close = close_price.to_numpy()
+    bar_end = close_price.index.as_unit("ms").asi8 + interval_to_ms(interval)
+    entry = (
+        conditions["buy_condition"]
+        & conditions["run_trend_up"]
+        & conditions["price_above_ema"]
+        & conditions["price_above_short_ema"]
+    ).to_numpy()
+    exit_signal = (
+        ~conditions["buy_condition"]
+        & (conditions["close_long_condition"] | conditions["price_below_ema"])
+    ).to_numpy()
+    if tick_times.size == 0:
+        return []
+    first = max(start, int(np.searchsorted(bar_end, tick_times[0])))
+    last = int(np.searchsorted(bar_end, tick_times[-1], side="right"))
+    entries = np.flatnonzero(entry[:last])
+    exits = np.flatnonzero(exit_signal[:last])
+
+    trades = []
+    bar = first
+    while True:
+        k = np.searchsorted(entries, bar)
+        if k == entries.size:
+            break
+        i = entries[k]
+        price = close[i]
+        trades.append(
+            {"datetime": close_price.index[i], "action": "entry", "price": price}
+        )
+        k = np.searchsorted(exits, i, side="right")
+        j = exits[k] if k < exits.size else None
+
+        lo = np.searchsorted(tick_times, bar_end[i])
+        hi = tick_times.size if j is None else np.searchsorted(tick_times, bar_end[j])
+        offset, reason = scan_long_stops(
+            tick_prices[lo:hi],
+            stop_loss=price * (1 - stop_setting.stop_loss),
+            take_profit=price * (1 + stop_setting.take_profit),
+            trail_activate=price * (1 + stop_setting.trail_stop_activate),
+            trail_execute=stop_setting.trail_stop_execute,
+        )
+        if reason is not None:
+            tick = lo + offset
+            trades.append(
+                {
+                    "datetime": pd.Timestamp(
+                        tick_times[tick], unit="ms", tz=close_price.index.tz
+                    ),
+                    "action": "exit",
+                    "reason": reason,
+                    "price": tick_prices[tick],
+                }
+            )
+            # flat from this tick; the bar it falls in may enter on close
+            bar = int(np.searchsorted(bar_end, tick_times[tick], side="right"))
+        elif j is not None:
+            trades.append(
+                {
+                    "datetime": close_price.index[j],
+                    "action": "exit",
+                    "reason": "signal",
+                    "price": close[j],
+                }
+            )
+            bar = j + 1
+        else:
+            # still open when the recording ends
+            break
+    return trades
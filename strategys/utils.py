@@ -4,6 +4,8 @@ import vectorbtpro as vbt
 from datetime import datetime, timedelta
 import logging
 
+from strategys.kline_cache import KlineCache, Fetcher
+
 
 def msg_to_dataframe(
     info: dict,
@@ -38,6 +40,34 @@ def msg_to_dataframe(
     return df
 
 
+# Bar columns of vectorbtpro's BinanceData (spot), as cached by KlineCache
+SPOT_KLINE_COLUMNS = (
+    'Open',
+    'High',
+    'Low',
+    'Close',
+    'Volume',
+    'Quote volume',
+    'Trade count',
+    'Taker base volume',
+    'Taker quote volume',
+)
+
+
+def binance_data_fetcher(symbol: str, timeframe: str) -> Fetcher:
+    def fetch(start_ms: int, end_ms: int) -> pd.DataFrame:
+        data = vbt.BinanceData.fetch(
+            symbol.upper(),
+            start=pd.Timestamp(start_ms, unit='ms', tz='UTC'),
+            end=pd.Timestamp(end_ms, unit='ms', tz='UTC'),
+            timeframe=timeframe,
+            tz="Asia/Bangkok",
+        )
+        return data.data[symbol.upper()][list(SPOT_KLINE_COLUMNS)]
+
+    return fetch
+
+
 def get_historical_data(
     symbol: str,
     interval: str,
@@ -59,14 +89,14 @@ def get_historical_data(
     else:
         raise ValueError(f'Interval {interval} is not supported.')
 
-    data = vbt.BinanceData.fetch(
-        symbol.upper(),
-        start=start_date,
-        end=date_now,
-        timeframe=timeframe,
-        tz="Asia/Bangkok",
+    data = KlineCache(market="spot").get(
+        symbol=symbol,
+        interval=interval,
+        start_ms=int(start_date.timestamp() * 1000),
+        end_ms=int(date_now.timestamp() * 1000),
+        fetch=binance_data_fetcher(symbol=symbol, timeframe=timeframe),
+        columns=SPOT_KLINE_COLUMNS,
     )
-    data = data.data[symbol.upper()]
     data.index = data.index.rename('Datetime')
 
     return data
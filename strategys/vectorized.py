@@ -0,0 +1,165 @@
+from typing import List, Tuple
+
+import numpy as np
+import pandas as pd
+import pandas_ta as ta
+
+from .adx import ADX
+from .adx_strategy import Strategy
+from .stop_kernel import EXIT_REASONS, stop_exits
+
+# K equals D whenever the stochastic is flat over the smoothing window. The
+# live ``k > d`` is then decided by rounding noise, which differs between the
+# full-history and the windowed indicators, so ties count as no trend here.
+TREND_TOLERANCE = 1e-6
+
+
+def signal_arrays(
+    strategy: Strategy,
+    close_price: pd.Series,
+    high_price: pd.Series,
+    low_price: pd.Series,
+) -> pd.DataFrame:
+    """
+    Full-history counterpart of ``Strategy.compute_signal``: every indicator
+    is computed once over the whole series instead of per window.
+    """
+    adx, plusDI, minusDI = ADX(
+        high=high_price,
+        low=low_price,
+        close=close_price,
+        period=strategy.adx_setting.adx_lenght,
+    )
+    stoch_rsi = ta.stochrsi(
+        close=close_price,
+        length=strategy.stochastic_setting.stochastic_lenght,
+        rsi_length=strategy.rsi_setting.rsi_lenght,
+        k=strategy.stochastic_setting.smooth_k,
+        d=strategy.stochastic_setting.smooth_d,
+    )
+    return pd.DataFrame(
+        {
+            "adx": adx,
+            "plusDI": plusDI,
+            "minusDI": minusDI,
+            "k": stoch_rsi.iloc[:, 0],
+            "d": stoch_rsi.iloc[:, 1],
+            "ema": ta.ema(close_price, length=strategy.ema_setting.ema_length),
+            "ema_short": ta.ema(
+                close_price, length=strategy.ema_setting.ema_short_length
+            ),
+        },
+        index=close_price.index,
+    )
+
+
+def condition_arrays(
+    strategy: Strategy, signals: pd.DataFrame, close_price: pd.Series
+) -> pd.DataFrame:
+    """
+    Boolean arrays equal to ``Strategy.condition`` evaluated at every bar,
+    except that K and D within ``TREND_TOLERANCE`` are no trend.
+    """
+    adx_setting = strategy.adx_setting
+    stochastic_setting = strategy.stochastic_setting
+    plusDI = signals["plusDI"].to_numpy()
+    minusDI = signals["minusDI"].to_numpy()
+    k = signals["k"].to_numpy()
+    d = signals["d"].to_numpy()
+    ema = signals["ema"].to_numpy()
+    ema_short = signals["ema_short"].to_numpy()
+    close = close_price.to_numpy()
+
+    return pd.DataFrame(
+        {
+            "buy_condition": (plusDI > minusDI)
+            & (plusDI > adx_setting.adx_level)
+            & (plusDI - minusDI > adx_setting.adx_diff),
+            "sell_condition": (minusDI > plusDI)
+            & (minusDI > adx_setting.adx_level)
+            & (minusDI - plusDI > adx_setting.adx_diff),
+            "close_long_condition": (plusDI < minusDI)
+            | (plusDI < adx_setting.adx_level),
+            "close_short_condition": (minusDI < plusDI)
+            | (minusDI < adx_setting.adx_level),
+            "price_above_ema": close > ema,
+            "price_below_ema": close < ema,
+            "price_above_short_ema": close > ema_short,
+            "price_below_short_ema": close < ema_short,
+            "stoc_ob": (k >= stochastic_setting.overbought_level)
+            & (d >= stochastic_setting.overbought_level),
+            "stoc_os": (k <= stochastic_setting.oversold_level)
+            & (d <= stochastic_setting.oversold_level),
+            "run_trend_up": k - d > TREND_TOLERANCE,
+            "run_trend_down": d - k > TREND_TOLERANCE,
+        },
+        index=close_price.index,
+    )
+
+
+def long_signals(conditions: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Bars where ``execute_order_long`` would enter a long from flat, and
+    bars where it would close an open one.
+    """
+    buy = conditions["buy_condition"].to_numpy()
+    entries = (
+        buy
+        & conditions["run_trend_up"].to_numpy()
+        & conditions["price_above_ema"].to_numpy()
+        & conditions["price_above_short_ema"].to_numpy()
+    )
+    exit_signal = ~buy & (
+        conditions["close_long_condition"].to_numpy()
+        | conditions["price_below_ema"].to_numpy()
+    )
+    return entries, exit_signal
+
+
+def simulate_long(
+    strategy: Strategy,
+    conditions: pd.DataFrame,
+    high_price: pd.Series,
+    close_price: pd.Series,
+    start: int = 0,
+) -> List[dict]:
+    """
+    Position state machine of ``execute_order_long`` followed by
+    ``execute_stop_order_long_backtest``, run over precomputed conditions
+    from bar ``start`` onwards. Returns the entry/exit events; trailing-stop
+    exits fire when the high is already below the trail level, so they are
+    priced at the bar high. The stops run in the compiled ``stop_exits``
+    kernel.
+    """
+    stop_setting = strategy.stop_setting
+    index = close_price.index
+    entries, exit_signal = long_signals(conditions)
+    entry_index, exit_index, reasons, exit_prices = stop_exits(
+        entries=np.flatnonzero(entries[start:]) + start,
+        high=high_price.to_numpy(),
+        # longs only look at the high
+        low=high_price.to_numpy(),
+        close=close_price.to_numpy(),
+        stop_loss=stop_setting.stop_loss,
+        take_profit=stop_setting.take_profit,
+        trail_stop_activate=stop_setting.trail_stop_activate,
+        trail_stop_execute=stop_setting.trail_stop_execute,
+        exit_signal=exit_signal,
+    )
+
+    close = close_price.to_numpy()
+    trades = []
+    for i, j, reason, price in zip(
+        entry_index.tolist(), exit_index.tolist(), reasons.tolist(), exit_prices
+    ):
+        trades.append({"datetime": index[i], "action": "entry", "price": close[i]})
+        if j >= 0:
+            trades.append(
+                {
+                    "datetime": index[j],
+                    "action": "exit",
+                    "reason": EXIT_REASONS[reason],
+                    "price": price,
+                }
+            )
+    return trades
@@ -0,0 +1,28 @@
+import importlib
+
+import pytest
+
+# the backtests and the legacy spot runner need the research dependencies
+pytest.importorskip("pandas_ta")
+pytest.importorskip("vectorbtpro")
+
+
+@pytest.mark.parametrize(
+    "module",
+    [
+        "strategys.backtesting",
+        "strategys.run_socket",
+        "strategys.sweep",
+        "strategys.tick_backtest",
+        "strategys.vectorized",
+    ],
+)
+def test_import(module):
+    importlib.import_module(module)
+
+
+def test_backtest_modes():
+    from strategys.backtesting import Backtest
+
+    for mode in ("window", "vectorized", "ticks"):
+        assert callable(getattr(Backtest, f"simulate_{mode}"))
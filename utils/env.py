@@ -0,0 +1,14 @@
+from functools import lru_cache
+
+from dotenv import find_dotenv, load_dotenv
+
+
+@lru_cache(maxsize=None)
+def load_env() -> str:
+    """
+    Load ``.env.local`` into ``os.environ`` once per process; every module
+    calls this at import and only the first call searches and parses.
+    """
+    path = find_dotenv(filename=".env.local", raise_error_if_not_found=True)
+    load_dotenv(path, override=True)
+    return path
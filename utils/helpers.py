@@ -92,6 +92,7 @@ def get_kline_1H(
 
 def kline_list_to_df(
     kline_list: list,
+    drop_last: bool = True,
 ) -> pd.DataFrame:
     df = pd.DataFrame(
         kline_list,
@@ -117,7 +118,8 @@ def kline_list_to_df(
     df = df.astype(float)
     df["trades"] = df["trades"].astype(int)
 
-    return df[:-1]
+    # the last kline from the API is the bar that is still forming
+    return df[:-1] if drop_last else df
 
 
 def unicornfy_to_dataframe(kline: dict) -> pd.DataFrame:
@@ -0,0 +1,104 @@
+import json
+import os
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# Stages from the exchange closing a bar to our order being filled
+STAGES = (
+    "receive",  # exchange event time E -> message received
+    "parse",  # decode the kline payload
+    "update",  # append to the bar buffer
+    "compute_signal",
+    "condition",
+    "signal_to_submit",  # message received -> order request sent
+    "order_ack",  # order request round trip
+    "order_fill",  # order request sent -> fill seen on the user stream
+    "snapshot",  # state snapshot written after the signal is scheduled
+)
+
+
+class LatencyRecorder:
+    """
+    Rolling latency samples per ``(symbol, stage)``.
+
+    Each key keeps its last ``window`` samples (seconds) in a preallocated
+    list, so ``record`` is a dict lookup and one item write. Percentiles are
+    only computed when a snapshot is taken.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self.window = window
+        self._samples: Dict[Tuple[str, str], List[float]] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        # order id -> (symbol, wall time the request was sent)
+        self._pending: Dict[str, Tuple[str, float]] = {}
+
+    def record(self, symbol: str, stage: str, seconds: float) -> None:
+        key = (symbol, stage)
+        samples = self._samples.get(key)
+        if samples is None:
+            samples = self._samples[key] = [0.0] * self.window
+            self._counts[key] = 0
+        count = self._counts[key]
+        samples[count % self.window] = seconds
+        self._counts[key] = count + 1
+
+    def mark(self, order_id: str, symbol: str, sent: float) -> None:
+        """Remember when an order was sent, for ``record_fill``."""
+        self._pending[order_id] = (symbol, sent)
+
+    def discard(self, order_id: str) -> None:
+        self._pending.pop(order_id, None)
+
+    def record_fill(self, order_id: str) -> None:
+        pending = self._pending.pop(order_id, None)
+        if pending is not None:
+            symbol, sent = pending
+            self.record(symbol, "order_fill", time.time() - sent)
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """``{symbol: {stage: {count, p50, p99, max}}}`` in milliseconds."""
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (symbol, stage), samples in self._samples.items():
+            count = self._counts[(symbol, stage)]
+            window = np.asarray(samples[: min(count, self.window)]) * 1000
+            p50, p99 = np.percentile(window, [50, 99])
+            result.setdefault(symbol, {})[stage] = {
+                "count": count,
+                "p50": float(p50),
+                "p99": float(p99),
+                "max": float(window.max()),
+            }
+        return result
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP stage_latency_ms Rolling latency per stage in milliseconds",
+            "# TYPE stage_latency_ms summary",
+        ]
+        for symbol, stages in self.snapshot().items():
+            for stage, stats in stages.items():
+                labels = f'symbol="{symbol}",stage="{stage}"'
+                for quantile, key in (("0.5", "p50"), ("0.99", "p99"), ("1", "max")):
+                    lines.append(
+                        f'stage_latency_ms{{{labels},quantile="{quantile}"}} '
+                        f"{stats[key]}"
+                    )
+                lines.append(f"stage_latency_ms_count{{{labels}}} {stats['count']}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str = "logs/latency") -> None:
+        """Write ``<path>.json`` and ``<path>.prom``, replacing old dumps."""
+        for file_path, text in (
+            (f"{path}.json", json.dumps(self.snapshot(), indent=2)),
+            (f"{path}.prom", self.to_prometheus()),
+        ):
+            tmp_path = f"{file_path}.tmp"
+            with open(tmp_path, "w") as f:
+                f.write(text)
+            os.replace(tmp_path, file_path)
+
+
+latency = LatencyRecorder()
@@ -0,0 +1,34 @@
+"""
+Defer third-party modules that are imported at startup but unused on the
+live path. Import this module before ``binance``: each name in
+``DEFERRED`` is registered as a placeholder that imports the real module
+on its first attribute access.
+"""
+
+import importlib
+import sys
+import types
+
+DEFERRED = (
+    # python-binance parses date strings with it; we only pass ms timestamps
+    "dateparser",
+)
+
+
+class DeferredModule(types.ModuleType):
+    def __getattr__(self, attr: str):
+        module = self.__dict__.get("_module")
+        if module is None:
+            if sys.modules.get(self.__name__) is self:
+                del sys.modules[self.__name__]
+            module = self._module = importlib.import_module(self.__name__)
+        return getattr(module, attr)
+
+
+def defer(name: str) -> None:
+    if name not in sys.modules:
+        sys.modules[name] = DeferredModule(name)
+
+
+for name in DEFERRED:
+    defer(name)
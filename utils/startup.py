@@ -0,0 +1,73 @@
+import json
+import logging
+import os
+import time
+from typing import Awaitable, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+def process_age() -> Optional[float]:
+    """Seconds since this process started (Linux ``/proc``), or None."""
+    try:
+        with open("/proc/self/stat") as f:
+            # fields after the command name; starttime is field 22
+            start_ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/uptime") as f:
+            uptime = float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+    return uptime - start_ticks / os.sysconf("SC_CLK_TCK")
+
+
+class StartupProfile:
+    """
+    Where a cold start spends its time.
+
+    ``steps`` are durations of the awaitables run through ``timed``; they
+    may overlap, so they need not add up. ``marks`` are seconds since the
+    process started (since this module was imported where ``/proc`` is
+    missing), e.g. ``imports`` when ``main`` begins and ``first_message``
+    when the first stream message is handled.
+    """
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.offset = process_age() or 0.0
+        self.steps: Dict[str, float] = {}
+        self.marks: Dict[str, float] = {}
+
+    def elapsed(self) -> float:
+        return self.offset + time.perf_counter() - self.started
+
+    def mark(self, name: str) -> None:
+        """Record the time since process start, once per name."""
+        self.marks.setdefault(name, self.elapsed())
+
+    async def timed(self, name: str, awaitable: Awaitable[T]) -> T:
+        started = time.perf_counter()
+        try:
+            return await awaitable
+        finally:
+            self.steps[name] = time.perf_counter() - started
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        """``{"marks": {...}, "steps": {...}}`` in milliseconds."""
+        return {
+            "marks": {name: s * 1000 for name, s in self.marks.items()},
+            "steps": {name: s * 1000 for name, s in self.steps.items()},
+        }
+
+    def log(self) -> None:
+        for kind, values in self.snapshot().items():
+            for name, ms in values.items():
+                logging.info(f"startup {kind[:-1]} {name}: {ms:.1f} ms")
+
+    def dump(self, path: str = "logs/startup.json") -> None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+startup = StartupProfile()
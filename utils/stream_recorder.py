@@ -0,0 +1,130 @@
+import asyncio
+import glob
+import gzip
+import json
+import logging
+import os
+import time
+import zlib
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+# (receive time, stream label, message as received)
+Record = Tuple[float, str, Any]
+Handle = Callable[[str, Any, float], Awaitable[None]]
+
+
+class StreamRecorder:
+    """
+    Append-only, gzip-compressed log of raw websocket messages.
+
+    Each message is one JSON line ``[received, stream, message]`` in
+    ``<root>/<name>-<start time>.jsonl.gz``; a new segment starts once the
+    current one passes ``segment_bytes``. Lines are buffered and written
+    with a zlib sync flush by the first ``write`` after ``flush_interval``
+    seconds, so a crash loses only the buffer and everything before it
+    stays readable.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        name: str,
+        segment_bytes: int = 64 * 1024**2,
+        flush_interval: float = 1.0,
+    ) -> None:
+        self.root = root
+        self.name = name
+        self.segment_bytes = segment_bytes
+        self.flush_interval = flush_interval
+        self.file: Optional[gzip.GzipFile] = None
+        self.path: Optional[str] = None
+        self.buffer: list = []
+        self.last_flush = time.monotonic()
+        self.count = 0
+
+    def _open(self) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        self.path = os.path.join(
+            self.root, f"{self.name}-{datetime.now():%Y%m%d_%H%M%S_%f}.jsonl.gz"
+        )
+        self.file = gzip.open(self.path, "ab")
+
+    def write(self, stream: str, message: Any, received: float) -> None:
+        self.buffer.append(json.dumps([received, stream, message]))
+        self.count += 1
+        if time.monotonic() - self.last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self) -> None:
+        self.last_flush = time.monotonic()
+        if not self.buffer:
+            return
+        if self.file is None:
+            self._open()
+        self.file.write(("\n".join(self.buffer) + "\n").encode())
+        self.buffer.clear()
+        self.file.flush(zlib.Z_SYNC_FLUSH)
+        if self.file.fileobj.tell() >= self.segment_bytes:
+            self.close()
+
+    def close(self) -> None:
+        if self.buffer:
+            self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+def segment_paths(pattern: str) -> list:
+    """Segments matching a glob (or one directory), oldest first."""
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, "*.jsonl.gz")
+    return sorted(glob.glob(pattern))
+
+
+def read_records(paths: Iterable[str]) -> Iterator[Record]:
+    """Records of the segments in order; a truncated tail is skipped."""
+    for path in paths:
+        with gzip.open(path, "rt") as f:
+            try:
+                for line in f:
+                    if line.endswith("\n"):
+                        received, stream, message = json.loads(line)
+                        yield received, stream, message
+            except (EOFError, gzip.BadGzipFile, zlib.error):
+                logging.warning(f"{path}: truncated segment")
+
+
+async def replay(
+    records: Iterable[Record], handle: Handle, speed: Optional[float] = 1.0
+) -> Dict[str, float]:
+    """
+    Push recorded messages through ``handle(stream, message, received)``.
+
+    ``speed=1`` keeps the recorded gaps, ``speed=N`` shortens them N times
+    and ``None``/``0`` replays as fast as the handler goes. ``received`` is
+    the replay-time receive timestamp. Returns message count, elapsed
+    seconds and messages per second.
+    """
+    count = 0
+    started = time.monotonic()
+    first = None
+    for recorded, stream, message in records:
+        if first is None:
+            first = recorded
+        if speed:
+            delay = (recorded - first) / speed - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+        elif count % 100 == 0:
+            # let order tasks and timers run
+            await asyncio.sleep(0)
+        await handle(stream, message, time.time())
+        count += 1
+    elapsed = time.monotonic() - started
+    return {
+        "messages": count,
+        "seconds": elapsed,
+        "messages_per_second": count / elapsed if elapsed else 0.0,
+    }
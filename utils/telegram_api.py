@@ -1,12 +1,10 @@
 import os
 
 import requests
-from dotenv import find_dotenv, load_dotenv
 
-load_dotenv(
-    find_dotenv(filename=".env.local", raise_error_if_not_found=True),
-    override=True,
-)
+from utils.env import load_env
+
+load_env()
 
 TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 CHAT_ID = os.getenv("CHAT_ID")
@@ -0,0 +1,139 @@
+import asyncio
+import logging
+from typing import List, Optional
+
+import aiohttp
+
+from utils.telegram_api import CHAT_ID, TELEGRAM_TOKEN
+
+# Telegram rejects longer texts
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TelegramNotifier:
+    """
+    Queue-backed Telegram sender for async code.
+
+    ``notify`` only enqueues and never waits. A single worker drains the
+    queue over one keep-alive ``aiohttp`` session, joins everything queued
+    during a burst into one message (up to ``MAX_MESSAGE_LENGTH``), and
+    sends at most one message per ``min_interval`` seconds, which keeps a
+    single chat under Telegram's rate limit.
+
+    When the queue is full the oldest message is dropped and the number of
+    dropped messages is reported with the next send. On 429 the worker
+    waits for Telegram's ``retry_after``; on other failures it backs off
+    exponentially and gives up on the message after ``max_retries``.
+    """
+
+    def __init__(
+        self,
+        token: str = TELEGRAM_TOKEN,
+        chat_id: str = CHAT_ID,
+        maxsize: int = 1000,
+        min_interval: float = 1.0,
+        max_retries: int = 5,
+        timeout: float = 10,
+    ) -> None:
+        self.url = f"https://api.telegram.org/bot{token}/sendMessage"
+        self.chat_id = chat_id
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.dropped = 0
+        # taken off the queue but did not fit in the last message
+        self.pending: Optional[str] = None
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.worker: Optional[asyncio.Task] = None
+
+    def notify(self, msg: str) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.queue.task_done()
+            self.dropped += 1
+        self.queue.put_nowait(msg)
+
+    async def start(self) -> None:
+        if self.worker is None:
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+            self.worker = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float = 10) -> None:
+        """Flush what is queued (for at most ``timeout`` seconds) and stop."""
+        if self.worker is None:
+            return
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logging.error(f"Telegram: {self.queue.qsize()} messages not sent")
+        self.worker.cancel()
+        await asyncio.gather(self.worker, return_exceptions=True)
+        await self.session.close()
+        self.worker = None
+        self.session = None
+
+    def _coalesce(self, first: str) -> List[str]:
+        messages = [first]
+        length = len(first)
+        while not self.queue.empty():
+            msg = self.queue.get_nowait()
+            if length + len(msg) + 1 > MAX_MESSAGE_LENGTH:
+                self.pending = msg
+                break
+            messages.append(msg)
+            length += len(msg) + 1
+        return messages
+
+    async def _run(self) -> None:
+        while True:
+            if self.pending is None:
+                first = await self.queue.get()
+            else:
+                first, self.pending = self.pending, None
+            messages = self._coalesce(first)
+            text = "\n".join(messages)
+            if self.dropped:
+                text = f"({self.dropped} messages dropped)\n{text}"
+                self.dropped = 0
+            try:
+                await self._send(text[:MAX_MESSAGE_LENGTH])
+            except Exception:
+                # one bad response must not stop the worker
+                logging.exception("Telegram: send failed")
+            finally:
+                for _ in messages:
+                    self.queue.task_done()
+            await asyncio.sleep(self.min_interval)
+
+    async def _send(self, text: str) -> None:
+        delay = self.min_interval
+        for _ in range(self.max_retries):
+            try:
+                async with self.session.post(
+                    self.url, data={"chat_id": self.chat_id, "text": text}
+                ) as response:
+                    if response.status == 200:
+                        return
+                    try:
+                        body = await response.json(content_type=None)
+                    except ValueError:
+                        # not JSON, e.g. a proxy's HTML error page
+                        body = {"description": await response.text()}
+                    if response.status == 429:
+                        delay = body.get("parameters", {}).get("retry_after", delay)
+                    elif response.status < 500:
+                        # a bad request will not succeed on retry
+                        logging.error(f"Telegram API Error: {body}")
+                        return
+                    logging.error(f"Telegram API Error: {response.status}")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                logging.error(f"Telegram: {e}")
+            await asyncio.sleep(delay)
+            delay *= 2
+        logging.error(f"Telegram: gave up on message {text[:100]!r}")
+
+
+notifier = TelegramNotifier()